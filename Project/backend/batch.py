@@ -0,0 +1,88 @@
+"""여러 스토리를 스토리보드→이미지→영상까지 한 번에 만드는 배치 실행 진입점 (야간 작업 등).
+
+	python -m backend.batch stories.json
+	python -m backend.batch stories.json --parallel 4 --workers 4
+	python -m backend.batch stories.json --workers 0            # 워커는 python -m backend.worker로 따로 실행 중
+
+같은 명령을 다시 실행하면 보고서(--report, 기본: <매니페스트>.report.json)를 읽고 이어서 진행한다.
+
+매니페스트 (JSON):
+	{"stories": [{"title": ..., "story": ... 또는 "story_file": ..., "style_key": ..., "min_shots_per_scene": ...}],
+	 "model": ..., "size": ..., "video": true, "fps": 24, "parallel": 2}
+스토리 목록만 담은 배열도 된다. story_file은 매니페스트 파일 기준 상대 경로.
+"""
+import argparse
+import json
+import os
+import signal
+import sys
+import threading
+from typing import Any, Dict
+
+
+def load_manifest(path: str) -> Dict[str, Any]:
+	with open(path, "r", encoding="utf-8") as f:
+		data = json.load(f)
+	if isinstance(data, list):
+		data = {"stories": data}
+	base = os.path.dirname(os.path.abspath(path))
+	stories = []
+	for story in data.get("stories", []):
+		story = dict(story)
+		story_file = story.pop("story_file", None)
+		if story_file:
+			with open(os.path.join(base, story_file), "r", encoding="utf-8") as f:
+				story["story"] = f.read()
+		stories.append(story)
+	return {**data, "stories": stories}
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description="매니페스트의 스토리들을 스토리보드→이미지→영상까지 일괄 생성")
+	parser.add_argument("manifest", help="스토리 매니페스트 JSON")
+	parser.add_argument("--report", default=None, help="보고서 경로 (기본: <매니페스트>.report.json)")
+	parser.add_argument("--parallel", type=int, default=None, help="동시에 진행할 프로젝트 수 (기본: 매니페스트 또는 BATCH_PARALLEL)")
+	parser.add_argument("--workers", type=int, default=2, help="이 프로세스에서 띄울 작업 워커 수 (0이면 외부 워커 사용)")
+	args = parser.parse_args()
+
+	manifest = load_manifest(args.manifest)
+	report_path = args.report or f"{os.path.splitext(args.manifest)[0]}.report.json"
+	if args.workers > 0:
+		# 워커 프로세스가 제공자 한도를 워커 수만큼 나눠 갖도록 (spawn된 자식은 환경변수를 물려받는다)
+		os.environ.setdefault("SCHEDULER_PROCESSES", str(args.workers))
+
+	from backend.main import JOB_DB_PATH, JOB_HANDLERS, JOB_HOOKS, run_batch
+	from backend.services.job_queue import WorkerPool
+
+	pool = WorkerPool(JOB_HANDLERS, size=args.workers, db_path=JOB_DB_PATH, hooks=JOB_HOOKS).start() if args.workers > 0 else None
+	stop = threading.Event()
+	signal.signal(signal.SIGTERM, lambda *_: stop.set())
+	outcome: Dict[str, Any] = {}
+
+	def run():
+		outcome["report"] = run_batch(manifest, report_path, parallel=args.parallel, stop=stop)
+
+	runner = threading.Thread(target=run, name="batch")
+	runner.start()
+	print(f"배치 실행 중: 스토리 {len(manifest['stories'])}개 (보고서: {report_path})")
+	try:
+		while runner.is_alive():
+			runner.join(1.0)
+	except KeyboardInterrupt:
+		print("중단 중... 같은 명령을 다시 실행하면 이어서 진행합니다")
+		stop.set()
+		runner.join()
+	finally:
+		if pool is not None:
+			pool.stop()
+
+	report = outcome.get("report")
+	if report is None:
+		sys.exit(1)
+	print(json.dumps({"status": report["status"], **report["summary"]}, ensure_ascii=False, indent=2))
+	if report["status"] != "completed":
+		sys.exit(1)
+
+
+if __name__ == "__main__":
+	main()
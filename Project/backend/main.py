@@ -1,21 +1,38 @@
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse, Response, PlainTextResponse
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 import os
-from glob import glob
 import json
 import time
 import re
 import shutil
 import copy
+import asyncio
+import hashlib
+import tempfile
+import traceback
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 from backend.services.script_adjuster import adjust_script
 from backend.services.character_extractor import extract_characters
 from backend.services.prompt_generator import generate_prompts
-from backend.services.image_generator import generate_images, generate_images_with_progress, regenerate_single_image
-from backend.services.video_composer import compose_video
-from backend.services.storyboard_generator import generate_storyboard_from_story
+from backend.services.image_generator import generate_images, generate_images_with_progress, regenerate_single_image, warm_up_local_pipeline, local_pipeline_status, pipeline_manager, DEFAULT_FAL_CONCURRENCY
+from backend.services.image_cache import image_cache, link_or_copy
+from backend.services.video_composer import compose_video, segment_cache
+from backend.services.caption_renderer import dialogue_captions
+from backend.services.storyboard_generator import generate_storyboard_from_story, generate_storyboard_chunked, stream_storyboard_cuts, StoryCut
+from backend.services.storyboard_cache import storyboard_cache
+from backend.services.job_queue import JobQueue, WorkerPool, TERMINAL_EVENTS, FINISHED_STATES, JobCancelled, cancel_event
+from backend.services.state_cache import WriteBehindStateCache, atomic_write_json
+from backend.services.project_index import ProjectIndex, OutputsIndex
+from backend.services.metrics import registry as metrics_registry, render as render_metrics, STATE_SAVE_SECONDS
+from backend.services.scheduler import fal_scheduler, openai_scheduler, configure_for_processes, Cancelled
+from backend.services.media import resolve_media_path, file_etag, etag_matches, parse_range, iter_file, thumbnail_cache
+from backend.services.blob_store import BlobStore, DEFAULT_GC_GRACE_HOURS
 from openai import OpenAI
 from dotenv import load_dotenv
 import uuid
@@ -38,6 +55,15 @@ class StoryRequest(BaseModel):
 	story: str
 	min_shots_per_scene: Optional[int] = 1
 	style_key: Optional[str] = "surreal"
+	use_cache: Optional[bool] = True  # False면 캐시를 건너뛰고 GPT를 다시 호출
+	chunked: Optional[bool] = False  # True면 섹션/문단 단위로 나눠 동시에 생성 (긴 스토리용)
+
+
+class StoryboardImagesRequest(StoryRequest):
+	model: Optional[str] = "fal-ai/flux/dev"
+	size: Optional[str] = "portrait_16_9"
+	output_dir: Optional[str] = "../data/outputs"
+	max_concurrency: Optional[int] = None  # fal.ai 동시 요청 수 (None이면 서버 기본값)
 
 
 class ImageJobRequest(BaseModel):
@@ -46,6 +72,10 @@ class ImageJobRequest(BaseModel):
 	model: Optional[str] = "fal-ai/flux/dev"
 	size: Optional[str] = "portrait_16_9"
 	output_dir: Optional[str] = "../data/outputs"
+	max_concurrency: Optional[int] = None  # fal.ai 동시 요청 수 (None이면 서버 기본값)
+	use_cache: Optional[bool] = True  # 동일 프롬프트 결과 캐시 사용 여부
+	batch_size: Optional[int] = None  # 로컬 diffusers 모델의 배치 크기 (None이면 서버 기본값)
+	incremental: Optional[bool] = False  # True면 프롬프트/모델/크기가 같은 기존 이미지는 재사용하고 바뀐 컷만 생성
 
 
 class VideoJobRequest(BaseModel):
@@ -53,6 +83,12 @@ class VideoJobRequest(BaseModel):
 	fps: Optional[int] = 24
 	audio_path: Optional[str] = None
 	output_path: Optional[str] = "../data/outputs/final.mp4"
+	durations: Optional[List[float]] = None  # 이미지별 노출 시간(초), 부족하면 기본값으로 채움
+	size: Optional[str] = "portrait_16_9"
+	fade: Optional[float] = 0.0  # 컷 앞뒤 페이드 시간(초)
+	project_id: Optional[str] = None
+	captions: Optional[bool] = False  # True면 프로젝트 컷의 대사를 자막으로 넣는다 (project_id 필요, image_paths[i] ↔ cuts[i])
+	use_cache: Optional[bool] = True  # False면 컷 세그먼트 캐시를 쓰지 않고 전부 다시 인코딩
 
 
 class RegenerateImageRequest(BaseModel):
@@ -62,6 +98,8 @@ class RegenerateImageRequest(BaseModel):
 	model: Optional[str] = "fal-ai/flux/dev"
 	size: Optional[str] = "portrait_16_9"
 	output_dir: Optional[str] = "../data/outputs"
+	seed: Optional[int] = None
+	use_cache: Optional[bool] = True  # seed를 지정한 경우에만 캐시 사용 (seed가 없으면 "다시 생성"이므로 항상 새로 생성)
 
 
 class NewProjectRequest(BaseModel):
@@ -69,23 +107,49 @@ class NewProjectRequest(BaseModel):
 	mode: Optional[str] = "story"  # "fusion" or "story"
 
 
+class PipelineRequest(BaseModel):
+	model_id: str
+
+
+class BatchStory(BaseModel):
+	title: Optional[str] = None
+	story: str
+	style_key: Optional[str] = "surreal"
+	min_shots_per_scene: Optional[int] = 1
+
+
+class BatchRequest(BaseModel):
+	stories: List[BatchStory]
+	model: Optional[str] = "fal-ai/flux/dev"
+	size: Optional[str] = "portrait_16_9"
+	parallel: Optional[int] = None  # 동시에 진행할 프로젝트 수 (None이면 BATCH_PARALLEL)
+	video: Optional[bool] = True  # False면 이미지까지만 만든다
+	fps: Optional[int] = 24
+	captions: Optional[bool] = False  # 영상에 대사 자막을 넣을지
+	use_cache: Optional[bool] = True
+
+
 class ProjectStateUpdate(BaseModel):
 	title: Optional[str] = None
 	story: Optional[str] = None
 	min_shots_per_scene: Optional[int] = None
 	prompts: Optional[List[str]] = None
 	cuts: Optional[List[Dict[str, Any]]] = None
-	saved_results: Optional[List[str]] = None
+	saved_results: Optional[List[Any]] = None  # 경로 문자열 또는 결과 dict (index/prompt/path/fingerprint...)
 	image_job_id: Optional[str] = None
 	image_progress: Optional[Dict[str, Any]] = None
 	style_key: Optional[str] = None
 
 
 BASE_DIR = os.path.dirname(__file__)
-DATA_DIR = os.path.normpath(os.path.join(BASE_DIR, "../data"))
+# APP_DATA_DIR: 벤치마크/테스트에서 실제 데이터 폴더 대신 임시 폴더를 쓸 때 지정
+DATA_DIR = os.getenv("APP_DATA_DIR") or os.path.normpath(os.path.join(BASE_DIR, "../data"))
 OUTPUTS_DIR = os.path.join(DATA_DIR, "outputs")
 TEMP_DIR = os.path.join(DATA_DIR, "temp")
 PROJECTS_DIR = os.path.join(DATA_DIR, "projects")
+# 프로젝트 이미지는 내용 해시로 blob 저장소에 두고, 프로젝트별 outputs 폴더에는 하드링크만 둔다
+BLOB_DIR = os.getenv("BLOB_STORE_DIR") or os.path.join(DATA_DIR, "blobs")
+blob_store = BlobStore(BLOB_DIR)
 DEFAULT_STATE = {
 	"title": "",
 	"story": "",
@@ -112,6 +176,19 @@ def get_style_prompt_text(style_key: str) -> str:
 	return style_map.get(style_key, style_map["surreal"])
 
 
+def _build_cut_prompt(cut: StoryCut, style_text: str) -> str:
+	"""컷 하나를 이미지 생성용 프롬프트로 변환"""
+	characters_str = ", ".join(cut.characters) if cut.characters else "characters"
+	dialogues_str = "; ".join([f"{d.speaker}: {d.text}" for d in cut.dialogues[:3]])
+	return (
+		f"{cut.cut_name}, {cut.composition}. "
+		f"characters: {characters_str}. "
+		f"background: {cut.background}. "
+		f"dialogues: {dialogues_str}. "
+		f"{style_text}"
+	)
+
+
 def _normalize_saved_results(saved_results: Any, prompts: List[str]) -> list[dict]:
 	"""문자/구조 혼재된 saved_results를 통일된 dict 리스트로 정규화"""
 	normalized: list[dict] = []
@@ -127,11 +204,117 @@ def _normalize_saved_results(saved_results: Any, prompts: List[str]) -> list[dic
 				"prompt": item.get("prompt") or (prompts[i] if i < len(prompts) else ""),
 				"url": url,
 				"path": item.get("path", url),
-				"message": item.get("message", "")
+				"message": item.get("message", ""),
+				"sha256": item.get("sha256") or "",
+				"fingerprint": item.get("fingerprint") or ""
 			})
 	return normalized
 
 
+def _result_fingerprint(prompt: str, model: str, size: str) -> str:
+	"""이미지 결과가 어떤 (프롬프트, 모델, 크기)로 만들어졌는지 나타내는 값. 같으면 다시 생성할 필요가 없다"""
+	payload = json.dumps([prompt, model, size], ensure_ascii=False)
+	return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def _has_file(result: Dict[str, Any]) -> bool:
+	path = result.get("path") or ""
+	return bool(path) and not path.startswith(("http://", "https://")) and os.path.isfile(path)
+
+
+def _project_outputs_dir(project_id: str) -> str:
+	return os.path.join(PROJECTS_DIR, project_id, "outputs")
+
+
+def _resolve_output_dir(output_dir: Optional[str], project_id: Optional[str]) -> str:
+	"""프로젝트 작업은 클라이언트가 보낸 output_dir과 무관하게 프로젝트 전용 폴더에 저장한다
+	(공용 폴더에 image_XX.png를 쓰면 동시에 도는 프로젝트끼리 파일을 덮어쓴다)
+	"""
+	if project_id:
+		return _project_outputs_dir(project_id)
+	if output_dir and not os.path.isabs(output_dir):
+		return os.path.normpath(os.path.join(BASE_DIR, output_dir))
+	return output_dir or OUTPUTS_DIR
+
+
+def _store_result(result: Dict[str, Any]) -> Dict[str, Any]:
+	"""생성된 프로젝트 이미지를 blob 저장소에 등록. 같은 내용이 이미 있으면 출력 파일을 그 blob의 링크로 바꾼다"""
+	if _has_file(result):
+		result["sha256"] = blob_store.put(result["path"], result.get("sha256") or None)
+	return result
+
+
+def _write_manifest(proj_dir: str, saved_results: List[Dict[str, Any]]) -> None:
+	"""outputs/manifest.json: 프로젝트 출력 파일 → blob(sha256). 내용이 바뀐 경우에만 다시 쓴다"""
+	outputs_dir = os.path.join(proj_dir, "outputs")
+	images = []
+	for i, item in enumerate(saved_results):
+		path = item.get("path") or ""
+		if item.get("sha256") and os.path.dirname(os.path.abspath(path)) == os.path.abspath(outputs_dir):
+			images.append({
+				"index": item.get("index", i),
+				"file": os.path.basename(path),
+				"sha256": item["sha256"],
+				"blob": blob_store.relative_path(item["sha256"]),
+			})
+	manifest_path = os.path.join(outputs_dir, "manifest.json")
+	if not images and not os.path.isfile(manifest_path):
+		return
+	manifest = {"images": images}
+	try:
+		with open(manifest_path, "r", encoding="utf-8") as f:
+			if json.load(f) == manifest:
+				return
+	except (OSError, ValueError):
+		pass
+	os.makedirs(outputs_dir, exist_ok=True)
+	atomic_write_json(manifest_path, manifest)
+
+
+def _project_captions(project_id: str) -> List[List[str]]:
+	"""프로젝트 컷 순서대로 대사 자막 목록"""
+	state = _load_project_state(project_id)
+	return [dialogue_captions(cut.get("dialogues", [])) for cut in state.get("cuts", []) if isinstance(cut, dict)]
+
+
+def _carry_over_results(saved_results: Any, old_prompts: List[str], new_prompts: List[str]) -> list[dict]:
+	"""스토리보드를 다시 만들었을 때 프롬프트가 그대로인 컷의 이미지를 새 순서에 맞춰 옮긴다.
+	나머지 자리는 빈 dict. 파일명(image_XX)도 새 index에 맞게 바꿔서 이후 생성이 다른 컷의 파일을 덮어쓰지 않게 한다.
+	"""
+	by_prompt: Dict[str, List[dict]] = {}
+	for item in _normalize_saved_results(saved_results, old_prompts):
+		if item.get("prompt") and _has_file(item):
+			by_prompt.setdefault(item["prompt"], []).append(item)
+	carried: list[dict] = []
+	for i, prompt in enumerate(new_prompts):
+		matches = by_prompt.get(prompt)
+		carried.append({**matches.pop(0), "index": i} if matches else {})
+	if not any(carried):
+		return []
+	_relocate_results(carried)
+	return carried
+
+
+def _relocate_results(results: list[dict]) -> None:
+	"""results[i]의 파일을 같은 폴더의 image_{i+1:02d}로 옮긴다.
+	순서가 뒤바뀐 경우(A->B, B->A)를 위해 먼저 모두 임시 이름으로 링크한 뒤 한꺼번에 rename 한다.
+	"""
+	moves = []
+	for i, item in enumerate(results):
+		if not item or not _has_file(item):
+			continue
+		src = item["path"]
+		target = os.path.join(os.path.dirname(src), f"image_{i + 1:02d}{os.path.splitext(src)[1] or '.png'}")
+		if os.path.abspath(target) != os.path.abspath(src):
+			fd, tmp = tempfile.mkstemp(prefix=".relocate-", dir=os.path.dirname(src))
+			os.close(fd)
+			link_or_copy(src, tmp)
+			moves.append((item, tmp, target))
+	for item, tmp, target in moves:
+		os.replace(tmp, target)
+		item["path"] = target
+
+
 def _get_project_dir(project_id: str, *, require: bool = True) -> Optional[str]:
 	proj_dir = os.path.join(PROJECTS_DIR, project_id)
 	if os.path.isdir(proj_dir):
@@ -155,8 +338,8 @@ def _load_project_meta(project_id: str) -> Dict[str, Any]:
 def _save_project_meta(project_id: str, meta: Dict[str, Any]) -> None:
 	proj_dir = _get_project_dir(project_id)
 	meta_path = os.path.join(proj_dir, "metadata.json")
-	with open(meta_path, "w", encoding="utf-8") as f:
-		json.dump(meta, f, ensure_ascii=False, indent=2)
+	atomic_write_json(meta_path, meta)
+	project_index.upsert({**meta, "id": project_id})
 
 
 def _load_project_state(project_id: str, *, require: bool = True) -> Dict[str, Any]:
@@ -175,6 +358,8 @@ def _load_project_state(project_id: str, *, require: bool = True) -> Dict[str, A
 					state["image_progress"] = {**state["image_progress"], **loaded["image_progress"]}
 		except Exception:
 			pass
+	# 같은 프로세스에서 아직 flush되지 않은 작업 진행 상태가 있으면 반영
+	state.update(state_cache.pending(project_id))
 	state["saved_results"] = _normalize_saved_results(state.get("saved_results", []), state.get("prompts", []))
 	return state
 
@@ -186,8 +371,42 @@ def _save_project_state(project_id: str, state: Dict[str, Any], *, require: bool
 	# 저장 전에 결과 구조 정규화
 	state["saved_results"] = _normalize_saved_results(state.get("saved_results", []), state.get("prompts", []))
 	state_path = os.path.join(proj_dir, "state.json")
-	with open(state_path, "w", encoding="utf-8") as f:
-		json.dump(state, f, ensure_ascii=False, indent=2)
+	with STATE_SAVE_SECONDS.time():
+		atomic_write_json(state_path, state)
+	_write_manifest(proj_dir, state["saved_results"])
+
+
+def _load_state_for_flush(project_id: str) -> Dict[str, Any]:
+	# flush 시에는 디스크 내용만 읽는다 (pending 패치는 flush 쪽에서 덮어씀)
+	proj_dir = _get_project_dir(project_id, require=False)
+	state = copy.deepcopy(DEFAULT_STATE)
+	if not proj_dir:
+		return state
+	state_path = os.path.join(proj_dir, "state.json")
+	if os.path.isfile(state_path):
+		try:
+			with open(state_path, "r", encoding="utf-8") as f:
+				loaded = json.load(f)
+			if isinstance(loaded, dict):
+				state.update(loaded)
+		except Exception:
+			pass
+	return state
+
+
+# 홈 화면용 프로젝트/출력물 인덱스
+os.makedirs(PROJECTS_DIR, exist_ok=True)
+project_index = ProjectIndex(os.path.join(DATA_DIR, "projects.sqlite3"), PROJECTS_DIR)
+outputs_index = OutputsIndex(OUTPUTS_DIR)
+
+
+# 작업 진행 중 state.json 갱신은 패치를 모아서 프로젝트당 STATE_FLUSH_INTERVAL_MS에 한 번만 기록
+STATE_FLUSH_INTERVAL_MS = int(os.getenv("STATE_FLUSH_INTERVAL_MS", "1000"))
+state_cache = WriteBehindStateCache(
+	_load_state_for_flush,
+	lambda project_id, state: _save_project_state(project_id, state, require=False),
+	flush_interval_ms=STATE_FLUSH_INTERVAL_MS
+)
 
 
 def _slugify(text: str) -> str:
@@ -201,10 +420,91 @@ load_dotenv()
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 if not OPENAI_API_KEY:
 	raise ValueError("OPENAI_API_KEY 환경변수가 설정되지 않았습니다.")
-openai_client = OpenAI(api_key=OPENAI_API_KEY)
+# 재시도는 openai_scheduler가 맡는다 (SDK 재시도와 겹치면 한 요청이 한도를 여러 번 소모)
+openai_client = OpenAI(api_key=OPENAI_API_KEY, max_retries=0)
+
+# 작업 큐 (SQLite). 진행 상황도 여기에 저장되므로 어느 API 프로세스에서든 조회 가능
+JOB_DB_PATH = os.getenv("JOB_DB_PATH") or os.path.join(DATA_DIR, "jobs.sqlite3")
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))  # 0이면 이 프로세스에서는 워커를 띄우지 않음 (python -m backend.worker 사용)
+JOB_HANDLERS = {
+	"images": "backend.main:run_image_generation",
+	"storyboard_images": "backend.main:run_storyboard_image_pipeline",
+}
+# 워커 프로세스 안에서 실행되는 훅 (예열, 파이프라인 preload/unload 명령, 상태 보고)
+JOB_HOOKS = {
+	"startup": "backend.main:_worker_startup",
+	"command": "backend.main:_worker_command",
+	"status": "backend.main:_worker_status",
+}
+jobs = JobQueue(JOB_DB_PATH)
+_worker_pool: Optional[WorkerPool] = None
+
+# 제공자 한도(FAL_RATE_PER_SEC 등)는 배포 전체 기준. 같은 키로 호출하는 프로세스 수만큼 나눠 갖는다.
+# API 프로세스도 /api/storyboard, /api/images/regenerate에서 직접 호출하므로 워커 수 + 1
+# (워커를 backend.worker로 따로 띄우거나 API 프로세스가 여럿이면 SCHEDULER_PROCESSES에 전체 워커 수 + API 프로세스 수를 지정)
+SCHEDULER_PROCESSES = int(os.getenv("SCHEDULER_PROCESSES", "0")) or max(0, JOB_WORKERS) + 1
+configure_for_processes(SCHEDULER_PROCESSES)
+
+
+# 로컬 diffusers 모델을 쓰는 배포에서만 지정. 워커 기동 직후 백그라운드로 미리 로드한다
+WARMUP_LOCAL_MODEL = os.getenv("WARMUP_LOCAL_MODEL", "")
+
+
+def _worker_startup():
+	if WARMUP_LOCAL_MODEL:
+		threading.Thread(target=warm_up_local_pipeline, args=(WARMUP_LOCAL_MODEL,), name="pipeline-warmup", daemon=True).start()
+
+
+def _worker_command(command: str, payload: Dict[str, Any]):
+	if command == "pipeline_preload":
+		pipeline_manager.preload(payload["model_id"])
+	elif command == "pipeline_unload":
+		pipeline_manager.unload(payload["model_id"])
 
-# 진행 상황 추적 (in-memory)
-progress_store: dict[str, dict] = {}
+
+def _worker_status() -> Dict[str, Any]:
+	# metrics: 워커 프로세스의 메트릭 스냅샷. /metrics가 worker 라벨을 붙여 합친다
+	return {
+		"pid": os.getpid(),
+		"local_pipeline": local_pipeline_status(),
+		"scheduler": [fal_scheduler.stats(), openai_scheduler.stats()],
+		"metrics": metrics_registry.snapshot(),
+	}
+
+
+# 저장소 정리 주기 (0이면 자동 정리 안 함. /api/storage/gc 또는 python -m backend.storage_gc로 수동 실행)
+STORAGE_GC_INTERVAL_HOURS = float(os.getenv("STORAGE_GC_INTERVAL_HOURS", "24"))
+_gc_stop = threading.Event()
+
+
+def _storage_gc_loop():
+	while not _gc_stop.wait(STORAGE_GC_INTERVAL_HOURS * 3600):
+		try:
+			collect_storage_garbage()
+		except Exception:
+			traceback.print_exc()
+
+
+@app.on_event("startup")
+def _start_workers():
+	global _worker_pool
+	jobs.prune()
+	if JOB_WORKERS > 0:
+		_worker_pool = WorkerPool(JOB_HANDLERS, size=JOB_WORKERS, db_path=JOB_DB_PATH, hooks=JOB_HOOKS).start()
+	if STORAGE_GC_INTERVAL_HOURS > 0:
+		threading.Thread(target=_storage_gc_loop, name="storage-gc", daemon=True).start()
+
+
+@app.on_event("shutdown")
+def _stop_workers():
+	_gc_stop.set()
+	# 실행 중인 배치는 보고서를 남기고 멈춘다 (POST /api/batch/{batch_id}/resume으로 이어서 실행)
+	with _batch_runs_lock:
+		for stop in _batch_runs.values():
+			stop.set()
+	if _worker_pool is not None:
+		_worker_pool.stop()
+	state_cache.flush_all()
 
 
 @app.get("/health")
@@ -212,44 +512,79 @@ async def health():
 	return {"status": "ok"}
 
 
+@app.get("/ready")
+def ready():
+	"""트래픽을 받아도 되는지 (작업 큐 DB 접근 가능, 예열 지정 시 모델 로드 완료). /health는 프로세스 생존만 확인"""
+	checks: Dict[str, Any] = {}
+	try:
+		jobs.get_progress("__ready__")
+		checks["job_queue"] = "ok"
+	except Exception as e:
+		checks["job_queue"] = f"error: {e}"
+	workers = jobs.worker_statuses() if checks["job_queue"] == "ok" else []
+	checks["workers"] = len(workers)
+	warmed = True
+	if WARMUP_LOCAL_MODEL:
+		# 예열은 워커 프로세스에서 하므로 최소 한 워커가 로드를 마쳤는지 본다
+		states = [w.get("local_pipeline", {}).get("state") for w in workers]
+		checks["local_pipeline"] = states
+		warmed = "ready" in states
+	is_ready = checks["job_queue"] == "ok" and warmed
+	if not is_ready:
+		raise HTTPException(503, detail={"ready": False, "checks": checks})
+	return {"ready": True, "checks": checks}
+
+
+@app.get("/metrics")
+def metrics():
+	"""Prometheus text format. API 프로세스 값(worker="api")과 워커들이 보고한 최근 스냅샷을 합친다"""
+	sources = [({"worker": "api"}, metrics_registry.snapshot())]
+	for status in jobs.worker_statuses():
+		snapshot = status.get("metrics")
+		if snapshot:
+			sources.append(({"worker": status["worker_id"]}, snapshot))
+	text = render_metrics(sources)
+	# 처리 중인 작업 수는 공유 DB에서 바로 센다 (워커 보고 주기와 무관)
+	lines = ["# HELP aivideos_jobs 상태별 작업 수", "# TYPE aivideos_jobs gauge"]
+	for state, count in jobs.state_counts().items():
+		lines.append(f'aivideos_jobs{{state="{state}"}} {count}')
+	return PlainTextResponse(text + "\n".join(lines) + "\n", media_type="text/plain; version=0.0.4")
+
+
 @app.get("/api/home")
-async def api_home():
+def api_home(page: int = 1, page_size: int = 50, order: str = "desc"):
+	"""홈 화면 데이터. 프로젝트는 인덱스에서 createdAt 순으로 페이지 단위 조회"""
 	os.makedirs(OUTPUTS_DIR, exist_ok=True)
 	os.makedirs(TEMP_DIR, exist_ok=True)
 	os.makedirs(PROJECTS_DIR, exist_ok=True)
-	prompts = sorted(glob(os.path.join(OUTPUTS_DIR, "prompt_*.txt")))
-	images = sorted([p for p in glob(os.path.join(OUTPUTS_DIR, "*.*")) if os.path.splitext(p)[1].lower() in {".png", ".jpg", ".jpeg", ".webp"}])
-	videos = sorted([p for p in glob(os.path.join(OUTPUTS_DIR, "*.*")) if os.path.splitext(p)[1].lower() in {".mp4", ".mov", ".webm"}])
-	# projects: 디렉터리의 metadata.json 읽기
-	projects: List[dict] = []
-	for d in sorted(glob(os.path.join(PROJECTS_DIR, "*"))):
-		if not os.path.isdir(d):
-			continue
-		meta_path = os.path.join(d, "metadata.json")
-		meta = {"id": os.path.basename(d), "title": os.path.basename(d), "createdAt": None}
-		if os.path.isfile(meta_path):
-			try:
-				with open(meta_path, "r", encoding="utf-8") as f:
-					meta.update(json.load(f))
-			except Exception:
-				pass
-		projects.append(meta)
+	page = max(1, page)
+	page_size = min(max(1, page_size), 500)
+	project_index.sync()
+	total = project_index.count()
+	projects = project_index.list(offset=(page - 1) * page_size, limit=page_size, descending=order != "asc")
+	outputs = outputs_index.lists()
 	return {
 		"dirs": {"outputs": OUTPUTS_DIR, "temp": TEMP_DIR, "projects": PROJECTS_DIR},
-		"counts": {"prompts": len(prompts), "images": len(images), "videos": len(videos), "projects": len(projects)},
-		"lists": {"prompts": prompts, "images": images, "videos": videos, "projects": projects},
+		"counts": {"prompts": len(outputs["prompts"]), "images": len(outputs["images"]), "videos": len(outputs["videos"]), "projects": total},
+		"lists": {"prompts": outputs["prompts"], "images": outputs["images"], "videos": outputs["videos"], "projects": projects},
+		"page": {"page": page, "page_size": page_size, "total": total, "has_more": page * page_size < total},
 	}
 
 
-@app.post("/api/projects")
-async def api_new_project(payload: NewProjectRequest):
+def _create_project(title: Optional[str], mode: Optional[str] = "story") -> Dict[str, Any]:
 	os.makedirs(PROJECTS_DIR, exist_ok=True)
-	title = (payload.title or "새 프로젝트").strip()
+	title = (title or "새 프로젝트").strip()
 	ts = time.strftime("%Y%m%d-%H%M%S")
-	slug = f"{_slugify(title)}-{ts}"
-	proj_dir = os.path.join(PROJECTS_DIR, slug)
-	os.makedirs(proj_dir, exist_ok=True)
-	mode = payload.mode or "story"
+	base = f"{_slugify(title)}-{ts}"
+	# 같은 제목으로 같은 초에 만들어지면 (배치 실행 등) 번호를 붙인다
+	slug = base
+	for n in range(2, 1000):
+		try:
+			os.makedirs(os.path.join(PROJECTS_DIR, slug))
+			break
+		except FileExistsError:
+			slug = f"{base}-{n}"
+	mode = mode or "story"
 	if mode not in ("fusion", "story"):
 		mode = "story"
 	meta = {
@@ -259,14 +594,18 @@ async def api_new_project(payload: NewProjectRequest):
 		"status": "created",
 		"mode": mode,
 	}
-	with open(os.path.join(proj_dir, "metadata.json"), "w", encoding="utf-8") as f:
-		json.dump(meta, f, ensure_ascii=False, indent=2)
+	_save_project_meta(slug, meta)
 	state = copy.deepcopy(DEFAULT_STATE)
 	state["title"] = title
 	_save_project_state(slug, state)
 	return meta
 
 
+@app.post("/api/projects")
+async def api_new_project(payload: NewProjectRequest):
+	return _create_project(payload.title, payload.mode)
+
+
 @app.delete("/api/projects/{project_id}")
 async def api_delete_project(project_id: str):
 	proj_dir = os.path.join(PROJECTS_DIR, project_id)
@@ -274,6 +613,7 @@ async def api_delete_project(project_id: str):
 		raise HTTPException(404, detail="프로젝트를 찾을 수 없습니다")
 	try:
 		shutil.rmtree(proj_dir)
+		project_index.delete(project_id)
 		return {"deleted": project_id}
 	except Exception as e:
 		raise HTTPException(500, detail=f"삭제 실패: {str(e)}")
@@ -313,29 +653,22 @@ async def api_storyboard(payload: StoryRequest):
 		
 		# GPT로 컷별 요소 추출
 		min_shots = payload.min_shots_per_scene or 1
-		storyboard = generate_storyboard_from_story(
+		generate = generate_storyboard_chunked if payload.chunked else generate_storyboard_from_story
+		storyboard = await run_in_threadpool(
+			generate,
 			client=openai_client,
 			story_text=adjusted,
 			title=payload.title,
 			model="gpt-4o-mini",
-			min_shots_per_scene=min_shots
+			min_shots_per_scene=min_shots,
+			use_cache=payload.use_cache is not False,
+			schedule_key=payload.project_id
 		)
 		
 		# 각 컷에서 프롬프트 생성 (이미지 생성용)
 		style_key = payload.style_key or "surreal"
 		style_text = get_style_prompt_text(style_key)
-		prompts = []
-		for cut in storyboard.cuts:
-			characters_str = ", ".join(cut.characters) if cut.characters else "characters"
-			dialogues_str = "; ".join([f"{d.speaker}: {d.text}" for d in cut.dialogues[:3]])
-			prompt = (
-				f"{cut.cut_name}, {cut.composition}. "
-				f"characters: {characters_str}. "
-				f"background: {cut.background}. "
-				f"dialogues: {dialogues_str}. "
-				f"{style_text}"
-			)
-			prompts.append(prompt)
+		prompts = [_build_cut_prompt(cut, style_text) for cut in storyboard.cuts]
 		
 		if payload.project_id:
 			state = _load_project_state(payload.project_id)
@@ -345,9 +678,10 @@ async def api_storyboard(payload: StoryRequest):
 				state["min_shots_per_scene"] = payload.min_shots_per_scene
 			if payload.style_key:
 				state["style_key"] = payload.style_key
+			# 프롬프트가 그대로인 컷의 이미지는 유지 (증분 생성에서 재사용)
+			state["saved_results"] = _carry_over_results(state.get("saved_results", []), state.get("prompts", []), prompts)
 			state["cuts"] = [cut.model_dump() for cut in storyboard.cuts]
 			state["prompts"] = prompts
-			state["saved_results"] = []
 			state["image_job_id"] = ""
 			state["image_progress"] = {"status": "", "progress": 0, "message": ""}
 			_save_project_state(payload.project_id, state)
@@ -359,116 +693,393 @@ async def api_storyboard(payload: StoryRequest):
 			"title": storyboard.title,
 			"cuts": [cut.model_dump() for cut in storyboard.cuts],
 			"prompts": prompts,
+			"saved_results": state["saved_results"] if payload.project_id else [],
 		}
 	except Exception as e:
 		raise HTTPException(500, detail=str(e))
 
 
-def run_image_generation(job_id: str, prompts: List[str], model: str, size: str, output_dir: str, project_id: Optional[str] = None):
-	"""백그라운드에서 이미지 생성 실행"""
-	# 상대 경로를 backend 기준 절대 경로로 변환
-	target_output_dir = output_dir
-	if output_dir and not os.path.isabs(output_dir):
-		target_output_dir = os.path.normpath(os.path.join(BASE_DIR, output_dir))
+def run_image_generation(job_id: str, prompts: List[str], model: str, size: str, output_dir: str, project_id: Optional[str] = None, max_concurrency: Optional[int] = None, use_cache: bool = True, batch_size: Optional[int] = None, reused: Optional[List[Dict[str, Any]]] = None):
+	"""워커 프로세스에서 이미지 생성 실행. 반환값은 작업 결과(results)로 저장된다.
+	reused가 있으면 (증분/이어하기 모드) 값이 있는 자리는 그대로 쓰고 빈 자리의 컷만 생성한다.
+	이미지가 한 장 끝날 때마다 프로젝트 saved_results에 체크포인트를 남기므로 실패/취소되어도 끝난 컷은 남는다.
+	"""
+	target_output_dir = _resolve_output_dir(output_dir, project_id)
 
 	def progress_callback(status: str, progress: float, message: str):
-		progress_store[job_id] = {
-			"status": status,
-			"progress": progress,
-			"message": message,
-			"updated_at": datetime.now().isoformat()
-		}
+		# 완료 상태는 결과와 함께 워커가 기록하므로 여기서는 진행 중으로만 남긴다
+		jobs.update_progress(job_id, "generating" if status == "completed" else status, progress, message)
 		if project_id:
-			try:
-				state = _load_project_state(project_id, require=False)
-				state["image_progress"] = {"status": status, "progress": progress, "message": message}
-				if status in {"completed", "error"}:
-					state["image_job_id"] = ""
-				else:
-					state["image_job_id"] = job_id
-				_save_project_state(project_id, state, require=False)
-			except Exception:
-				pass
+			state_cache.update(project_id, {
+				"image_progress": {"status": status, "progress": progress, "message": message},
+				"image_job_id": "" if status in {"completed", "error"} else job_id,
+			})
+
+	# 컷별 체크포인트 (빈 dict는 아직 없는 컷)
+	checkpoint: List[Dict[str, Any]] = [dict(item) if item else {} for item in (reused or [])[:len(prompts)]]
+	checkpoint.extend({} for _ in range(len(prompts) - len(checkpoint)))
+
+	def result_callback(result: Dict[str, Any]):
+		# 완성된 이미지를 바로 스트림으로 내보내고 체크포인트에 반영 (콜백은 생성기에서 직렬화되어 호출된다)
+		result["fingerprint"] = _result_fingerprint(result["prompt"], model, size)
+		if project_id:
+			_store_result(result)
+		jobs.add_event(job_id, "result", result)
+		checkpoint[result["index"]] = result
+		if project_id:
+			state_cache.update(project_id, {"saved_results": _normalize_saved_results(checkpoint, prompts)})
+
+	cancel = cancel_event(job_id)
+	indices = None
+	if reused is not None:
+		indices = [i for i in range(len(prompts)) if i >= len(reused) or not reused[i]]
 	
 	try:
-		results = generate_images_with_progress(
-			prompts,
-			progress_callback=progress_callback,
-			model=model,
-			size=size,
-			output_dir=target_output_dir
-		)
-		progress_store[job_id]["results"] = results
-		progress_store[job_id]["status"] = "completed"
-		if project_id:
-			try:
-				state = _load_project_state(project_id, require=False)
-				state["saved_results"] = _normalize_saved_results(results, prompts)
-				state["image_job_id"] = ""
-				state["image_progress"] = {"status": "completed", "progress": 100.0, "message": "모든 이미지 생성 완료"}
-				_save_project_state(project_id, state, require=False)
-			except Exception:
-				pass
+		if indices == []:
+			progress_callback("completed", 100.0, "바뀐 컷이 없어 기존 이미지를 그대로 사용합니다")
+			generated = []
+		else:
+			generated = generate_images_with_progress(
+				[prompts[i] for i in indices] if indices is not None else prompts,
+				progress_callback=progress_callback,
+				model=model,
+				size=size,
+				output_dir=target_output_dir,
+				max_concurrency=max_concurrency,
+				use_cache=use_cache,
+				result_callback=result_callback,
+				batch_size=batch_size,
+				indices=indices,
+				schedule_key=project_id or job_id,
+				cancel=cancel
+			)
+		for result in generated:
+			result.setdefault("fingerprint", _result_fingerprint(result["prompt"], model, size))
+		if indices is None:
+			results = generated
+		else:
+			merged = {i: item for i, item in enumerate(reused[:len(prompts)]) if item}
+			merged.update({r["index"]: r for r in generated})
+			results = [merged[i] for i in sorted(merged)]
 	except Exception as e:
-		progress_store[job_id]["status"] = "error"
-		progress_store[job_id]["error"] = str(e)
+		cancelled = isinstance(e, Cancelled) or cancel.is_set()
+		if project_id:
+			done = sum(1 for item in checkpoint if item)
+			state_cache.update(project_id, {
+				"image_job_id": "",
+				"image_progress": (
+					{"status": "cancelled", "progress": done / len(prompts) * 100 if prompts else 0, "message": f"취소됨 (이미지 {done}/{len(prompts)}개 완료)"}
+					if cancelled else
+					{"status": "error", "progress": 0, "message": str(e)}
+				),
+			})
+		if cancelled:
+			raise JobCancelled([item for item in checkpoint if item]) from e
+		raise
+	else:
+		if project_id:
+			state_cache.update(project_id, {
+				"saved_results": _normalize_saved_results(results, prompts),
+				"image_job_id": "",
+				"image_progress": {"status": "completed", "progress": 100.0, "message": "모든 이미지 생성 완료"},
+			})
+	finally:
 		if project_id:
 			try:
-				state = _load_project_state(project_id, require=False)
-				state["image_job_id"] = ""
-				state["image_progress"] = {"status": "error", "progress": 0, "message": str(e)}
-				_save_project_state(project_id, state, require=False)
+				state_cache.flush(project_id)
 			except Exception:
 				pass
+	return results
 
 
 @app.post("/api/images")
-async def api_images(payload: ImageJobRequest, background_tasks: BackgroundTasks):
+async def api_images(payload: ImageJobRequest):
 	try:
 		job_id = str(uuid.uuid4())
-		progress_store[job_id] = {
+		queued = {
 			"status": "queued",
 			"progress": 0.0,
 			"message": "작업 대기 중...",
 			"updated_at": datetime.now().isoformat()
 		}
+		reused = None
 		if payload.project_id:
 			state = _load_project_state(payload.project_id)
+			if payload.incremental:
+				# 같은 (프롬프트, 모델, 크기)로 만든 파일이 남아 있는 컷만 재사용
+				saved = _normalize_saved_results(state.get("saved_results", []), state.get("prompts", []))
+				reused = []
+				for i, prompt in enumerate(payload.prompts):
+					item = saved[i] if i < len(saved) else {}
+					fingerprint = _result_fingerprint(prompt, payload.model, payload.size)
+					reused.append(item if item.get("fingerprint") == fingerprint and _has_file(item) else {})
+				state["saved_results"] = [item for item in reused]
+				todo = sum(1 for item in reused if not item)
+				queued["message"] = f"작업 대기 중... (바뀐 컷 {todo}/{len(payload.prompts)}개만 생성)"
+			else:
+				state["saved_results"] = []
 			state["image_job_id"] = job_id
-			state["image_progress"] = progress_store[job_id]
-			state["saved_results"] = []
+			state["image_progress"] = queued
 			_save_project_state(payload.project_id, state)
-		background_tasks.add_task(
-			run_image_generation,
-			job_id,
-			payload.prompts,
-			payload.model,
-			payload.size,
-			payload.output_dir,
-			payload.project_id
+		jobs.enqueue(
+			"images",
+			{
+				"prompts": payload.prompts,
+				"model": payload.model,
+				"size": payload.size,
+				"output_dir": payload.output_dir,
+				"project_id": payload.project_id,
+				"max_concurrency": payload.max_concurrency,
+				"use_cache": payload.use_cache is not False,
+				"batch_size": payload.batch_size,
+				"reused": reused,
+			},
+			project_id=payload.project_id,
+			job_id=job_id,
+			message=queued["message"]
 		)
 		return {"job_id": job_id}
+	except HTTPException:
+		raise
 	except Exception as e:
 		raise HTTPException(500, detail=str(e))
 
 
-@app.post("/api/images/regenerate")
-async def api_regenerate_image(payload: RegenerateImageRequest):
-	"""단일 프롬프트만 다시 생성 (fal.ai 기반)"""
+def run_storyboard_image_pipeline(job_id: str, story: str, title: Optional[str] = None, min_shots_per_scene: int = 1, style_key: str = "surreal", model: str = "fal-ai/flux/dev", size: str = "portrait_16_9", output_dir: str = "../data/outputs", project_id: Optional[str] = None, max_concurrency: Optional[int] = None, use_cache: bool = True):
+	"""스토리보드 생성과 이미지 생성을 겹쳐서 실행 (fal.ai 기반).
+	GPT 응답을 스트리밍으로 받으면서 컷이 하나 완성될 때마다 바로 이미지 생성을 시작한다.
+	이벤트: cut(컷 하나 수신), storyboard(스토리보드 완성), result(이미지 한 장 완료)
+	"""
+	target_output_dir = _resolve_output_dir(output_dir, project_id)
+	style_text = get_style_prompt_text(style_key or "surreal")
+	min_shots = max(1, min_shots_per_scene or 1)
+
+	lock = threading.Lock()
+	cuts: List[StoryCut] = []
+	prompts: List[str] = []
+	results: Dict[int, Dict[str, Any]] = {}
+	story_title = {"value": title or ""}
+	stream_done = threading.Event()
+
+	def report():
+		# lock을 잡은 상태에서 호출
+		total = len(prompts) if stream_done.is_set() else max(len(prompts), min_shots)
+		done = len(results)
+		progress = min(99.0, done / total * 100) if total else 0.0
+		suffix = "" if stream_done.is_set() else " (스토리보드 작성 중)"
+		message = f"컷 {len(prompts)}개, 이미지 {done}/{len(prompts)} 생성 완료{suffix}"
+		jobs.update_progress(job_id, "generating", progress, message)
+		if project_id:
+			state_cache.update(project_id, {
+				"image_job_id": job_id,
+				"image_progress": {"status": "generating", "progress": progress, "message": message},
+			})
+
+	def on_title(value: str):
+		story_title["value"] = value
+
+	def on_image_done(future):
+		if future.cancelled() or future.exception() is not None:
+			return
+		result = future.result()
+		result["fingerprint"] = _result_fingerprint(result["prompt"], model, size)
+		if project_id:
+			_store_result(result)
+		with lock:
+			if cancel.is_set():
+				# 취소 후에 끝난 호출 (결과는 이미지 캐시에만 남는다). 종료 이벤트 뒤에 result를 보내거나
+				# image_progress를 generating으로 되돌리지 않도록 작업/프로젝트 상태는 건드리지 않는다
+				return
+			results[result["index"]] = result
+			jobs.add_event(job_id, "result", result)
+			if project_id:
+				# 컷별 체크포인트
+				state_cache.update(project_id, {
+					"saved_results": _normalize_saved_results([results.get(i, {}) for i in range(len(prompts))], prompts),
+				})
+			report()
+
+	jobs.update_progress(job_id, "generating", 0.0, "스토리보드 작성 중...")
+	workers = max(1, max_concurrency or DEFAULT_FAL_CONCURRENCY)
+	cancel = cancel_event(job_id)
+	futures = []
 	try:
-		target_output_dir = payload.output_dir
-		if target_output_dir and not os.path.isabs(target_output_dir):
-			target_output_dir = os.path.normpath(os.path.join(BASE_DIR, target_output_dir))
+		executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="fal")
+		try:
+			try:
+				for cut in stream_storyboard_cuts(
+					openai_client,
+					adjust_script(story),
+					title=title,
+					model="gpt-4o-mini",
+					min_shots_per_scene=min_shots,
+					use_cache=use_cache,
+					on_title=on_title,
+					schedule_key=project_id or job_id
+				):
+					if cancel.is_set():
+						raise Cancelled("작업 취소됨")
+					prompt = _build_cut_prompt(cut, style_text)
+					with lock:
+						index = len(prompts)
+						cuts.append(cut)
+						prompts.append(prompt)
+						jobs.add_event(job_id, "cut", {"index": index, "cut": cut.model_dump(), "prompt": prompt})
+						if project_id:
+							state_cache.update(project_id, {
+								"cuts": [c.model_dump() for c in cuts],
+								"prompts": list(prompts),
+							})
+						report()
+					future = executor.submit(
+						regenerate_single_image,
+						prompt,
+						index,
+						model=model,
+						size=size,
+						output_dir=target_output_dir,
+						use_cache=use_cache,
+						schedule_key=project_id or job_id,
+						cancel=cancel
+					)
+					future.add_done_callback(on_image_done)
+					futures.append(future)
+
+				with lock:
+					stream_done.set()
+					jobs.add_event(job_id, "storyboard", {
+						"title": story_title["value"] or "Untitled",
+						"cuts": [c.model_dump() for c in cuts],
+						"prompts": list(prompts),
+					})
+					report()
+				if not cuts:
+					raise Exception("스토리보드에서 컷을 만들지 못했습니다")
+				for future in futures:
+					future.result()
+			except BaseException:
+				# 하나라도 실패하면 아직 시작하지 않은 요청은 취소
+				for f in futures:
+					f.cancel()
+				raise
+		finally:
+			# 취소된 경우에는 이미 나간 원격 호출이 끝나기를 기다리지 않는다
+			executor.shutdown(wait=not cancel.is_set(), cancel_futures=True)
+	except Exception as e:
+		cancelled = isinstance(e, Cancelled) or cancel.is_set()
+		if project_id:
+			with lock:
+				done = len(results)
+			state_cache.update(project_id, {
+				"image_job_id": "",
+				"image_progress": (
+					{"status": "cancelled", "progress": 0, "message": f"취소됨 (이미지 {done}개 완료)"}
+					if cancelled else
+					{"status": "error", "progress": 0, "message": str(e)}
+				),
+			})
+		if cancelled:
+			with lock:
+				partial = [results[i] for i in sorted(results)]
+			raise JobCancelled(partial) from e
+		raise
+	else:
+		ordered = [results[i] for i in sorted(results)]
+		if project_id:
+			state_cache.update(project_id, {
+				"saved_results": _normalize_saved_results(ordered, prompts),
+				"image_job_id": "",
+				"image_progress": {"status": "completed", "progress": 100.0, "message": "모든 이미지 생성 완료"},
+			})
+			meta = _load_project_meta(project_id)
+			if story_title["value"]:
+				meta["title"] = story_title["value"]
+				_save_project_meta(project_id, meta)
+	finally:
+		if project_id:
+			try:
+				state_cache.flush(project_id)
+			except Exception:
+				pass
+	return ordered
+
 
+def _enqueue_storyboard_images(payload: StoryboardImagesRequest) -> str:
+	job_id = str(uuid.uuid4())
+	queued = {
+		"status": "queued",
+		"progress": 0.0,
+		"message": "작업 대기 중...",
+		"updated_at": datetime.now().isoformat()
+	}
+	if payload.project_id:
+		state = _load_project_state(payload.project_id)
+		state["story"] = payload.story
+		if payload.title:
+			state["title"] = payload.title
+		if payload.min_shots_per_scene:
+			state["min_shots_per_scene"] = payload.min_shots_per_scene
+		if payload.style_key:
+			state["style_key"] = payload.style_key
+		state["cuts"] = []
+		state["prompts"] = []
+		state["saved_results"] = []
+		state["image_job_id"] = job_id
+		state["image_progress"] = queued
+		_save_project_state(payload.project_id, state)
+	return jobs.enqueue(
+		"storyboard_images",
+		{
+			"story": payload.story,
+			"title": payload.title,
+			"min_shots_per_scene": payload.min_shots_per_scene or 1,
+			"style_key": payload.style_key or "surreal",
+			"model": payload.model or "fal-ai/flux/dev",
+			"size": payload.size or "portrait_16_9",
+			"output_dir": payload.output_dir,
+			"project_id": payload.project_id,
+			"max_concurrency": payload.max_concurrency,
+			"use_cache": payload.use_cache is not False,
+		},
+		project_id=payload.project_id,
+		job_id=job_id,
+		message=queued["message"]
+	)
+
+
+@app.post("/api/storyboard/images")
+async def api_storyboard_images(payload: StoryboardImagesRequest):
+	"""스토리보드와 이미지를 한 번에 생성하는 작업을 등록.
+	컷이 나오는 대로 이미지를 만들기 때문에 /api/storyboard 후 /api/images를 부르는 것보다 첫 이미지가 빨리 나온다.
+	진행 상황은 /api/images/events/{job_id}로 받는다.
+	"""
+	try:
+		return {"job_id": _enqueue_storyboard_images(payload)}
+	except HTTPException:
+		raise
+	except Exception as e:
+		raise HTTPException(500, detail=str(e))
+
+
+@app.post("/api/images/regenerate")
+def api_regenerate_image(payload: RegenerateImageRequest):
+	"""단일 프롬프트만 다시 생성 (fal.ai 기반). 스케줄러 대기로 블로킹되므로 스레드풀에서 도는 일반 함수로 둔다"""
+	try:
 		result = regenerate_single_image(
 			prompt=payload.prompt,
 			index=payload.index,
 			model=payload.model or "fal-ai/flux/dev",
 			size=payload.size or "portrait_16_9",
-			output_dir=target_output_dir or OUTPUTS_DIR
+			output_dir=_resolve_output_dir(payload.output_dir, payload.project_id),
+			seed=payload.seed,
+			# seed 없는 fal 결과는 매번 달라지므로 캐시 적중으로 돌려주면 재생성 버튼이 아무 일도 안 한다
+			use_cache=payload.seed is not None and payload.use_cache is not False,
+			schedule_key=payload.project_id
 		)
+		result["fingerprint"] = _result_fingerprint(payload.prompt, payload.model or "fal-ai/flux/dev", payload.size or "portrait_16_9")
 
 		if payload.project_id:
+			_store_result(result)
 			state = _load_project_state(payload.project_id, require=False)
 			prompts = state.get("prompts", [])
 			if payload.index < len(prompts):
@@ -500,16 +1111,571 @@ async def api_regenerate_image(payload: RegenerateImageRequest):
 @app.get("/api/images/progress/{job_id}")
 async def api_images_progress(job_id: str):
 	"""이미지 생성 진행 상황 조회"""
-	if job_id not in progress_store:
+	progress = jobs.get_progress(job_id)
+	if progress is None:
+		raise HTTPException(404, detail="작업을 찾을 수 없습니다")
+	return progress
+
+
+def _finished_results(job: Dict[str, Any]) -> List[Dict[str, Any]]:
+	"""끝난 이미지 작업에서 재사용할 수 있는 컷별 결과 (빈 dict는 다시 만들어야 하는 컷).
+	작업이 받은 reused와 작업 중에 남긴 result 이벤트를 합치고, 파일이 남아 있고 같은 (프롬프트, 모델, 크기)인 것만 쓴다.
+	"""
+	payload = job["payload"]
+	prompts = payload.get("prompts") or []
+	slots: List[Dict[str, Any]] = [item or {} for item in (payload.get("reused") or [])[:len(prompts)]]
+	slots.extend({} for _ in range(len(prompts) - len(slots)))
+	cursor = 0
+	while True:
+		events = jobs.events_since(job["id"], cursor, limit=500)
+		if not events:
+			break
+		cursor = events[-1]["id"]
+		for event in events:
+			index = event["data"].get("index") if event["type"] == "result" else None
+			if isinstance(index, int) and 0 <= index < len(prompts):
+				slots[index] = event["data"]
+	reusable = []
+	for i, item in enumerate(slots):
+		fingerprint = _result_fingerprint(prompts[i], payload.get("model", ""), payload.get("size", ""))
+		reusable.append(item if item and item.get("fingerprint") == fingerprint and _has_file(item) else {})
+	return reusable
+
+
+@app.post("/api/images/resume/{job_id}")
+def api_images_resume(job_id: str):
+	"""실패하거나 취소된 이미지 작업을 이어서 실행. 이미 만들어진 컷은 건너뛰고 빠진 컷만 새 작업으로 생성한다"""
+	job = jobs.get(job_id)
+	if job is None:
+		raise HTTPException(404, detail="작업을 찾을 수 없습니다")
+	if job["kind"] != "images":
+		raise HTTPException(400, detail="이미지 생성 작업만 이어서 실행할 수 있습니다")
+	if job["state"] not in ("failed", "cancelled"):
+		raise HTTPException(409, detail="실패하거나 취소된 작업만 이어서 실행할 수 있습니다")
+
+	reused = _finished_results(job)
+	payload = {**job["payload"], "reused": reused}
+	todo = sum(1 for item in reused if not item)
+	new_job_id = str(uuid.uuid4())
+	message = f"작업 대기 중... (남은 컷 {todo}/{len(reused)}개 이어서 생성)"
+	project_id = job["project_id"]
+	if project_id:
+		state = _load_project_state(project_id, require=False)
+		state["saved_results"] = _normalize_saved_results(reused, payload.get("prompts") or [])
+		state["image_job_id"] = new_job_id
+		state["image_progress"] = {"status": "queued", "progress": 0.0, "message": message, "updated_at": datetime.now().isoformat()}
+		_save_project_state(project_id, state, require=False)
+	jobs.enqueue("images", payload, project_id=project_id, job_id=new_job_id, message=message)
+	return {"job_id": new_job_id, "resumed_from": job_id, "remaining": todo}
+
+
+@app.post("/api/images/cancel/{job_id}")
+def api_images_cancel(job_id: str):
+	"""작업 취소. 대기 중이면 바로 취소되고, 실행 중이면 워커가 새 요청을 멈추고 대기 중인 자리를 반납한 뒤 cancelled로 끝난다"""
+	job = jobs.get(job_id)
+	if job is None:
 		raise HTTPException(404, detail="작업을 찾을 수 없습니다")
-	return progress_store[job_id]
+	state = jobs.request_cancel(job_id)
+	if state == "cancelled" and job["state"] == "queued" and job["project_id"]:
+		# 워커가 가져가기 전에 취소된 작업은 핸들러가 실행되지 않으므로 여기서 프로젝트 상태를 정리
+		project_state = _load_project_state(job["project_id"], require=False)
+		if project_state.get("image_job_id") == job_id:
+			project_state["image_job_id"] = ""
+			project_state["image_progress"] = {"status": "cancelled", "progress": 0, "message": "작업이 취소되었습니다"}
+			_save_project_state(job["project_id"], project_state, require=False)
+	return {"job_id": job_id, "state": state}
+
+
+SSE_POLL_SECONDS = 0.25
+SSE_KEEPALIVE_SECONDS = 15.0
+
+
+@app.get("/api/images/events/{job_id}")
+async def api_images_events(job_id: str, request: Request, last_event_id: Optional[int] = None):
+	"""이미지 생성 진행 상황을 Server-Sent Events로 전달.
+	- progress: 상태가 바뀔 때만, result: 이미지 한 장 완료 시, completed/failed/cancelled: 종료
+	- 재연결 시 Last-Event-ID 헤더(또는 ?last_event_id=) 이후 이벤트부터 이어서 보낸다
+	"""
+	if await run_in_threadpool(jobs.get_progress, job_id) is None:
+		raise HTTPException(404, detail="작업을 찾을 수 없습니다")
+	header_id = request.headers.get("last-event-id")
+	cursor = last_event_id or 0
+	if header_id and header_id.isdigit():
+		cursor = max(cursor, int(header_id))
+
+	async def event_stream():
+		nonlocal cursor
+		yield "retry: 2000\n\n"
+		idle = 0.0
+		while not await request.is_disconnected():
+			# 워커는 다른 프로세스이므로 공유 DB의 새 이벤트만 읽어 그대로 밀어준다
+			events = await run_in_threadpool(jobs.events_since, job_id, cursor)
+			for event in events:
+				cursor = event["id"]
+				data = json.dumps(event["data"], ensure_ascii=False)
+				yield f"id: {event['id']}\nevent: {event['type']}\ndata: {data}\n\n"
+				if event["type"] in TERMINAL_EVENTS:
+					return
+			if events:
+				idle = 0.0
+				continue
+			idle += SSE_POLL_SECONDS
+			if idle >= SSE_KEEPALIVE_SECONDS:
+				idle = 0.0
+				yield ": keep-alive\n\n"
+			await asyncio.sleep(SSE_POLL_SECONDS)
+
+	return StreamingResponse(
+		event_stream(),
+		media_type="text/event-stream",
+		headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+	)
+
+
+@app.get("/api/pipelines")
+def api_pipelines():
+	"""워커별로 메모리에 올라간 로컬 파이프라인, 로드 시간, 크기"""
+	workers = [{k: v for k, v in w.items() if k != "metrics"} for w in jobs.worker_statuses()]
+	return {"workers": workers}
+
+
+@app.post("/api/pipelines/preload")
+def api_pipelines_preload(payload: PipelineRequest):
+	"""모든 워커에 파이프라인 미리 로드 요청 (작업 사이에 처리됨)"""
+	return {"command_id": jobs.broadcast("pipeline_preload", {"model_id": payload.model_id})}
+
+
+@app.post("/api/pipelines/unload")
+def api_pipelines_unload(payload: PipelineRequest):
+	"""모든 워커에서 파이프라인 내리기"""
+	return {"command_id": jobs.broadcast("pipeline_unload", {"model_id": payload.model_id})}
+
+
+@app.get("/api/scheduler")
+def api_scheduler():
+	"""제공자별 스케줄러 상태 (진행 중/대기 중 요청, 재시도 수). API 프로세스와 워커 프로세스를 함께 보여준다"""
+	workers = [{"worker_id": w.get("worker_id"), "scheduler": w.get("scheduler", [])} for w in jobs.worker_statuses()]
+	return {"api": [fal_scheduler.stats(), openai_scheduler.stats()], "workers": workers}
+
+
+@app.get("/api/cache/stats")
+def api_cache_stats():
+	"""이미지 결과 캐시 적중/미스 통계와 blob 저장소 사용량"""
+	return {
+		"images": image_cache.stats(),
+		"storyboards": storyboard_cache.stats(),
+		"thumbnails": thumbnail_cache.stats(),
+		"blobs": blob_store.stats(),
+		"video_segments": segment_cache.stats(),
+	}
+
+
+def collect_storage_garbage(*, dry_run: bool = False, grace_hours: Optional[float] = None) -> Dict[str, Any]:
+	"""프로젝트 이미지 저장소 정리 (mark-and-sweep).
+	mark: 모든 프로젝트 saved_results가 가리키는 sha256과 파일.
+	sweep: 어느 saved_results에도 없는 프로젝트 outputs 파일을 지운 뒤, 참조되지 않는 blob을 지운다.
+	최근 grace_hours 안에 만들어진 파일은 남긴다 (다른 프로세스에서 도는 작업의 결과가 아직 state.json에 없을 수 있음).
+	"""
+	grace_seconds = (DEFAULT_GC_GRACE_HOURS if grace_hours is None else grace_hours) * 3600
+	now = time.time()
+	live: set = set()
+	removed_files = 0
+	if os.path.isdir(PROJECTS_DIR):
+		for entry in os.scandir(PROJECTS_DIR):
+			if not entry.is_dir():
+				continue
+			state = _load_project_state(entry.name, require=False)
+			referenced = set()
+			for item in state.get("saved_results", []):
+				if item.get("sha256"):
+					live.add(item["sha256"].lower())
+				if item.get("path"):
+					referenced.add(os.path.realpath(item["path"]))
+			outputs_dir = os.path.join(entry.path, "outputs")
+			if not os.path.isdir(outputs_dir):
+				continue
+			for f in os.scandir(outputs_dir):
+				if not f.is_file() or f.name == "manifest.json" or os.path.realpath(f.path) in referenced:
+					continue
+				if now - f.stat().st_mtime < grace_seconds:
+					continue
+				if not dry_run:
+					os.remove(f.path)
+				removed_files += 1
+	result = blob_store.collect_garbage(live, grace_seconds=grace_seconds, dry_run=dry_run)
+	result["live"] = len(live)
+	result["project_files_removed"] = removed_files
+	return result
+
+
+@app.post("/api/storage/gc")
+def api_storage_gc(dry_run: bool = False, grace_hours: Optional[float] = None):
+	"""참조되지 않는 프로젝트 이미지/blob 정리. dry_run=true면 지울 대상만 센다"""
+	return collect_storage_garbage(dry_run=dry_run, grace_hours=grace_hours)
+
+
+# 배치 실행: 매니페스트의 스토리마다 프로젝트를 만들고 스토리보드+이미지(작업 큐의 storyboard_images 작업) → 영상 순서로 진행
+BATCH_DIR = os.path.join(DATA_DIR, "batches")
+BATCH_PARALLEL = int(os.getenv("BATCH_PARALLEL", "2"))
+BATCH_POLL_SECONDS = 1.0
+# 이 프로세스에서 실행 중인 배치 → 중단 이벤트
+_batch_runs: Dict[str, threading.Event] = {}
+_batch_runs_lock = threading.Lock()
+
+
+def _batch_item_fingerprint(story: Dict[str, Any], settings: Dict[str, Any]) -> str:
+	"""스토리/이미지 설정이 바뀐 항목은 이어하지 않고 새로 만든다"""
+	payload = json.dumps([story, settings["model"], settings["size"]], ensure_ascii=False, sort_keys=True)
+	return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def _load_batch_report(report_path: str, stories: List[Dict[str, Any]], settings: Dict[str, Any]) -> Dict[str, Any]:
+	previous: Dict[str, Any] = {}
+	try:
+		with open(report_path, "r", encoding="utf-8") as f:
+			previous = json.load(f)
+	except (OSError, ValueError):
+		pass
+	old_items = {item.get("index"): item for item in previous.get("items", []) if isinstance(item, dict)}
+	items = []
+	for i, story in enumerate(stories):
+		fingerprint = _batch_item_fingerprint(story, settings)
+		old = old_items.get(i)
+		if old and old.get("fingerprint") == fingerprint:
+			items.append(old)
+			continue
+		items.append({
+			"index": i,
+			"title": story.get("title") or "",
+			"fingerprint": fingerprint,
+			"status": "pending",  # pending → images → video → completed (또는 failed)
+			"project_id": None,
+			"job_id": None,
+			"cuts": 0,
+			"video": None,
+			"error": None,
+			"timings": {},
+		})
+	return {
+		"created_at": previous.get("created_at") or datetime.now().isoformat(),
+		"runs": previous.get("runs", 0),
+		"settings": settings,
+		"items": items,
+	}
+
+
+def _batch_summary(items: List[Dict[str, Any]], elapsed: float) -> Dict[str, Any]:
+	counts: Dict[str, int] = {}
+	for item in items:
+		counts[item["status"]] = counts.get(item["status"], 0) + 1
+	images = [item["timings"]["storyboard_images"] for item in items if "storyboard_images" in item["timings"]]
+	videos = [item["timings"]["video"] for item in items if "video" in item["timings"]]
+	return {
+		"total": len(items),
+		"counts": counts,
+		"cuts": sum(item["cuts"] for item in items),
+		"elapsed_seconds": round(elapsed, 3),
+		"storyboard_images_seconds": round(sum(images), 3),
+		"video_seconds": round(sum(videos), 3),
+	}
+
+
+def _wait_for_job(job_id: str, stop: threading.Event) -> Optional[Dict[str, Any]]:
+	"""작업이 끝날 때까지 기다린다. 중단되면 None (작업은 큐에 그대로 남는다)"""
+	while True:
+		job = jobs.get(job_id)
+		if job is None or job["state"] in FINISHED_STATES:
+			return job
+		if stop.wait(BATCH_POLL_SECONDS):
+			return None
+
+
+def _run_batch_item(item: Dict[str, Any], story: Dict[str, Any], settings: Dict[str, Any], update, stop: threading.Event) -> None:
+	"""항목 하나를 남은 단계부터 진행. 상태가 바뀔 때마다 update(item, **fields)로 보고서에 기록한다"""
+	if stop.is_set():
+		return
+	started = time.perf_counter()
+	elapsed = item["timings"].get("elapsed", 0.0)
+	try:
+		if not item["project_id"] or not _get_project_dir(item["project_id"], require=False):
+			meta = _create_project(story.get("title") or "배치 프로젝트")
+			update(item, project_id=meta["id"], job_id=None, status="pending")
+		project_id = item["project_id"]
+
+		if item["status"] in ("pending", "images", "failed"):
+			job = jobs.get(item["job_id"]) if item["job_id"] else None
+			if job is None or job["state"] in ("failed", "cancelled"):
+				job_id = _enqueue_storyboard_images(StoryboardImagesRequest(
+					project_id=project_id,
+					title=story.get("title"),
+					story=story["story"],
+					min_shots_per_scene=story.get("min_shots_per_scene") or 1,
+					style_key=story.get("style_key") or "surreal",
+					model=settings["model"],
+					size=settings["size"],
+					use_cache=settings["use_cache"]
+				))
+				update(item, job_id=job_id, status="images", error=None)
+			job = _wait_for_job(item["job_id"], stop)
+			if job is None:
+				return
+			if job["state"] != "done":
+				raise Exception(job["error"] or job["message"] or "이미지 작업 실패")
+			# 대기/실행 시간은 작업 기록 기준 (중간에 끊겼다 이어져도 실제 작업 시간)
+			update(
+				item,
+				status="video" if settings["video"] else "completed",
+				error=None,
+				cuts=len(job["result"] or []),
+				timings={
+					**item["timings"],
+					"queue_wait": round(job["started_at"] - job["created_at"], 3),
+					"storyboard_images": round(job["finished_at"] - job["started_at"], 3),
+				}
+			)
+
+		if item["status"] == "video" and not stop.is_set():
+			state = _load_project_state(project_id)
+			paths = [r["path"] for r in state["saved_results"] if _has_file(r)]
+			if not paths or len(paths) < len(state.get("prompts", [])):
+				raise Exception(f"영상에 쓸 이미지가 부족합니다 ({len(paths)}/{len(state.get('prompts', []))})")
+			video_started = time.perf_counter()
+			# outputs 폴더가 아닌 곳에 둔다 (outputs에서 saved_results에 없는 파일은 저장소 정리 대상)
+			output = compose_video(
+				paths,
+				fps=settings["fps"],
+				output_path=os.path.join(PROJECTS_DIR, project_id, "final.mp4"),
+				size=settings["size"],
+				captions=_project_captions(project_id) if settings["captions"] else None
+			)
+			update(item, status="completed", video=output, error=None, timings={**item["timings"], "video": round(time.perf_counter() - video_started, 3)})
+	except Exception as e:
+		update(item, status="failed", error=str(e))
+	finally:
+		update(item, timings={**item["timings"], "elapsed": round(elapsed + time.perf_counter() - started, 3)})
+
+
+def run_batch(manifest: Dict[str, Any], report_path: str, *, parallel: Optional[int] = None, stop: Optional[threading.Event] = None) -> Dict[str, Any]:
+	"""매니페스트(BatchRequest 형태)의 스토리를 최대 parallel개 프로젝트씩 동시에 진행하고 report_path에 보고서를 쓴다.
+	이미지 생성은 작업 큐 워커가 맡으므로 워커가 떠 있어야 한다.
+	report_path가 이미 있으면 이어서 실행한다: 완료된 항목은 건너뛰고, 진행 중이던 작업은 다시 기다리고, 실패한 항목은 다시 시도한다.
+	stop이 설정되면 새 단계를 시작하지 않고 보고서를 남긴 채 돌아온다 (큐에 들어간 작업은 계속 진행된다).
+	"""
+	request = BatchRequest(**manifest)
+	settings = {
+		"model": request.model or "fal-ai/flux/dev",
+		"size": request.size or "portrait_16_9",
+		"video": request.video is not False,
+		"fps": request.fps or 24,
+		"captions": request.captions is True,
+		"use_cache": request.use_cache is not False,
+	}
+	stories = [story.model_dump() for story in request.stories]
+	stop = stop or threading.Event()
+	report = _load_batch_report(report_path, stories, settings)
+	report["runs"] += 1
+	started = time.perf_counter()
+	lock = threading.Lock()
+
+	def update(item: Optional[Dict[str, Any]] = None, **fields: Any) -> None:
+		with lock:
+			if item is not None:
+				item.update(fields)
+			report["updated_at"] = datetime.now().isoformat()
+			report["summary"] = _batch_summary(report["items"], time.perf_counter() - started)
+			os.makedirs(os.path.dirname(os.path.abspath(report_path)), exist_ok=True)
+			atomic_write_json(report_path, report)
+
+	report["status"] = "running"
+	update()
+	workers = max(1, parallel or request.parallel or BATCH_PARALLEL)
+	with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="batch") as executor:
+		for item in report["items"]:
+			if item["status"] != "completed":
+				executor.submit(_run_batch_item, item, stories[item["index"]], settings, update, stop)
+	statuses = {item["status"] for item in report["items"]}
+	report["status"] = "completed" if statuses == {"completed"} else ("interrupted" if stop.is_set() else "failed")
+	update()
+	return report
+
+
+def _batch_paths(batch_id: str) -> Tuple[str, str]:
+	if not re.fullmatch(r"[\w\-]+", batch_id):
+		raise HTTPException(404, detail="배치를 찾을 수 없습니다")
+	batch_dir = os.path.join(BATCH_DIR, batch_id)
+	return os.path.join(batch_dir, "manifest.json"), os.path.join(batch_dir, "report.json")
+
+
+def _start_batch(batch_id: str, manifest: Dict[str, Any]) -> None:
+	_, report_path = _batch_paths(batch_id)
+	with _batch_runs_lock:
+		if batch_id in _batch_runs:
+			raise HTTPException(409, detail="이미 실행 중인 배치입니다")
+		stop = _batch_runs[batch_id] = threading.Event()
+
+	def run():
+		try:
+			run_batch(manifest, report_path, stop=stop)
+		except Exception:
+			traceback.print_exc()
+		finally:
+			with _batch_runs_lock:
+				_batch_runs.pop(batch_id, None)
+
+	threading.Thread(target=run, name=f"batch-{batch_id}", daemon=True).start()
+
+
+@app.post("/api/batch")
+def api_batch(payload: BatchRequest):
+	"""여러 스토리를 스토리보드→이미지→영상까지 한 번에 만드는 배치 등록. 진행 상황은 /api/batch/{batch_id} 보고서로 확인"""
+	if not payload.stories:
+		raise HTTPException(400, detail="스토리가 없습니다")
+	batch_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+	manifest_path, _ = _batch_paths(batch_id)
+	os.makedirs(os.path.dirname(manifest_path), exist_ok=True)
+	manifest = payload.model_dump()
+	atomic_write_json(manifest_path, manifest)
+	_start_batch(batch_id, manifest)
+	return {"batch_id": batch_id}
+
+
+@app.get("/api/batch/{batch_id}")
+def api_batch_report(batch_id: str):
+	manifest_path, report_path = _batch_paths(batch_id)
+	if not os.path.isfile(manifest_path):
+		raise HTTPException(404, detail="배치를 찾을 수 없습니다")
+	try:
+		with open(report_path, "r", encoding="utf-8") as f:
+			report = json.load(f)
+	except (OSError, ValueError):
+		report = {"status": "queued", "items": []}
+	with _batch_runs_lock:
+		running = batch_id in _batch_runs
+	return {**report, "batch_id": batch_id, "running": running}
+
+
+@app.post("/api/batch/{batch_id}/resume")
+def api_batch_resume(batch_id: str):
+	"""중단되었거나 실패한 항목이 있는 배치를 이어서 실행 (완료된 프로젝트는 건너뛴다)"""
+	manifest_path, _ = _batch_paths(batch_id)
+	try:
+		with open(manifest_path, "r", encoding="utf-8") as f:
+			manifest = json.load(f)
+	except (OSError, ValueError):
+		raise HTTPException(404, detail="배치를 찾을 수 없습니다")
+	_start_batch(batch_id, manifest)
+	return {"batch_id": batch_id}
+
+
+# 미디어 엔드포인트가 읽을 수 있는 루트. 프론트가 예전부터 보내는 output_dir('Project/data/outputs')는
+# backend 기준 상대 경로라 backend/Project/data 아래에 저장되므로 함께 허용한다
+# 이미지/영상 출력 폴더만 제공한다 (DATA_DIR 전체를 열면 jobs.sqlite3, state.json, 배치 매니페스트까지 내려받을 수 있다).
+# 프로젝트 폴더에는 state.json/metadata.json도 있으므로 MEDIA_TYPES에 없는 확장자는 항상 404
+MEDIA_ROOTS = [OUTPUTS_DIR, PROJECTS_DIR, TEMP_DIR, os.path.join(BASE_DIR, "Project", "data", "outputs")]
+MEDIA_TYPES = {
+	".png": "image/png",
+	".jpg": "image/jpeg",
+	".jpeg": "image/jpeg",
+	".webp": "image/webp",
+	".gif": "image/gif",
+	".mp4": "video/mp4",
+	".mov": "video/quicktime",
+	".webm": "video/webm",
+	".mp3": "audio/mpeg",
+	".wav": "audio/wav",
+}
+
+
+def _resolve_media(path: str) -> Optional[str]:
+	"""허용된 루트 아래의 미디어 파일 (확장자가 MEDIA_TYPES에 있는 경우만)"""
+	real = resolve_media_path(path, MEDIA_ROOTS)
+	if real is None or os.path.splitext(real)[1].lower() not in MEDIA_TYPES:
+		return None
+	return real
+
+
+def _serve_file(request: Request, path: str, *, immutable: bool) -> Response:
+	"""ETag/If-None-Match(304), Range(206)를 처리하는 파일 응답"""
+	st = os.stat(path)
+	etag = file_etag(st)
+	headers = {
+		"ETag": etag,
+		"Accept-Ranges": "bytes",
+		# ?v=로 버전이 붙은 URL은 내용이 바뀌지 않으므로 오래 캐시, 아니면 매번 ETag로 재검증
+		"Cache-Control": "public, max-age=31536000, immutable" if immutable else "public, max-age=0, must-revalidate",
+	}
+	if etag_matches(request.headers.get("if-none-match"), etag):
+		return Response(status_code=304, headers=headers)
+
+	media_type = MEDIA_TYPES.get(os.path.splitext(path)[1].lower(), "application/octet-stream")
+	size = st.st_size
+	byte_range = None
+	if_range = request.headers.get("if-range")
+	if not if_range or if_range == etag:
+		try:
+			byte_range = parse_range(request.headers.get("range"), size)
+		except ValueError:
+			return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+	if byte_range is None:
+		return StreamingResponse(iter_file(path, 0, size - 1), media_type=media_type, headers={**headers, "Content-Length": str(size)})
+	start, end = byte_range
+	return StreamingResponse(
+		iter_file(path, start, end),
+		status_code=206,
+		media_type=media_type,
+		headers={**headers, "Content-Length": str(end - start + 1), "Content-Range": f"bytes {start}-{end}/{size}"}
+	)
+
+
+@app.get("/api/media")
+def api_media(request: Request, path: str, v: Optional[str] = None):
+	"""프로젝트 결과물(이미지/영상) 제공. 영상 탐색을 위한 Range 요청 지원"""
+	real = _resolve_media(path)
+	if real is None:
+		raise HTTPException(404, detail="파일을 찾을 수 없습니다")
+	return _serve_file(request, real, immutable=bool(v))
+
+
+@app.get("/api/media/thumb")
+def api_media_thumb(request: Request, path: str, w: int = 320, v: Optional[str] = None):
+	"""이미지 WebP 썸네일 (너비는 고정 값 중 가장 가까운 큰 값으로 맞춤). 한 번 만든 썸네일은 디스크에 캐시"""
+	real = _resolve_media(path)
+	if real is None or os.path.splitext(real)[1].lower() not in {".png", ".jpg", ".jpeg", ".webp", ".gif"}:
+		raise HTTPException(404, detail="이미지를 찾을 수 없습니다")
+	try:
+		thumb = thumbnail_cache.get(real, w)
+	except Exception as e:
+		raise HTTPException(500, detail=f"썸네일 생성 실패: {e}")
+	return _serve_file(request, thumb, immutable=bool(v))
 
 
 @app.post("/api/video")
-async def api_video(payload: VideoJobRequest):
+def api_video(payload: VideoJobRequest):
+	"""이미지들을 영상으로 인코딩 (블로킹 작업이므로 스레드풀에서 실행되도록 동기 핸들러)"""
+	def _abs(path: Optional[str]) -> Optional[str]:
+		if path and not os.path.isabs(path):
+			return os.path.normpath(os.path.join(BASE_DIR, path))
+		return path
+
+	if payload.captions and not payload.project_id:
+		raise HTTPException(400, detail="자막을 넣으려면 project_id가 필요합니다")
 	try:
-		output = compose_video(image_paths=payload.image_paths, fps=payload.fps, audio_path=payload.audio_path, output_path=payload.output_path)
+		output = compose_video(
+			image_paths=[_abs(p) for p in payload.image_paths],
+			fps=payload.fps or 24,
+			audio_path=_abs(payload.audio_path),
+			output_path=_abs(payload.output_path) or os.path.join(OUTPUTS_DIR, "final.mp4"),
+			durations=payload.durations,
+			size=payload.size or "portrait_16_9",
+			fade=payload.fade or 0.0,
+			captions=_project_captions(payload.project_id) if payload.captions else None,
+			use_cache=payload.use_cache is not False
+		)
 		return {"output": output}
+	except HTTPException:
+		raise
+	except FileNotFoundError as e:
+		raise HTTPException(404, detail=str(e))
 	except Exception as e:
 		raise HTTPException(500, detail=str(e))
 
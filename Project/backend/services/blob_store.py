@@ -0,0 +1,129 @@
+from typing import Any, Dict, Iterable, Optional, Set
+import os
+import time
+import shutil
+import hashlib
+import threading
+from pathlib import Path
+
+
+# 참조가 끊긴 blob도 이 시간 동안은 지우지 않는다 (진행 중인 작업이 아직 state.json에 기록하지 않은 결과 보호)
+DEFAULT_GC_GRACE_HOURS = float(os.getenv("BLOB_GC_GRACE_HOURS", "24"))
+CHUNK_SIZE = 1024 * 1024
+
+
+def file_sha256(path: str) -> str:
+	digest = hashlib.sha256()
+	with open(path, "rb") as f:
+		for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+			digest.update(chunk)
+	return digest.hexdigest()
+
+
+def _link_atomic(src: str, dst: str) -> None:
+	"""dst를 src의 하드링크(불가하면 복사본)로 원자적으로 교체. 읽는 쪽은 옛 파일이나 새 파일 중 하나만 본다"""
+	tmp = f"{dst}.{os.getpid()}.{threading.get_ident()}.tmp"
+	try:
+		os.link(src, tmp)
+	except OSError:
+		shutil.copyfile(src, tmp)
+	try:
+		os.replace(tmp, dst)
+	except BaseException:
+		try:
+			os.remove(tmp)
+		except FileNotFoundError:
+			pass
+		raise
+
+
+class BlobStore:
+	"""이미지 내용(sha256)을 이름으로 쓰는 저장소. 프로젝트 출력 파일은 blob의 하드링크라서 같은 이미지는 한 번만 저장된다.
+	- <root>/<sha[:2]>/<sha><ext>
+	- blob은 만든 뒤 내용을 바꾸지 않는다 (출력 파일 갱신은 항상 새 파일 + rename)
+	- 어떤 프로젝트도 참조하지 않는 blob은 collect_garbage()가 지운다
+	"""
+
+	def __init__(self, root: str):
+		self.root = root
+		self.last_gc: Optional[Dict[str, Any]] = None
+
+	def path_for(self, sha256: str, ext: str = ".png") -> str:
+		return os.path.join(self.root, sha256[:2], f"{sha256}{ext}")
+
+	def relative_path(self, sha256: str, ext: str = ".png") -> str:
+		return os.path.relpath(self.path_for(sha256, ext), self.root)
+
+	def put(self, path: str, sha256: Optional[str] = None) -> str:
+		"""path의 파일을 저장소에 등록하고 sha256을 반환.
+		같은 내용의 blob이 이미 있으면 path를 그 blob의 링크로 바꿔 디스크를 한 벌만 쓰게 한다.
+		sha256을 알고 있으면(다운로드 시 계산) 다시 읽지 않는다.
+		"""
+		sha = (sha256 or file_sha256(path)).lower()
+		blob = self.path_for(sha, os.path.splitext(path)[1] or ".png")
+		if os.path.exists(blob):
+			if not os.path.samefile(blob, path):
+				_link_atomic(blob, path)
+			# 다시 쓰였으므로 GC 유예 시간을 새로 시작
+			os.utime(blob, None)
+		else:
+			os.makedirs(os.path.dirname(blob), exist_ok=True)
+			_link_atomic(path, blob)
+		return sha
+
+	def materialize(self, sha256: str, dst_path: str, ext: str = ".png") -> bool:
+		"""blob을 dst_path에 링크. blob이 없으면 False"""
+		blob = self.path_for(sha256, ext)
+		if not os.path.isfile(blob):
+			return False
+		os.makedirs(os.path.dirname(dst_path) or ".", exist_ok=True)
+		_link_atomic(blob, dst_path)
+		return True
+
+	def _iter_blobs(self) -> Iterable[Path]:
+		root = Path(self.root)
+		if not root.is_dir():
+			return []
+		return root.glob("*/*")
+
+	def collect_garbage(self, live: Set[str], *, grace_seconds: float = DEFAULT_GC_GRACE_HOURS * 3600, dry_run: bool = False) -> Dict[str, Any]:
+		"""mark-and-sweep의 sweep 단계. live(참조 중인 sha256 집합)에 없고 유예 시간이 지난 blob을 지운다.
+		freed_bytes는 다른 링크(프로젝트 출력 파일)가 남아 있지 않은 blob만 센다.
+		"""
+		now = time.time()
+		result = {"scanned": 0, "removed": 0, "freed_bytes": 0, "kept": 0, "dry_run": dry_run}
+		for blob in self._iter_blobs():
+			try:
+				st = blob.stat()
+			except FileNotFoundError:
+				continue
+			if blob.name.endswith(".tmp"):
+				# 중단된 put이 남긴 임시 파일
+				if now - st.st_mtime > grace_seconds and not dry_run:
+					blob.unlink(missing_ok=True)
+				continue
+			result["scanned"] += 1
+			sha = blob.name.split(".", 1)[0]
+			if sha in live or now - st.st_mtime < grace_seconds:
+				result["kept"] += 1
+				continue
+			if not dry_run:
+				blob.unlink(missing_ok=True)
+			result["removed"] += 1
+			if st.st_nlink <= 1:
+				result["freed_bytes"] += st.st_size
+		result["finished_at"] = time.time()
+		self.last_gc = result
+		return result
+
+	def stats(self) -> Dict[str, Any]:
+		count = 0
+		total = 0
+		for blob in self._iter_blobs():
+			try:
+				total += blob.stat().st_size
+				count += 1
+			except FileNotFoundError:
+				continue
+		return {"root": self.root, "blobs": count, "bytes": total, "last_gc": self.last_gc}
+
@@ -0,0 +1,175 @@
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+import os
+import shutil
+import subprocess
+from functools import lru_cache
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+
+# 한글 글리프가 있는 폰트. CAPTION_FONT_PATH → 아래 후보 → fc-match 순으로 찾는다
+CAPTION_FONT_PATH = os.getenv("CAPTION_FONT_PATH", "")
+FONT_CANDIDATES = (
+	"/usr/share/fonts/truetype/nanum/NanumGothicBold.ttf",
+	"/usr/share/fonts/truetype/nanum/NanumGothic.ttf",
+	"/usr/share/fonts/opentype/noto/NotoSansCJK-Bold.ttc",
+	"/usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc",
+	"/usr/share/fonts/noto-cjk/NotoSansCJK-Regular.ttc",
+	"/usr/share/fonts/google-noto-cjk/NotoSansCJK-Regular.ttc",
+	"/System/Library/Fonts/AppleSDGothicNeo.ttc",
+	"C:/Windows/Fonts/malgunbd.ttf",
+	"C:/Windows/Fonts/malgun.ttf",
+)
+# 자막 모양(크기/위치/색)을 바꾸면 올려서 자막이 들어간 영상 세그먼트 캐시를 무효화
+CAPTION_STYLE_VERSION = 1
+# 화자 이름을 붙이지 않는 대사
+NARRATION_SPEAKERS = {"나레이션", "내레이션", "해설", "narration", "narrator"}
+
+
+class CaptionOverlay(NamedTuple):
+	"""프레임에 얹을 자막 상자. 합성 때 곱셈만 하도록 미리 곱해 둔 값을 가진다"""
+	x: int
+	y: int
+	premultiplied: np.ndarray  # (h, w, 3) uint16, rgb * alpha
+	inverse_alpha: np.ndarray  # (h, w, 1) uint16, 255 - alpha
+
+
+@lru_cache(maxsize=1)
+def find_font() -> Optional[str]:
+	"""한글 폰트 경로 (없으면 None → Pillow 기본 폰트, 한글은 네모로 나온다)"""
+	if CAPTION_FONT_PATH and os.path.isfile(CAPTION_FONT_PATH):
+		return CAPTION_FONT_PATH
+	for path in FONT_CANDIDATES:
+		if os.path.isfile(path):
+			return path
+	fc_match = shutil.which("fc-match")
+	if fc_match:
+		try:
+			out = subprocess.run([fc_match, "-f", "%{file}", ":lang=ko"], capture_output=True, text=True, timeout=5).stdout.strip()
+		except (OSError, subprocess.SubprocessError):
+			out = ""
+		if out and os.path.isfile(out):
+			return out
+	return None
+
+
+@lru_cache(maxsize=32)
+def _load_font(path: Optional[str], size: int):
+	if path:
+		return ImageFont.truetype(path, size)
+	return ImageFont.load_default(size)
+
+
+def dialogue_captions(dialogues: Sequence[Dict[str, Any]]) -> List[str]:
+	"""컷의 dialogues → 자막 문장 목록 ("화자: 대사", 나레이션은 대사만)"""
+	captions = []
+	for line in dialogues or []:
+		text = " ".join(str(line.get("text") or "").split())
+		if not text:
+			continue
+		speaker = str(line.get("speaker") or "").strip()
+		captions.append(f"{speaker}: {text}" if speaker and speaker.lower() not in NARRATION_SPEAKERS else text)
+	return captions
+
+
+def _wrap(text: str, font, max_width: int) -> List[str]:
+	"""단어 단위로 줄을 나누고, 한 단어가 줄보다 길면 글자 단위로 자른다"""
+	lines: List[str] = []
+	current = ""
+	for word in text.split(" "):
+		candidate = f"{current} {word}" if current else word
+		if font.getlength(candidate) <= max_width:
+			current = candidate
+			continue
+		if current:
+			lines.append(current)
+		current = ""
+		for ch in word:
+			if current and font.getlength(current + ch) > max_width:
+				lines.append(current)
+				current = ""
+			current += ch
+	if current:
+		lines.append(current)
+	return lines
+
+
+@lru_cache(maxsize=256)
+def layout_caption(text: str, width: int, height: int, font_path: Optional[str]) -> Optional[CaptionOverlay]:
+	"""자막 한 줄(문장)을 화면 하단 반투명 상자로 래스터화. 같은 (문장, 해상도, 폰트)는 프레임/렌더 사이에 재사용된다"""
+	if not text:
+		return None
+	size = max(16, round(min(width, height) * 0.05))
+	font = _load_font(font_path, size)
+	lines = _wrap(text, font, int(width * 0.86))
+	ascent, descent = font.getmetrics()
+	line_height = ascent + descent
+	spacing = round(size * 0.25)
+	pad = round(size * 0.5)
+	stroke = max(1, size // 16)
+	text_width = max(int(font.getlength(line)) for line in lines)
+	box_w = min(width, text_width + pad * 2)
+	box_h = min(height, line_height * len(lines) + spacing * (len(lines) - 1) + pad * 2)
+
+	img = Image.new("RGBA", (box_w, box_h), (0, 0, 0, 0))
+	draw = ImageDraw.Draw(img)
+	draw.rounded_rectangle((0, 0, box_w - 1, box_h - 1), radius=pad, fill=(0, 0, 0, 150))
+	for i, line in enumerate(lines):
+		x = (box_w - font.getlength(line)) / 2
+		y = pad + i * (line_height + spacing)
+		draw.text((x, y), line, font=font, fill=(255, 255, 255, 255), stroke_width=stroke, stroke_fill=(0, 0, 0, 255))
+
+	rgba = np.asarray(img, dtype=np.uint16)
+	alpha = rgba[..., 3:4]
+	return CaptionOverlay(
+		x=(width - box_w) // 2,
+		y=max(0, height - box_h - round(height * 0.08)),
+		premultiplied=rgba[..., :3] * alpha,
+		inverse_alpha=255 - alpha,
+	)
+
+
+def composite(frame: np.ndarray, overlay: CaptionOverlay) -> np.ndarray:
+	"""(h, w, 3) uint8 프레임에 자막을 알파 블렌딩한 새 프레임. 상자 영역만 정수 연산으로 계산한다"""
+	out = frame.copy()
+	h, w = overlay.inverse_alpha.shape[:2]
+	region = out[overlay.y:overlay.y + h, overlay.x:overlay.x + w]
+	# rgb*a + bg*(255-a) <= 255*255 이므로 uint16 안에서 끝난다
+	region[...] = ((overlay.premultiplied + region * overlay.inverse_alpha + 127) // 255).astype(np.uint8)
+	return out
+
+
+def caption_intervals(captions: Sequence[str], frames: int) -> List[Tuple[int, int, str]]:
+	"""컷 길이(frames)를 자막 글자 수에 비례해 나눈 (시작 프레임, 끝 프레임, 문장) 목록"""
+	captions = [c for c in captions if c][:frames]
+	if not captions:
+		return []
+	weights = [max(1, len(c)) for c in captions]
+	total = sum(weights)
+	intervals = []
+	start = 0
+	acc = 0
+	for i, (caption, weight) in enumerate(zip(captions, weights)):
+		acc += weight
+		# 남은 자막이 최소 한 프레임씩은 갖도록
+		end = frames if i == len(captions) - 1 else min(frames - (len(captions) - 1 - i), max(start + 1, round(frames * acc / total)))
+		intervals.append((start, end, caption))
+		start = end
+	return intervals
+
+
+def render_caption_frames(frame: bytes, size: Tuple[int, int], captions: Sequence[str], frames: int, font_path: Optional[str]) -> List[Tuple[bytes, int]]:
+	"""정지 이미지 한 장(rgb24 바이트)에 자막을 넣은 (프레임, 반복 횟수) 목록.
+	이미지가 고정이므로 합성은 프레임마다가 아니라 자막 구간마다 한 번만 한다.
+	"""
+	intervals = caption_intervals(captions, frames)
+	if not intervals:
+		return [(frame, frames)]
+	w, h = size
+	base = np.frombuffer(frame, dtype=np.uint8).reshape(h, w, 3)
+	chunks = []
+	for start, end, caption in intervals:
+		overlay = layout_caption(caption, w, h, font_path)
+		chunks.append((composite(base, overlay).tobytes() if overlay else frame, end - start))
+	return chunks
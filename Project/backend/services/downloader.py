@@ -0,0 +1,169 @@
+from typing import Callable, Dict, Any, Optional, Tuple
+import os
+import time
+import hashlib
+import tempfile
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from backend.services.metrics import DOWNLOAD_SECONDS, DOWNLOAD_BYTES, DOWNLOAD_ERRORS
+
+
+DOWNLOAD_CONNECT_TIMEOUT = float(os.getenv("DOWNLOAD_CONNECT_TIMEOUT", "5"))
+DOWNLOAD_READ_TIMEOUT = float(os.getenv("DOWNLOAD_READ_TIMEOUT", "60"))
+DOWNLOAD_MAX_BYTES = int(os.getenv("DOWNLOAD_MAX_MB", "50")) * 1024 * 1024
+DOWNLOAD_ATTEMPTS = int(os.getenv("DOWNLOAD_ATTEMPTS", "3"))
+DOWNLOAD_POOL_SIZE = int(os.getenv("DOWNLOAD_POOL_SIZE", "16"))
+CHUNK_SIZE = 64 * 1024
+
+_IMAGE_SIGNATURES = (
+	b"\x89PNG\r\n\x1a\n",
+	b"\xff\xd8\xff",  # JPEG
+	b"GIF87a",
+	b"GIF89a",
+)
+
+
+class DownloadError(Exception):
+	"""다운로드 결과가 올바르지 않음 (크기/체크섬/형식 불일치, 본문 중간 끊김)"""
+
+	def __init__(self, message: str, *, retryable: bool = True):
+		super().__init__(message)
+		self.retryable = retryable
+
+
+def looks_like_image(head: bytes) -> bool:
+	"""파일 앞부분의 매직 바이트로 이미지 여부 확인 (PNG/JPEG/GIF/WebP)"""
+	if head.startswith(_IMAGE_SIGNATURES):
+		return True
+	return head[:4] == b"RIFF" and head[8:12] == b"WEBP"
+
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+	"""프로세스 공용 keep-alive 세션. 연결/429·5xx 재시도는 어댑터가 맡는다"""
+	global _session
+	with _session_lock:
+		if _session is None:
+			retry = Retry(
+				total=DOWNLOAD_ATTEMPTS,
+				connect=DOWNLOAD_ATTEMPTS,
+				read=DOWNLOAD_ATTEMPTS,
+				status=DOWNLOAD_ATTEMPTS,
+				backoff_factor=0.5,
+				status_forcelist=(429, 500, 502, 503, 504),
+				allowed_methods=frozenset({"GET", "HEAD"}),
+				respect_retry_after_header=True,
+			)
+			adapter = HTTPAdapter(pool_connections=4, pool_maxsize=DOWNLOAD_POOL_SIZE, max_retries=retry)
+			session = requests.Session()
+			session.mount("https://", adapter)
+			session.mount("http://", adapter)
+			_session = session
+		return _session
+
+
+def _stream_once(
+	url: str,
+	dest_path: str,
+	*,
+	timeout: Tuple[float, float],
+	max_bytes: int,
+	expected_sha256: Optional[str],
+	validate: Optional[Callable[[bytes], bool]]
+) -> Dict[str, Any]:
+	directory = os.path.dirname(dest_path) or "."
+	fd, tmp_path = tempfile.mkstemp(prefix=".download-", suffix=".part", dir=directory)
+	try:
+		digest = hashlib.sha256()
+		size = 0
+		head = b""
+		with os.fdopen(fd, "wb") as f, get_session().get(url, stream=True, timeout=timeout) as resp:
+			resp.raise_for_status()
+			declared = resp.headers.get("Content-Length")
+			encoded = resp.headers.get("Content-Encoding", "identity") not in ("", "identity")
+			if declared and declared.isdigit() and int(declared) > max_bytes:
+				raise DownloadError(f"파일이 너무 큽니다 ({int(declared)} bytes)", retryable=False)
+			try:
+				for chunk in resp.iter_content(CHUNK_SIZE):
+					if not chunk:
+						continue
+					if len(head) < 16:
+						head += chunk[:16 - len(head)]
+					size += len(chunk)
+					if size > max_bytes:
+						raise DownloadError(f"파일이 너무 큽니다 (>{max_bytes} bytes)", retryable=False)
+					digest.update(chunk)
+					f.write(chunk)
+			except requests.exceptions.RequestException as e:
+				# 응답을 받기 시작한 뒤의 끊김은 어댑터가 재시도하지 않으므로 여기서 처리
+				raise DownloadError(f"본문 수신 중 연결이 끊겼습니다: {e}") from e
+		# 압축 전송이면 Content-Length는 압축된 크기이므로 비교하지 않는다
+		if declared and declared.isdigit() and not encoded and size != int(declared):
+			raise DownloadError(f"다운로드가 중간에 끊겼습니다 ({size}/{declared} bytes)")
+		if size == 0:
+			raise DownloadError("빈 응답입니다")
+		if validate is not None and not validate(head):
+			raise DownloadError("이미지 파일이 아닙니다")
+		sha256 = digest.hexdigest()
+		if expected_sha256 and sha256 != expected_sha256.lower():
+			raise DownloadError("체크섬이 일치하지 않습니다")
+		# rename은 디렉터리 항목만 바꾸므로 캐시에서 하드링크된 기존 파일 내용은 건드리지 않는다
+		os.replace(tmp_path, dest_path)
+		return {"path": dest_path, "bytes": size, "sha256": sha256}
+	except BaseException:
+		try:
+			os.remove(tmp_path)
+		except FileNotFoundError:
+			pass
+		raise
+
+
+def download_file(
+	url: str,
+	dest_path: str,
+	*,
+	expected_sha256: Optional[str] = None,
+	max_bytes: int = DOWNLOAD_MAX_BYTES,
+	validate: Optional[Callable[[bytes], bool]] = looks_like_image,
+	attempts: int = DOWNLOAD_ATTEMPTS,
+	timeout: Tuple[float, float] = (DOWNLOAD_CONNECT_TIMEOUT, DOWNLOAD_READ_TIMEOUT)
+) -> Dict[str, Any]:
+	"""url을 임시 파일로 스트리밍한 뒤 검증이 끝나면 dest_path로 원자적으로 교체.
+	연결 실패/429·5xx는 세션 어댑터가, 본문이 잘리거나 검증에 실패한 경우는 여기서 최대 attempts번까지 다시 받는다.
+	반환: {"path", "bytes", "sha256"}
+	"""
+	os.makedirs(os.path.dirname(dest_path) or ".", exist_ok=True)
+	started = time.perf_counter()
+	last_error: Optional[Exception] = None
+	try:
+		for attempt in range(max(1, attempts)):
+			if attempt:
+				time.sleep(min(8.0, 0.5 * 2 ** (attempt - 1)))
+			try:
+				info = _stream_once(
+					url,
+					dest_path,
+					timeout=timeout,
+					max_bytes=max_bytes,
+					expected_sha256=expected_sha256,
+					validate=validate
+				)
+			except DownloadError as e:
+				if not e.retryable:
+					raise
+				last_error = e
+				continue
+			DOWNLOAD_SECONDS.observe(time.perf_counter() - started)
+			DOWNLOAD_BYTES.inc(info["bytes"])
+			return info
+		raise DownloadError(f"다운로드 실패 ({attempts}회 시도): {last_error}")
+	except Exception:
+		DOWNLOAD_ERRORS.inc()
+		raise
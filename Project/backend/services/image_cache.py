@@ -0,0 +1,148 @@
+from typing import Optional, Dict, Any
+import os
+import json
+import time
+import shutil
+import hashlib
+import threading
+from pathlib import Path
+
+from backend.services.state_cache import atomic_write_json
+
+
+DEFAULT_CACHE_DIR = os.getenv("IMAGE_CACHE_DIR") or os.path.normpath(
+	os.path.join(os.path.dirname(__file__), "../../data/cache/images")
+)
+DEFAULT_MAX_BYTES = int(os.getenv("IMAGE_CACHE_MAX_MB", "2048")) * 1024 * 1024
+DEFAULT_MAX_AGE_DAYS = float(os.getenv("IMAGE_CACHE_MAX_AGE_DAYS", "30"))
+
+
+def make_cache_key(model: str, size: str, steps: int, prompt: str, seed: Optional[int] = None) -> str:
+	"""(model, image_size, num_inference_steps, prompt, seed) → sha256 키"""
+	payload = json.dumps(
+		{"model": model, "image_size": size, "num_inference_steps": steps, "prompt": prompt, "seed": seed},
+		ensure_ascii=False,
+		sort_keys=True,
+		separators=(",", ":"),
+	)
+	return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def link_or_copy(src: str, dst: str) -> None:
+	"""가능하면 하드링크, 아니면 복사. 기존 파일은 먼저 지워서 링크 대상이 덮어써지지 않게 한다."""
+	if os.path.lexists(dst):
+		os.remove(dst)
+	try:
+		os.link(src, dst)
+	except OSError:
+		shutil.copy2(src, dst)
+
+
+class ImageCache:
+	"""생성 결과 PNG를 요청 해시로 저장하는 디스크 캐시.
+	- <key>.png: 이미지, <key>.json: 원본 url 등 메타데이터
+	- 크기(max_bytes)/기간(max_age_days) 기준으로 오래 안 쓴 것부터 제거
+	"""
+
+	def __init__(self, root: str = DEFAULT_CACHE_DIR, *, max_bytes: int = DEFAULT_MAX_BYTES, max_age_days: float = DEFAULT_MAX_AGE_DAYS):
+		self.root = root
+		self.max_bytes = max_bytes
+		self.max_age_seconds = max_age_days * 86400
+		self._lock = threading.Lock()
+		self._last_evict = 0.0
+		self.hits = 0
+		self.misses = 0
+		self.bytes_saved = 0
+
+	def _paths(self, key: str) -> tuple[Path, Path]:
+		base = Path(self.root) / key[:2]
+		return base / f"{key}.png", base / f"{key}.json"
+
+	def get(self, key: str, dst_path: str) -> Optional[Dict[str, Any]]:
+		"""캐시에 있으면 dst_path로 링크/복사하고 메타데이터 반환, 없으면 None"""
+		image_path, meta_path = self._paths(key)
+		if not image_path.is_file():
+			with self._lock:
+				self.misses += 1
+			return None
+		if self.max_age_seconds and time.time() - image_path.stat().st_mtime > self.max_age_seconds:
+			self._remove(key)
+			with self._lock:
+				self.misses += 1
+			return None
+		meta: Dict[str, Any] = {}
+		try:
+			with open(meta_path, "r", encoding="utf-8") as f:
+				meta = json.load(f)
+		except Exception:
+			pass
+		os.makedirs(os.path.dirname(dst_path) or ".", exist_ok=True)
+		link_or_copy(str(image_path), dst_path)
+		# 최근 사용 시각 갱신 (LRU 제거 기준)
+		os.utime(image_path, None)
+		with self._lock:
+			self.hits += 1
+			self.bytes_saved += image_path.stat().st_size
+		return meta
+
+	def put(self, key: str, src_path: str, meta: Optional[Dict[str, Any]] = None) -> None:
+		"""생성된 이미지를 캐시에 복사해 둔다 (출력 파일이 나중에 바뀌어도 캐시는 보존)"""
+		image_path, meta_path = self._paths(key)
+		os.makedirs(image_path.parent, exist_ok=True)
+		tmp_path = image_path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+		shutil.copyfile(src_path, tmp_path)
+		os.replace(tmp_path, image_path)
+		# get()이 반쯤 쓰인 메타를 읽지 않도록 이미지처럼 임시 파일 → rename
+		atomic_write_json(str(meta_path), {**(meta or {}), "cached_at": time.time()}, indent=None)
+		# 디렉터리 전체를 훑으므로 너무 자주 돌리지 않는다
+		if time.time() - self._last_evict > 60:
+			self._last_evict = time.time()
+			self.evict()
+
+	def _remove(self, key: str) -> None:
+		for p in self._paths(key):
+			try:
+				p.unlink()
+			except FileNotFoundError:
+				pass
+
+	def evict(self) -> int:
+		"""기간이 지난 항목과 용량 초과분을 오래된 순으로 제거. 제거 개수 반환"""
+		entries = []
+		total = 0
+		now = time.time()
+		removed = 0
+		for image_path in Path(self.root).glob("*/*.png"):
+			try:
+				st = image_path.stat()
+			except FileNotFoundError:
+				continue
+			if self.max_age_seconds and now - st.st_mtime > self.max_age_seconds:
+				self._remove(image_path.stem)
+				removed += 1
+				continue
+			entries.append((st.st_mtime, st.st_size, image_path.stem))
+			total += st.st_size
+		if total > self.max_bytes:
+			for _, size, key in sorted(entries):
+				self._remove(key)
+				removed += 1
+				total -= size
+				if total <= self.max_bytes:
+					break
+		return removed
+
+	def stats(self) -> Dict[str, Any]:
+		with self._lock:
+			lookups = self.hits + self.misses
+			return {
+				"hits": self.hits,
+				"misses": self.misses,
+				"hit_rate": (self.hits / lookups) if lookups else 0.0,
+				"bytes_saved": self.bytes_saved,
+				"root": self.root,
+			}
+
+
+# 프로세스 전역 캐시
+image_cache = ImageCache()
@@ -1,42 +1,80 @@
 from typing import List, Optional, Callable, Dict, Any
 import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
-# ↓ 필요한 라이브러리
-import torch
-from diffusers import StableDiffusionPipeline
-import fal_client
-import requests
+# torch/diffusers/fal_client는 무거우므로 실제로 쓰는 시점에 import (서버 기동 시간/메모리 절약)
+from backend.services.downloader import download_file
+from backend.services.image_cache import image_cache, make_cache_key
+from backend.services.pipeline_manager import PipelineManager
+from backend.services.metrics import FAL_SECONDS, FAL_ERRORS, IMAGE_CACHE_HITS
+from backend.services.scheduler import fal_scheduler, Cancelled
 
-# 전역 파이프라인 캐시
-_PIPE = None
+# 백그라운드 예열 상태 (/ready 응답용)
+_WARMUP: Dict[str, Any] = {"model": None, "state": "idle", "error": None, "seconds": None}
 DEFAULT_FAL_MODEL = "fal-ai/flux/dev"
+# fal.ai 동시 요청 수 (대부분 원격 대기 시간이므로 스레드로 충분)
+DEFAULT_FAL_CONCURRENCY = int(os.getenv("FAL_MAX_CONCURRENCY", "4"))
+# 로컬 diffusers 한 번의 pipe() 호출에 넣는 프롬프트 수
+DEFAULT_LOCAL_BATCH_SIZE = int(os.getenv("LOCAL_BATCH_SIZE", "4"))
+LOCAL_NEGATIVE_PROMPT = "lowres, blurry, bad anatomy, bad hands, extra fingers, text, watermark"
+LOCAL_INFERENCE_STEPS = 25
 
 
-def _get_pipe(model_id: str = "andite/anything-v5.0"):
-    """한 번만 로드해서 전역으로 쓰는 파이프라인"""
-    global _PIPE
-    if _PIPE is not None:
-        return _PIPE
+def _select_device_dtype():
+    """GPU면 float16, CPU는 float16 연산이 느리거나 지원되지 않으므로 float32"""
+    import torch
+
+    if torch.cuda.is_available():
+        # float16은 float32 대비 VRAM을 절반 정도만 쓴다 (8GB VRAM에서도 동작)
+        return "cuda", torch.float16
+    return "cpu", torch.float32
+
+
+def _load_pipe(model_id: str, device: str, dtype):
+    from diffusers import StableDiffusionPipeline
 
     # 여기서 from_pretrained 할 때 한 번만 다운로드되고 이후엔 캐시에서 불러옴
     pipe = StableDiffusionPipeline.from_pretrained(
         model_id,
-        torch_dtype=torch.float16,   # 8GB VRAM이면 반정도는 줄여주자
+        torch_dtype=dtype,
         safety_checker=None
     )
-
-    # GPU 있으면 올리고, 없으면 CPU로
-    if torch.cuda.is_available():
-        pipe = pipe.to("cuda")
-    else:
-        pipe = pipe.to("cpu")
+    pipe = pipe.to(device)
 
     # 메모리 절약
     pipe.enable_attention_slicing()
+    return pipe
+
+
+# 모델별 파이프라인 레지스트리 (메모리 예산 초과 시 LRU로 내림)
+pipeline_manager = PipelineManager(
+    _load_pipe,
+    _select_device_dtype,
+    budget_bytes=int(os.getenv("PIPELINE_RAM_BUDGET_MB", "8192")) * 1024 * 1024
+)
 
-    _PIPE = pipe
-    return _PIPE
+
+def _get_pipe(model_id: str = "andite/anything-v5.0"):
+    """model_id에 맞는 파이프라인 (처음 요청 시 로드, 이후 재사용)"""
+    return pipeline_manager.get(model_id)
+
+
+def warm_up_local_pipeline(model_id: str) -> None:
+    """로컬 파이프라인을 미리 로드 (백그라운드 스레드에서 호출). 결과는 local_pipeline_status()로 확인"""
+    _WARMUP.update({"model": model_id, "state": "loading", "error": None})
+    start = time.perf_counter()
+    try:
+        _get_pipe(model_id)
+        _WARMUP.update({"state": "ready", "seconds": round(time.perf_counter() - start, 2)})
+    except Exception as e:
+        _WARMUP.update({"state": "error", "error": str(e)})
+
+
+def local_pipeline_status() -> Dict[str, Any]:
+    return {**_WARMUP, **pipeline_manager.stats()}
 
 
 def _parse_size(size_str: str):
@@ -48,15 +86,63 @@ def _parse_size(size_str: str):
         return 512, 512
 
 
-def _download_to_path(url: str, output_dir: str, filename: str) -> str:
-    """원격 이미지를 다운로드해 지정 경로에 저장"""
-    os.makedirs(output_dir, exist_ok=True)
-    path = Path(output_dir) / filename
-    resp = requests.get(url)
-    resp.raise_for_status()
-    with open(path, "wb") as f:
-        f.write(resp.content)
-    return str(path)
+def _generate_local_batches(
+    pipe,
+    prompts: List[str],
+    *,
+    size: str,
+    output_dir: str,
+    batch_size: int,
+    steps: int = LOCAL_INFERENCE_STEPS,
+    progress_callback: Optional[Callable[[str, float, str], None]] = None,
+    result_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+    indices: Optional[List[int]] = None,
+    cancel: Optional[threading.Event] = None
+) -> List[Dict[str, Any]]:
+    """프롬프트를 batch_size개씩 묶어 한 번의 pipe() 호출로 생성. 진행 상황은 배치 단위로 보고.
+    indices가 있으면 i번째 프롬프트를 컷 indices[i]로 저장한다 (일부 컷만 다시 생성할 때).
+    cancel이 설정되면 다음 배치를 시작하지 않고 Cancelled를 던진다"""
+    width, height = _parse_size(size)
+    total = len(prompts)
+    batch_size = max(1, batch_size)
+    batch_count = (total + batch_size - 1) // batch_size
+    results: List[Dict[str, Any]] = []
+
+    for b, start in enumerate(range(0, total, batch_size), start=1):
+        if cancel is not None and cancel.is_set():
+            raise Cancelled("이미지 생성 취소됨")
+        batch = prompts[start:start + batch_size]
+        if progress_callback:
+            progress_callback("generating", start / total * 100, f"이미지 {start + 1}-{start + len(batch)}/{total} 생성 중... (배치 {b}/{batch_count})")
+
+        output = pipe(
+            batch,
+            negative_prompt=[LOCAL_NEGATIVE_PROMPT] * len(batch),
+            width=width,
+            height=height,
+            num_inference_steps=steps
+        )
+        for offset, (prompt, image) in enumerate(zip(batch, output.images)):
+            index = indices[start + offset] if indices else start + offset
+            file_path = Path(output_dir) / f"image_{index + 1:02d}.png"
+            if file_path.exists():
+                file_path.unlink()
+            image.save(str(file_path))
+            results.append({"index": index, "prompt": prompt, "path": str(file_path)})
+            if result_callback:
+                result_callback(results[-1])
+
+        if progress_callback:
+            done = start + len(batch)
+            progress_callback("generating", done / total * 100, f"이미지 {done}/{total} 생성 완료 (배치 {b}/{batch_count})")
+
+    return results
+
+
+def _download_to_path(url: str, output_dir: str, filename: str) -> Dict[str, Any]:
+    """원격 이미지를 공용 세션으로 스트리밍 다운로드해 지정 경로에 원자적으로 저장 (path/bytes/sha256 반환).
+    임시 파일에서 rename 하므로 캐시에서 하드링크된 기존 파일을 덮어쓰지 않는다."""
+    return download_file(url, str(Path(output_dir) / filename))
 
 
 def generate_images(
@@ -64,10 +150,11 @@ def generate_images(
     *,
     model: str = "andite/anything-v5.0",
     size: str = "512x512",
-    output_dir: str = "../data/outputs"
+    output_dir: str = "../data/outputs",
+    batch_size: Optional[int] = None
 ) -> List[str]:
     """
-    실제로 diffusers를 사용해서 이미지 생성하는 버전
+    실제로 diffusers를 사용해서 이미지 생성하는 버전 (batch_size개씩 묶어서 생성)
     """
     # fal.ai 모델을 명시적으로 요청한 경우
     if model.startswith("fal") or "fal-ai" in model or "flux" in model:
@@ -76,27 +163,81 @@ def generate_images(
 
     os.makedirs(output_dir, exist_ok=True)
     pipe = _get_pipe(model)
+    results = _generate_local_batches(pipe, prompts, size=size, output_dir=output_dir, batch_size=batch_size or DEFAULT_LOCAL_BATCH_SIZE)
+    return [item["path"] for item in results]
 
-    width, height = _parse_size(size)
-    saved_paths: List[str] = []
-
-    negative_prompt = "lowres, blurry, bad anatomy, bad hands, extra fingers, text, watermark"
 
-    for i, prompt in enumerate(prompts, start=1):
-        result = pipe(
-            prompt,
-            negative_prompt=negative_prompt,
-            width=width,
-            height=height,
-            num_inference_steps=25
-        )
-        image = result.images[0]
-
-        file_path = Path(output_dir) / f"image_{i:02d}.png"
-        image.save(str(file_path))
-        saved_paths.append(str(file_path))
+def _generate_one_with_fal(
+    index: int,
+    prompt: str,
+    *,
+    model: str,
+    size: str,
+    steps: int,
+    output_dir: str,
+    seed: Optional[int] = None,
+    use_cache: bool = True,
+    schedule_key: Optional[str] = None,
+    cancel: Optional[threading.Event] = None
+) -> Dict[str, Any]:
+    """프롬프트 하나를 fal.ai로 생성하고 image_{index+1:02d}.png로 저장.
+    동일한 (model, size, steps, prompt, seed) 결과가 캐시에 있으면 원격 호출 없이 링크만 한다.
+    원격 호출은 fal_scheduler를 거치며, schedule_key(프로젝트/작업 ID)별로 자리를 공평하게 나눠 받는다.
+    cancel이 설정되면 자리 대기/재시도 백오프 중에 Cancelled로 빠져나온다.
+    """
+    if cancel is not None and cancel.is_set():
+        raise Cancelled("이미지 생성 취소됨")
+    filename = f"image_{index + 1:02d}.png"
+    cache_key = make_cache_key(model, size, steps, prompt, seed)
+    if use_cache:
+        cached = image_cache.get(cache_key, str(Path(output_dir) / filename))
+        if cached is not None:
+            IMAGE_CACHE_HITS.inc()
+            return {
+                "index": index,
+                "prompt": prompt,
+                "url": cached.get("url", ""),
+                "path": str(Path(output_dir) / filename),
+                "sha256": cached.get("sha256"),
+                "cached": True
+            }
 
-    return saved_paths
+    arguments: Dict[str, Any] = {
+        "prompt": prompt,
+        "image_size": size,
+        "num_inference_steps": steps
+    }
+    if seed is not None:
+        arguments["seed"] = seed
+    import fal_client
+
+    def subscribe() -> Dict[str, Any]:
+        # 스케줄러 대기 시간은 빼고 실제 호출 시간만 잰다 (재시도마다 한 번씩)
+        started = time.perf_counter()
+        try:
+            resp = fal_client.subscribe(model, arguments=arguments)
+        except Exception:
+            FAL_ERRORS.inc(model=model)
+            raise
+        FAL_SECONDS.observe(time.perf_counter() - started, model=model)
+        return resp
+
+    resp = fal_scheduler.run(subscribe, key=schedule_key, cancel=cancel)
+    image_url = resp["images"][0]["url"]
+    download = _download_to_path(image_url, output_dir, filename)
+    local_path = download["path"]
+    try:
+        image_cache.put(cache_key, local_path, {"url": image_url, "model": model, "prompt": prompt, "sha256": download["sha256"]})
+    except OSError:
+        # 캐시 저장 실패는 생성 결과에 영향을 주지 않는다
+        pass
+    return {
+        "index": index,
+        "prompt": prompt,
+        "url": image_url,
+        "path": local_path,
+        "sha256": download["sha256"]
+    }
 
 
 def generate_images_with_fal(
@@ -106,10 +247,23 @@ def generate_images_with_fal(
     model: str = DEFAULT_FAL_MODEL,
     size: str = "portrait_16_9",
     steps: int = 28,
-    output_dir: str = "../data/outputs"
+    output_dir: str = "../data/outputs",
+    max_concurrency: Optional[int] = None,
+    seed: Optional[int] = None,
+    use_cache: bool = True,
+    result_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+    indices: Optional[List[int]] = None,
+    schedule_key: Optional[str] = None,
+    cancel: Optional[threading.Event] = None
 ) -> List[Dict[str, Any]]:
     """
     fal.ai(Flux)를 사용한 이미지 생성기. 결과는 url/path/prompt를 담은 dict 리스트.
+    max_concurrency개까지 동시에 요청하며, 결과 순서와 index는 입력 순서를 유지한다.
+    use_cache=True면 동일 요청은 디스크 캐시에서 재사용한다.
+    result_callback(result)은 이미지 한 장이 끝날 때마다 (완료 순서대로) 호출된다.
+    indices가 있으면 i번째 프롬프트의 결과 index(파일명)를 indices[i]로 쓴다.
+    max_concurrency는 이 작업의 상한이고, 프로세스 전체 속도/동시 요청 한도는 fal_scheduler가 지킨다.
+    cancel이 설정되면 아직 시작하지 않은 요청은 버리고, 이미 나간 요청을 기다리지 않고 Cancelled를 던진다.
     """
     os.makedirs(output_dir, exist_ok=True)
 
@@ -118,34 +272,56 @@ def generate_images_with_fal(
         progress_callback("loading_model", 5.0, "세션 생성 중...")
 
     total = len(prompts)
-    results: List[Dict[str, Any]] = []
+    results: List[Optional[Dict[str, Any]]] = [None] * total
+    workers = max(1, min(max_concurrency or DEFAULT_FAL_CONCURRENCY, total or 1))
 
-    for i, prompt in enumerate(prompts, start=1):
-        if progress_callback:
-            progress_callback("generating", (i - 1) / total * 100, f"이미지 {i}/{total} 생성 중...")
-        resp = fal_client.subscribe(
-            model,
-            arguments={
-                "prompt": prompt,
-                "image_size": size,
-                "num_inference_steps": steps
-            }
-        )
-        image_url = resp["images"][0]["url"]
-        local_path = _download_to_path(image_url, output_dir, f"image_{i:02d}.png")
-        results.append({
-            "index": i - 1,
-            "prompt": prompt,
-            "url": image_url,
-            "path": local_path
-        })
-        if progress_callback:
-            progress_callback("generating", (i / total) * 100, f"이미지 {i}/{total} 생성 완료")
+    # 콜백은 여러 스레드에서 호출되므로 직렬화해서 상태 저장이 꼬이지 않게 한다
+    callback_lock = threading.Lock()
+    done = 0
+
+    if progress_callback:
+        progress_callback("generating", 0.0, f"이미지 0/{total} 생성 중... (동시 {workers}개)")
+
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="fal")
+    futures = {
+        executor.submit(
+            _generate_one_with_fal,
+            indices[i] if indices else i,
+            prompt,
+            model=model,
+            size=size,
+            steps=steps,
+            output_dir=output_dir,
+            seed=seed,
+            use_cache=use_cache,
+            schedule_key=schedule_key,
+            cancel=cancel
+        ): i
+        for i, prompt in enumerate(prompts)
+    }
+    try:
+        for future in as_completed(futures):
+            i = futures[future]
+            results[i] = future.result()
+            with callback_lock:
+                done += 1
+                if result_callback:
+                    result_callback(results[i])
+                if progress_callback:
+                    progress_callback("generating", (done / total) * 100, f"이미지 {done}/{total} 생성 완료 (컷 {results[i]['index'] + 1})")
+    except Exception:
+        # 하나라도 실패하면 아직 시작하지 않은 요청은 취소
+        for f in futures:
+            f.cancel()
+        raise
+    finally:
+        # 취소된 경우에는 이미 나간 원격 호출이 끝나기를 기다리지 않는다 (끝나면 캐시에만 남는다)
+        executor.shutdown(wait=not (cancel is not None and cancel.is_set()), cancel_futures=True)
 
     if progress_callback:
         progress_callback("completed", 100.0, "모든 이미지 생성 완료")
 
-    return results
+    return [r for r in results if r is not None]
 
 
 def generate_images_with_progress(
@@ -154,11 +330,23 @@ def generate_images_with_progress(
     *,
     model: str = "andite/anything-v5.0",
     size: str = "512x512",
-    output_dir: str = "../data/outputs"
+    output_dir: str = "../data/outputs",
+    max_concurrency: Optional[int] = None,
+    use_cache: bool = True,
+    result_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+    batch_size: Optional[int] = None,
+    indices: Optional[List[int]] = None,
+    schedule_key: Optional[str] = None,
+    cancel: Optional[threading.Event] = None
 ) -> List[Dict[str, Any]]:
     """
     진행 상황 콜백을 지원하는 이미지 생성기.
     progress_callback(status, progress, message) 형태로 호출됨.
+    result_callback(result)은 이미지 한 장이 저장될 때마다 호출됨.
+    max_concurrency, use_cache는 fal.ai 경로, batch_size는 로컬 diffusers 경로에서만 사용된다.
+    indices: 프롬프트별 컷 번호 (일부 컷만 다시 생성할 때). 없으면 0부터 순서대로.
+    schedule_key: fal.ai 스케줄러에서 공평 분배 단위로 쓸 키 (보통 프로젝트 ID).
+    cancel: 설정되면 남은 이미지를 만들지 않고 Cancelled를 던진다.
     """
     # fal.ai 모델을 사용할 경우 전용 경로로 분기
     if model.startswith("fal") or "fal-ai" in model or "flux" in model:
@@ -167,7 +355,13 @@ def generate_images_with_progress(
             progress_callback=progress_callback,
             model=model or DEFAULT_FAL_MODEL,
             size=size,
-            output_dir=output_dir
+            output_dir=output_dir,
+            max_concurrency=max_concurrency,
+            use_cache=use_cache,
+            result_callback=result_callback,
+            indices=indices,
+            schedule_key=schedule_key,
+            cancel=cancel
         )
 
     os.makedirs(output_dir, exist_ok=True)
@@ -181,31 +375,17 @@ def generate_images_with_progress(
     if progress_callback:
         progress_callback("loading_model", 100.0, "모델 준비 완료")
 
-    total = len(prompts)
-    saved_paths: List[Dict[str, Any]] = []
-    width, height = _parse_size(size)
-    negative_prompt = "lowres, blurry, bad anatomy, bad hands, extra fingers, text, watermark"
-
-    for i, prompt in enumerate(prompts, start=1):
-        if progress_callback:
-            progress = (i - 1) / total * 100
-            progress_callback("generating", progress, f"이미지 {i}/{total} 생성 중...")
-
-        result = pipe(
-            prompt,
-            negative_prompt=negative_prompt,
-            width=width,
-            height=height,
-            num_inference_steps=25
-        )
-        image = result.images[0]
-
-        file_path = Path(output_dir) / f"image_{i:02d}.png"
-        image.save(str(file_path))
-        saved_paths.append({"index": i - 1, "prompt": prompt, "path": str(file_path)})
-
-        if progress_callback:
-            progress_callback("generating", (i / total) * 100, f"이미지 {i}/{total} 생성 완료")
+    saved_paths = _generate_local_batches(
+        pipe,
+        prompts,
+        size=size,
+        output_dir=output_dir,
+        batch_size=batch_size or DEFAULT_LOCAL_BATCH_SIZE,
+        progress_callback=progress_callback,
+        result_callback=result_callback,
+        indices=indices,
+        cancel=cancel
+    )
 
     if progress_callback:
         progress_callback("completed", 100.0, "모든 이미지 생성 완료")
@@ -220,18 +400,23 @@ def regenerate_single_image(
     model: str = DEFAULT_FAL_MODEL,
     size: str = "portrait_16_9",
     steps: int = 28,
-    output_dir: str = "../data/outputs"
+    output_dir: str = "../data/outputs",
+    seed: Optional[int] = None,
+    use_cache: bool = True,
+    schedule_key: Optional[str] = None,
+    cancel: Optional[threading.Event] = None
 ) -> Dict[str, Any]:
-    """단일 프롬프트만 다시 생성 (fal.ai 기반)"""
-    results = generate_images_with_fal(
-        [prompt],
-        progress_callback=None,
+    """단일 프롬프트만 다시 생성 (fal.ai 기반). 파일명도 요청한 index 기준으로 저장"""
+    os.makedirs(output_dir, exist_ok=True)
+    return _generate_one_with_fal(
+        index,
+        prompt,
         model=model,
         size=size,
         steps=steps,
-        output_dir=output_dir
+        output_dir=output_dir,
+        seed=seed,
+        use_cache=use_cache,
+        schedule_key=schedule_key,
+        cancel=cancel
     )
-    # index를 요청값으로 덮어쓰면 기존 순서 유지 가능
-    if results:
-        results[0]["index"] = index
-    return results[0] if results else {}
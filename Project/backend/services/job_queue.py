@@ -0,0 +1,519 @@
+from typing import Optional, Dict, Any, List, Callable
+import os
+import json
+import time
+import uuid
+import socket
+import sqlite3
+import importlib
+import threading
+import traceback
+import multiprocessing
+from datetime import datetime
+
+from backend.services.metrics import JOB_QUEUE_WAIT_SECONDS, JOB_SECONDS, JOBS_RUNNING
+
+
+DEFAULT_DB_PATH = os.getenv("JOB_DB_PATH") or os.path.normpath(
+	os.path.join(os.path.dirname(__file__), "../../data/jobs.sqlite3")
+)
+LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "60"))
+HEARTBEAT_SECONDS = LEASE_SECONDS / 3
+POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "0.5"))
+MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+STATUS_SECONDS = 5.0
+# 실행 중인 작업의 취소 요청을 확인하는 간격 (heartbeat보다 짧게)
+CANCEL_POLL_SECONDS = float(os.getenv("JOB_CANCEL_POLL_SECONDS", "1"))
+
+# state: 큐 생명주기 (queued → running → done/failed/cancelled)
+# status: 사용자에게 보여주는 진행 상태 (queued/loading_model/generating/completed/error/cancelled ...)
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+	id TEXT PRIMARY KEY,
+	kind TEXT NOT NULL,
+	project_id TEXT,
+	payload TEXT NOT NULL,
+	state TEXT NOT NULL DEFAULT 'queued',
+	status TEXT NOT NULL DEFAULT 'queued',
+	progress REAL NOT NULL DEFAULT 0,
+	message TEXT NOT NULL DEFAULT '',
+	result TEXT,
+	error TEXT,
+	attempts INTEGER NOT NULL DEFAULT 0,
+	cancel_requested INTEGER NOT NULL DEFAULT 0,
+	lease_owner TEXT,
+	lease_expires REAL,
+	heartbeat_at REAL,
+	created_at REAL NOT NULL,
+	started_at REAL,
+	finished_at REAL,
+	updated_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_state ON jobs(state, created_at);
+CREATE INDEX IF NOT EXISTS idx_jobs_project ON jobs(project_id, created_at);
+CREATE TABLE IF NOT EXISTS job_events (
+	id INTEGER PRIMARY KEY AUTOINCREMENT,
+	job_id TEXT NOT NULL,
+	type TEXT NOT NULL,
+	data TEXT NOT NULL,
+	created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_job_events_job ON job_events(job_id, id);
+CREATE TABLE IF NOT EXISTS worker_commands (
+	id INTEGER PRIMARY KEY AUTOINCREMENT,
+	command TEXT NOT NULL,
+	payload TEXT NOT NULL,
+	created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS worker_status (
+	worker_id TEXT PRIMARY KEY,
+	status TEXT NOT NULL,
+	updated_at REAL NOT NULL
+);
+"""
+# 스트림을 닫아도 되는 이벤트
+TERMINAL_EVENTS = {"completed", "failed", "cancelled"}
+FINISHED_STATES = ("done", "failed", "cancelled")
+
+
+class JobCancelled(Exception):
+	"""취소 요청을 받은 작업이 남은 일을 그만둘 때 던진다"""
+
+
+# 이 프로세스에서 실행 중인 작업별 취소 이벤트 (run_worker가 DB 플래그를 보고 설정)
+_cancel_events: Dict[str, threading.Event] = {}
+_cancel_events_lock = threading.Lock()
+
+
+def cancel_event(job_id: str) -> threading.Event:
+	"""작업의 취소 이벤트. 핸들러는 이것을 긴 작업(원격 호출 대기 등)에 넘겨 취소되면 바로 멈추게 한다"""
+	with _cancel_events_lock:
+		event = _cancel_events.get(job_id)
+		if event is None:
+			event = _cancel_events[job_id] = threading.Event()
+		return event
+
+
+def _forget_cancel_event(job_id: str) -> None:
+	with _cancel_events_lock:
+		_cancel_events.pop(job_id, None)
+
+
+def _now_iso() -> str:
+	return datetime.now().isoformat()
+
+
+class JobQueue:
+	"""SQLite 파일 하나를 공유하는 내구성 작업 큐.
+	여러 API/워커 프로세스가 같은 파일을 열어도 되며, 작업은 lease로 한 워커에게만 할당된다.
+	"""
+
+	def __init__(self, db_path: str = DEFAULT_DB_PATH):
+		self.db_path = db_path
+		self._local = threading.local()
+		os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+		conn = self._conn()
+		conn.executescript(_SCHEMA)
+		columns = {r["name"] for r in conn.execute("PRAGMA table_info(jobs)")}
+		if "cancel_requested" not in columns:
+			# 이전 버전에서 만든 DB
+			conn.execute("ALTER TABLE jobs ADD COLUMN cancel_requested INTEGER NOT NULL DEFAULT 0")
+
+	def _conn(self) -> sqlite3.Connection:
+		"""스레드별 커넥션 (sqlite3 커넥션은 스레드 간 공유하지 않는다)"""
+		conn = getattr(self._local, "conn", None)
+		if conn is None:
+			conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+			conn.row_factory = sqlite3.Row
+			conn.execute("PRAGMA journal_mode=WAL")
+			conn.execute("PRAGMA synchronous=NORMAL")
+			conn.execute("PRAGMA busy_timeout=30000")
+			self._local.conn = conn
+		return conn
+
+	def enqueue(self, kind: str, payload: Dict[str, Any], *, project_id: Optional[str] = None, job_id: Optional[str] = None, message: str = "작업 대기 중...") -> str:
+		job_id = job_id or str(uuid.uuid4())
+		self._conn().execute(
+			"INSERT INTO jobs (id, kind, project_id, payload, message, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+			(job_id, kind, project_id, json.dumps(payload, ensure_ascii=False), message, time.time(), _now_iso()),
+		)
+		return job_id
+
+	def claim(self, worker_id: str, *, kinds: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+		"""대기 중이거나 lease가 만료된 작업 하나를 원자적으로 가져온다"""
+		conn = self._conn()
+		now = time.time()
+		conn.execute("BEGIN IMMEDIATE")
+		try:
+			# 워커가 죽어서 lease가 만료됐고 재시도 횟수도 다 쓴 작업은 실패 처리
+			expired = conn.execute(
+				"SELECT id FROM jobs WHERE state='running' AND lease_expires < ? AND attempts >= ?",
+				(now, MAX_ATTEMPTS),
+			).fetchall()
+			for r in expired:
+				error = "워커 응답 없음 (lease 만료)"
+				conn.execute(
+					"UPDATE jobs SET state='failed', status='error', message=?, error=?, finished_at=?, updated_at=? WHERE id=?",
+					(error, error, now, _now_iso(), r["id"]),
+				)
+				self.add_event(r["id"], "failed", {"status": "error", "progress": 0, "message": error, "error": error})
+			query = "SELECT * FROM jobs WHERE (state='queued' OR (state='running' AND lease_expires < ?))"
+			params: list = [now]
+			if kinds:
+				query += f" AND kind IN ({','.join('?' * len(kinds))})"
+				params.extend(kinds)
+			query += " ORDER BY created_at LIMIT 1"
+			row = conn.execute(query, params).fetchone()
+			if row is None:
+				conn.execute("COMMIT")
+				return None
+			conn.execute(
+				"UPDATE jobs SET state='running', lease_owner=?, lease_expires=?, heartbeat_at=?, attempts=attempts+1, "
+				"started_at=COALESCE(started_at, ?), updated_at=? WHERE id=?",
+				(worker_id, now + LEASE_SECONDS, now, now, _now_iso(), row["id"]),
+			)
+			conn.execute("COMMIT")
+		except BaseException:
+			conn.execute("ROLLBACK")
+			raise
+		job = dict(row)
+		job["payload"] = json.loads(job["payload"])
+		job["attempts"] += 1
+		return job
+
+	def heartbeat(self, job_id: str, worker_id: str) -> bool:
+		"""lease 연장. 다른 워커에게 넘어갔으면 False"""
+		now = time.time()
+		cur = self._conn().execute(
+			"UPDATE jobs SET lease_expires=?, heartbeat_at=? WHERE id=? AND lease_owner=? AND state='running'",
+			(now + LEASE_SECONDS, now, job_id, worker_id),
+		)
+		return cur.rowcount > 0
+
+	def add_event(self, job_id: str, event_type: str, data: Dict[str, Any]) -> int:
+		cur = self._conn().execute(
+			"INSERT INTO job_events (job_id, type, data, created_at) VALUES (?, ?, ?, ?)",
+			(job_id, event_type, json.dumps(data, ensure_ascii=False), time.time()),
+		)
+		return cur.lastrowid
+
+	def events_since(self, job_id: str, after_id: int = 0, *, limit: int = 200) -> List[Dict[str, Any]]:
+		"""after_id 이후 이벤트 (Last-Event-ID 재개용)"""
+		rows = self._conn().execute(
+			"SELECT id, type, data FROM job_events WHERE job_id=? AND id>? ORDER BY id LIMIT ?",
+			(job_id, after_id, limit),
+		).fetchall()
+		return [{"id": r["id"], "type": r["type"], "data": json.loads(r["data"])} for r in rows]
+
+	def update_progress(self, job_id: str, status: str, progress: float, message: str) -> None:
+		"""값이 실제로 바뀐 경우에만 갱신하고 progress 이벤트를 남긴다"""
+		conn = self._conn()
+		updated_at = _now_iso()
+		cur = conn.execute(
+			"UPDATE jobs SET status=?, progress=?, message=?, updated_at=? "
+			"WHERE id=? AND state IN ('queued', 'running') AND (status!=? OR progress!=? OR message!=?)",
+			(status, progress, message, updated_at, job_id, status, progress, message),
+		)
+		if cur.rowcount > 0:
+			self.add_event(job_id, "progress", {"status": status, "progress": progress, "message": message, "updated_at": updated_at})
+
+	def complete(self, job_id: str, result: Any = None, *, message: Optional[str] = None) -> None:
+		"""완료 처리. message가 없으면 마지막 진행 메시지를 그대로 둔다"""
+		self._conn().execute(
+			"UPDATE jobs SET state='done', status='completed', progress=100, message=COALESCE(?, message), result=?, "
+			"finished_at=?, lease_expires=NULL, updated_at=? WHERE id=?",
+			(message, json.dumps(result, ensure_ascii=False), time.time(), _now_iso(), job_id),
+		)
+		self.add_event(job_id, "completed", self.get_progress(job_id) or {})
+
+	def fail(self, job_id: str, error: str) -> None:
+		self._conn().execute(
+			"UPDATE jobs SET state='failed', status='error', message=?, error=?, "
+			"finished_at=?, lease_expires=NULL, updated_at=? WHERE id=?",
+			(error, error, time.time(), _now_iso(), job_id),
+		)
+		self.add_event(job_id, "failed", self.get_progress(job_id) or {"status": "error", "error": error})
+
+	def request_cancel(self, job_id: str) -> Optional[str]:
+		"""취소 요청. 대기 중이면 바로 취소하고, 실행 중이면 플래그를 세워 워커가 멈추게 한다.
+		반환: 요청 후 작업 state (없는 작업이면 None)
+		"""
+		conn = self._conn()
+		now = time.time()
+		cur = conn.execute(
+			"UPDATE jobs SET state='cancelled', status='cancelled', message=?, cancel_requested=1, "
+			"finished_at=?, lease_expires=NULL, updated_at=? WHERE id=? AND state='queued'",
+			("작업이 취소되었습니다", now, _now_iso(), job_id),
+		)
+		if cur.rowcount > 0:
+			self.add_event(job_id, "cancelled", self.get_progress(job_id) or {"status": "cancelled"})
+			return "cancelled"
+		conn.execute("UPDATE jobs SET cancel_requested=1, updated_at=? WHERE id=? AND state='running'", (_now_iso(), job_id))
+		row = conn.execute("SELECT state FROM jobs WHERE id=?", (job_id,)).fetchone()
+		return row["state"] if row else None
+
+	def is_cancel_requested(self, job_id: str) -> bool:
+		row = self._conn().execute("SELECT cancel_requested FROM jobs WHERE id=?", (job_id,)).fetchone()
+		return bool(row and row["cancel_requested"])
+
+	def mark_cancelled(self, job_id: str, result: Any = None) -> None:
+		"""실행 중이던 작업을 취소로 마무리. result에는 취소 전까지 끝난 결과를 남긴다"""
+		self._conn().execute(
+			"UPDATE jobs SET state='cancelled', status='cancelled', message=?, result=?, "
+			"finished_at=?, lease_expires=NULL, updated_at=? WHERE id=?",
+			("작업이 취소되었습니다", json.dumps(result, ensure_ascii=False), time.time(), _now_iso(), job_id),
+		)
+		self.add_event(job_id, "cancelled", self.get_progress(job_id) or {"status": "cancelled"})
+
+	def broadcast(self, command: str, payload: Dict[str, Any]) -> int:
+		"""모든 워커에게 전달할 명령 (각 워커가 작업 사이사이에 한 번씩 실행)"""
+		cur = self._conn().execute(
+			"INSERT INTO worker_commands (command, payload, created_at) VALUES (?, ?, ?)",
+			(command, json.dumps(payload, ensure_ascii=False), time.time()),
+		)
+		return cur.lastrowid
+
+	def latest_command_id(self) -> int:
+		return self._conn().execute("SELECT COALESCE(MAX(id), 0) FROM worker_commands").fetchone()[0]
+
+	def commands_since(self, after_id: int) -> List[Dict[str, Any]]:
+		rows = self._conn().execute(
+			"SELECT id, command, payload FROM worker_commands WHERE id>? ORDER BY id", (after_id,)
+		).fetchall()
+		return [{"id": r["id"], "command": r["command"], "payload": json.loads(r["payload"])} for r in rows]
+
+	def publish_status(self, worker_id: str, status: Dict[str, Any]) -> None:
+		self._conn().execute(
+			"INSERT INTO worker_status (worker_id, status, updated_at) VALUES (?, ?, ?) "
+			"ON CONFLICT(worker_id) DO UPDATE SET status=excluded.status, updated_at=excluded.updated_at",
+			(worker_id, json.dumps(status, ensure_ascii=False), time.time()),
+		)
+
+	def remove_status(self, worker_id: str) -> None:
+		self._conn().execute("DELETE FROM worker_status WHERE worker_id=?", (worker_id,))
+
+	def worker_statuses(self, *, max_age_seconds: float = STATUS_SECONDS * 4) -> List[Dict[str, Any]]:
+		"""최근에 상태를 보고한 (살아 있는) 워커 목록"""
+		rows = self._conn().execute(
+			"SELECT worker_id, status, updated_at FROM worker_status WHERE updated_at > ? ORDER BY worker_id",
+			(time.time() - max_age_seconds,),
+		).fetchall()
+		return [{"worker_id": r["worker_id"], "updated_at": r["updated_at"], **json.loads(r["status"])} for r in rows]
+
+	def prune(self, max_age_seconds: float = 7 * 86400) -> None:
+		"""오래전에 끝난 작업과 이벤트 정리"""
+		cutoff = time.time() - max_age_seconds
+		conn = self._conn()
+		conn.execute("DELETE FROM job_events WHERE created_at < ?", (cutoff,))
+		conn.execute("DELETE FROM jobs WHERE state IN ('done', 'failed', 'cancelled') AND finished_at < ?", (cutoff,))
+		conn.execute("DELETE FROM worker_commands WHERE created_at < ?", (cutoff,))
+		conn.execute("DELETE FROM worker_status WHERE updated_at < ?", (cutoff,))
+
+	def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+		row = self._conn().execute("SELECT * FROM jobs WHERE id=?", (job_id,)).fetchone()
+		if row is None:
+			return None
+		job = dict(row)
+		job["payload"] = json.loads(job["payload"])
+		job["result"] = json.loads(job["result"]) if job["result"] else None
+		return job
+
+	def state_counts(self) -> Dict[str, int]:
+		"""상태별 작업 수 (queued/running/done/failed/cancelled)"""
+		rows = self._conn().execute("SELECT state, COUNT(*) AS n FROM jobs GROUP BY state").fetchall()
+		counts = {"queued": 0, "running": 0, "done": 0, "failed": 0, "cancelled": 0}
+		counts.update({r["state"]: r["n"] for r in rows})
+		return counts
+
+	def get_progress(self, job_id: str) -> Optional[Dict[str, Any]]:
+		"""/api/images/progress 응답 형태 (기존 in-memory progress_store와 동일한 키)"""
+		job = self.get(job_id)
+		if job is None:
+			return None
+		progress: Dict[str, Any] = {
+			"status": job["status"],
+			"progress": job["progress"],
+			"message": job["message"],
+			"updated_at": job["updated_at"],
+		}
+		if job["state"] in ("done", "cancelled"):
+			progress["results"] = job["result"] or []
+		if job["error"]:
+			progress["error"] = job["error"]
+		return progress
+
+
+def _resolve_handler(path: str) -> Callable[..., Any]:
+	"""'package.module:function' 문자열을 함수로"""
+	module_name, _, attr = path.partition(":")
+	return getattr(importlib.import_module(module_name), attr)
+
+
+def run_worker(db_path: str, handlers: Dict[str, str], worker_id: str, stop_event, hooks: Optional[Dict[str, str]] = None) -> None:
+	"""작업을 하나씩 가져와 실행하는 워커 루프. 핸들러는 handler(job_id, **payload) 형태로 호출된다.
+	취소 요청이 오면 cancel_event(job_id)가 설정된다. 핸들러가 JobCancelled를 던지면 작업은 cancelled로 끝난다
+	(예외의 args[0]이 있으면 그때까지의 결과로 남긴다).
+	hooks (모두 선택):
+	- startup(): 워커 시작 시 한 번
+	- command(command, payload): broadcast()된 명령 실행
+	- status() -> dict: 주기적으로 worker_status 테이블에 기록할 상태
+	"""
+	queue = JobQueue(db_path)
+	resolved: Dict[str, Callable[..., Any]] = {}
+	hook_fns = {name: _resolve_handler(path) for name, path in (hooks or {}).items()}
+	status_lock = threading.Lock()
+
+	def _publish_status() -> None:
+		if "status" not in hook_fns:
+			return
+		try:
+			status = hook_fns["status"]()
+			with status_lock:
+				queue.publish_status(worker_id, status)
+		except Exception:
+			traceback.print_exc()
+
+	last_command = queue.latest_command_id()
+	if "startup" in hook_fns:
+		hook_fns["startup"]()
+	_publish_status()
+	last_status = time.time()
+
+	try:
+		while not stop_event.is_set():
+			for command in queue.commands_since(last_command):
+				last_command = command["id"]
+				if "command" in hook_fns:
+					try:
+						hook_fns["command"](command["command"], command["payload"])
+					except Exception:
+						traceback.print_exc()
+				_publish_status()
+				last_status = time.time()
+			if time.time() - last_status >= STATUS_SECONDS:
+				_publish_status()
+				last_status = time.time()
+
+			job = queue.claim(worker_id, kinds=list(handlers))
+			if job is None:
+				stop_event.wait(POLL_SECONDS)
+				continue
+
+			job_id = job["id"]
+			done = threading.Event()
+			cancel = cancel_event(job_id)
+			def _beat() -> None:
+				# 커넥션은 스레드별이므로 같은 queue 객체를 써도 된다
+				last_beat = time.time()
+				while not done.wait(CANCEL_POLL_SECONDS):
+					if not cancel.is_set() and queue.is_cancel_requested(job_id):
+						cancel.set()
+					if time.time() - last_beat < HEARTBEAT_SECONDS:
+						continue
+					last_beat = time.time()
+					if not queue.heartbeat(job_id, worker_id):
+						break
+					if "status" in hook_fns:
+						try:
+							status = hook_fns["status"]()
+							with status_lock:
+								queue.publish_status(worker_id, status)
+						except Exception:
+							pass
+
+			beat = threading.Thread(target=_beat, name=f"heartbeat-{job_id[:8]}", daemon=True)
+			beat.start()
+			if job["attempts"] == 1:
+				JOB_QUEUE_WAIT_SECONDS.observe(max(0.0, time.time() - job["created_at"]), kind=job["kind"])
+			JOBS_RUNNING.inc()
+			started = time.perf_counter()
+			outcome = "failed"
+			try:
+				handler = resolved.get(job["kind"])
+				if handler is None:
+					handler = resolved[job["kind"]] = _resolve_handler(handlers[job["kind"]])
+				result = handler(job_id, **job["payload"])
+				queue.complete(job_id, result)
+				outcome = "completed"
+			except JobCancelled as e:
+				queue.mark_cancelled(job_id, e.args[0] if e.args else None)
+				outcome = "cancelled"
+			except Exception as e:
+				if cancel.is_set():
+					# 취소로 중단된 대기/호출이 던진 예외
+					queue.mark_cancelled(job_id)
+					outcome = "cancelled"
+				else:
+					traceback.print_exc()
+					queue.fail(job_id, str(e))
+			finally:
+				JOBS_RUNNING.dec()
+				JOB_SECONDS.observe(time.perf_counter() - started, kind=job["kind"], outcome=outcome)
+				done.set()
+				beat.join(timeout=1)
+				_forget_cancel_event(job_id)
+			_publish_status()
+			last_status = time.time()
+	finally:
+		queue.remove_status(worker_id)
+
+
+def _worker_process_main(db_path: str, handlers: Dict[str, str], worker_id: str, stop_event, hooks: Optional[Dict[str, str]]) -> None:
+	try:
+		run_worker(db_path, handlers, worker_id, stop_event, hooks)
+	except KeyboardInterrupt:
+		pass
+
+
+class WorkerPool:
+	"""워커 프로세스 묶음. 죽은 워커는 감시 스레드가 다시 띄운다"""
+
+	def __init__(self, handlers: Dict[str, str], *, size: int = 2, db_path: str = DEFAULT_DB_PATH, hooks: Optional[Dict[str, str]] = None):
+		self.handlers = handlers
+		self.hooks = hooks
+		self.size = size
+		self.db_path = db_path
+		# fork 대신 spawn: 스레드가 떠 있는 API 프로세스를 복제하지 않고, OS와 무관하게 동작
+		self._ctx = multiprocessing.get_context("spawn")
+		self._stop = self._ctx.Event()
+		self._procs: List[Any] = []
+		self._monitor: Optional[threading.Thread] = None
+
+	def _spawn(self, slot: int):
+		worker_id = f"{socket.gethostname()}:{os.getpid()}:{slot}:{uuid.uuid4().hex[:6]}"
+		proc = self._ctx.Process(
+			target=_worker_process_main,
+			args=(self.db_path, self.handlers, worker_id, self._stop, self.hooks),
+			name=f"job-worker-{slot}",
+			daemon=True,
+		)
+		proc.start()
+		return proc
+
+	def start(self) -> "WorkerPool":
+		self._procs = [self._spawn(i) for i in range(self.size)]
+		self._monitor = threading.Thread(target=self._watch, name="job-worker-monitor", daemon=True)
+		self._monitor.start()
+		return self
+
+	def _watch(self) -> None:
+		while not self._stop.wait(2.0):
+			for i, proc in enumerate(self._procs):
+				if not proc.is_alive():
+					self._procs[i] = self._spawn(i)
+
+	def request_stop(self) -> None:
+		self._stop.set()
+
+	def wait(self) -> None:
+		"""stop 요청이 올 때까지 대기 (Ctrl+C는 그대로 전달된다)"""
+		while not self._stop.wait(1.0):
+			pass
+
+	def stop(self, timeout: float = 10.0) -> None:
+		self._stop.set()
+		deadline = time.time() + timeout
+		for proc in self._procs:
+			proc.join(max(0.0, deadline - time.time()))
+			if proc.is_alive():
+				proc.terminate()
@@ -0,0 +1,147 @@
+from typing import Iterator, List, Optional, Tuple
+import os
+import hashlib
+import tempfile
+import threading
+
+
+# 썸네일은 이 너비들로만 만든다 (임의 크기 요청으로 캐시가 불어나지 않게)
+THUMB_WIDTHS = (160, 320, 640)
+THUMB_QUALITY = 80
+DEFAULT_THUMB_DIR = os.getenv("THUMB_CACHE_DIR") or os.path.normpath(
+	os.path.join(os.path.dirname(__file__), "../../data/cache/thumbs")
+)
+CHUNK_SIZE = 256 * 1024
+
+
+def resolve_media_path(path: str, roots: List[str]) -> Optional[str]:
+	"""path가 허용된 루트 아래의 실제 파일이면 절대 경로, 아니면 None (../ 나 심볼릭 링크로 벗어나는 경우 차단)"""
+	if not path:
+		return None
+	candidates = [path] if os.path.isabs(path) else [os.path.join(root, path) for root in roots]
+	for candidate in candidates:
+		real = os.path.realpath(candidate)
+		for root in roots:
+			real_root = os.path.realpath(root)
+			if os.path.commonpath([real, real_root]) == real_root and os.path.isfile(real):
+				return real
+	return None
+
+
+def file_etag(st: os.stat_result) -> str:
+	return f'"{st.st_size:x}-{st.st_mtime_ns:x}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+	if not if_none_match:
+		return False
+	if if_none_match.strip() == "*":
+		return True
+	# 약한 비교: W/ 접두어는 무시
+	tags = [t.strip().removeprefix("W/") for t in if_none_match.split(",")]
+	return etag in tags
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+	"""'bytes=start-end' 하나만 지원. 헤더가 없거나 형식이 다르면 None, 범위를 만족할 수 없으면 ValueError"""
+	if not header or not header.startswith("bytes=") or "," in header:
+		return None
+	start_text, _, end_text = header[6:].strip().partition("-")
+	try:
+		if start_text == "":
+			# 마지막 N 바이트
+			length = int(end_text)
+			if length <= 0:
+				raise ValueError(header)
+			return max(0, size - length), size - 1
+		start = int(start_text)
+		end = int(end_text) if end_text else size - 1
+	except ValueError:
+		return None
+	if start >= size or end < start:
+		raise ValueError(header)
+	return start, min(end, size - 1)
+
+
+def iter_file(path: str, start: int, end: int, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+	"""[start, end] 구간을 chunk_size씩 읽는다"""
+	with open(path, "rb") as f:
+		f.seek(start)
+		remaining = end - start + 1
+		while remaining > 0:
+			data = f.read(min(chunk_size, remaining))
+			if not data:
+				break
+			remaining -= len(data)
+			yield data
+
+
+def snap_width(width: int) -> int:
+	"""요청 너비보다 크거나 같은 가장 작은 고정 너비 (없으면 최대값)"""
+	for w in THUMB_WIDTHS:
+		if width <= w:
+			return w
+	return THUMB_WIDTHS[-1]
+
+
+class ThumbnailCache:
+	"""원본 이미지(경로+크기+mtime)와 너비별 WebP 썸네일을 디스크에 캐시.
+	원본이 바뀌면 키가 달라지므로 새로 만든다. 같은 썸네일을 동시에 요청해도 한 번만 만든다.
+	"""
+
+	def __init__(self, root: str = DEFAULT_THUMB_DIR):
+		self.root = root
+		self._lock = threading.Lock()
+		self._key_locks: dict = {}
+		self.hits = 0
+		self.misses = 0
+
+	def _path_for(self, src_path: str, width: int) -> str:
+		st = os.stat(src_path)
+		key = hashlib.sha1(f"{src_path}|{st.st_size}|{st.st_mtime_ns}|{width}".encode("utf-8")).hexdigest()
+		return os.path.join(self.root, key[:2], f"{key}_{width}.webp")
+
+	def get(self, src_path: str, width: int) -> str:
+		width = snap_width(width)
+		thumb_path = self._path_for(src_path, width)
+		if os.path.exists(thumb_path):
+			self.hits += 1
+			return thumb_path
+		with self._lock:
+			key_lock = self._key_locks.setdefault(thumb_path, threading.Lock())
+		with key_lock:
+			if not os.path.exists(thumb_path):
+				self.misses += 1
+				self._render(src_path, thumb_path, width)
+		with self._lock:
+			self._key_locks.pop(thumb_path, None)
+		return thumb_path
+
+	@staticmethod
+	def _render(src_path: str, thumb_path: str, width: int) -> None:
+		from PIL import Image
+
+		directory = os.path.dirname(thumb_path)
+		os.makedirs(directory, exist_ok=True)
+		with Image.open(src_path) as img:
+			img = img.convert("RGBA" if img.mode in ("RGBA", "LA", "P") else "RGB")
+			if img.width > width:
+				height = max(1, round(img.height * width / img.width))
+				img = img.resize((width, height), Image.Resampling.LANCZOS)
+			fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", suffix=".webp", dir=directory)
+			try:
+				with os.fdopen(fd, "wb") as f:
+					img.save(f, format="WEBP", quality=THUMB_QUALITY, method=4)
+				os.replace(tmp_path, thumb_path)
+			except BaseException:
+				try:
+					os.remove(tmp_path)
+				except FileNotFoundError:
+					pass
+				raise
+
+	def stats(self) -> dict:
+		return {"dir": self.root, "hits": self.hits, "misses": self.misses}
+
+
+thumbnail_cache = ThumbnailCache()
@@ -0,0 +1,196 @@
+from typing import Dict, Any, List, Sequence, Tuple
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+
+# 원격 호출(LLM/fal.ai)과 로컬 작업(저장/다운로드)을 함께 다룰 수 있는 초 단위 버킷
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+# LLM 입력 토큰 수
+TOKEN_BUCKETS = (250, 500, 1000, 2000, 4000, 8000, 16000, 32000, 64000, 128000)
+
+
+def _label_key(labelnames: Tuple[str, ...], labels: Dict[str, str]) -> Tuple[str, ...]:
+	return tuple(str(labels.get(name, "")) for name in labelnames)
+
+
+class _Metric:
+	type = ""
+
+	def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+		self.name = name
+		self.help = help
+		self.labelnames = tuple(labelnames)
+		self._lock = threading.Lock()
+		self._series: Dict[Tuple[str, ...], Any] = {}
+
+	def _snapshot_series(self) -> List[List[Any]]:
+		with self._lock:
+			return [[dict(zip(self.labelnames, key)), self._copy(value)] for key, value in self._series.items()]
+
+	@staticmethod
+	def _copy(value: Any) -> Any:
+		return value
+
+	def snapshot(self) -> Dict[str, Any]:
+		return {"name": self.name, "type": self.type, "help": self.help, "series": self._snapshot_series()}
+
+
+class Counter(_Metric):
+	type = "counter"
+
+	def inc(self, amount: float = 1.0, **labels: str) -> None:
+		key = _label_key(self.labelnames, labels)
+		with self._lock:
+			self._series[key] = self._series.get(key, 0.0) + amount
+
+
+class Gauge(_Metric):
+	type = "gauge"
+
+	def set(self, value: float, **labels: str) -> None:
+		with self._lock:
+			self._series[_label_key(self.labelnames, labels)] = float(value)
+
+	def inc(self, amount: float = 1.0, **labels: str) -> None:
+		key = _label_key(self.labelnames, labels)
+		with self._lock:
+			self._series[key] = self._series.get(key, 0.0) + amount
+
+	def dec(self, amount: float = 1.0, **labels: str) -> None:
+		self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+	"""누적이 아닌 버킷별 개수를 저장하고 출력할 때 누적한다 (observe는 bisect 한 번 + 덧셈)"""
+	type = "histogram"
+
+	def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+		super().__init__(name, help, labelnames)
+		self.buckets = tuple(sorted(buckets))
+
+	def observe(self, value: float, **labels: str) -> None:
+		key = _label_key(self.labelnames, labels)
+		slot = bisect.bisect_left(self.buckets, value)
+		with self._lock:
+			series = self._series.get(key)
+			if series is None:
+				series = self._series[key] = {"counts": [0] * (len(self.buckets) + 1), "sum": 0.0, "count": 0}
+			series["counts"][slot] += 1
+			series["sum"] += value
+			series["count"] += 1
+
+	@contextmanager
+	def time(self, **labels: str):
+		start = time.perf_counter()
+		try:
+			yield
+		finally:
+			self.observe(time.perf_counter() - start, **labels)
+
+	@staticmethod
+	def _copy(value: Any) -> Any:
+		return {"counts": list(value["counts"]), "sum": value["sum"], "count": value["count"]}
+
+	def snapshot(self) -> Dict[str, Any]:
+		return {**super().snapshot(), "buckets": list(self.buckets)}
+
+
+class Registry:
+	def __init__(self):
+		self._metrics: List[_Metric] = []
+		self._lock = threading.Lock()
+
+	def register(self, metric: _Metric) -> _Metric:
+		with self._lock:
+			self._metrics.append(metric)
+		return metric
+
+	def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+		return self.register(Counter(name, help, labelnames))
+
+	def gauge(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Gauge:
+		return self.register(Gauge(name, help, labelnames))
+
+	def histogram(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+		return self.register(Histogram(name, help, labelnames, buckets))
+
+	def snapshot(self) -> List[Dict[str, Any]]:
+		"""JSON으로 보낼 수 있는 현재 값 (워커 프로세스가 worker_status로 공유)"""
+		with self._lock:
+			metrics = list(self._metrics)
+		return [m.snapshot() for m in metrics]
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+	if not labels:
+		return ""
+	parts = []
+	for key, value in labels.items():
+		escaped = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+		parts.append(f'{key}="{escaped}"')
+	return "{" + ",".join(parts) + "}"
+
+
+def _format_value(value: float) -> str:
+	if value == float("inf"):
+		return "+Inf"
+	if float(value).is_integer():
+		return str(int(value))
+	return repr(float(value))
+
+
+def render(sources: List[Tuple[Dict[str, str], List[Dict[str, Any]]]]) -> str:
+	"""(추가 라벨, snapshot) 목록을 Prometheus text format(0.0.4)으로 합친다.
+	같은 이름의 메트릭은 HELP/TYPE을 한 번만 쓰고, 프로세스별 값은 추가 라벨(예: worker)로 구분한다.
+	"""
+	order: List[str] = []
+	grouped: Dict[str, Dict[str, Any]] = {}
+	for extra, snapshot in sources:
+		for metric in snapshot:
+			entry = grouped.get(metric["name"])
+			if entry is None:
+				entry = grouped[metric["name"]] = {**metric, "series": []}
+				order.append(metric["name"])
+			for labels, value in metric["series"]:
+				entry["series"].append(({**labels, **extra}, value))
+
+	lines: List[str] = []
+	for name in order:
+		metric = grouped[name]
+		lines.append(f"# HELP {name} {metric['help']}")
+		lines.append(f"# TYPE {name} {metric['type']}")
+		for labels, value in metric["series"]:
+			if metric["type"] != "histogram":
+				lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+				continue
+			cumulative = 0
+			for bound, count in zip(list(metric["buckets"]) + [float("inf")], value["counts"]):
+				cumulative += count
+				lines.append(f"{name}_bucket{_format_labels({**labels, 'le': _format_value(bound)})} {cumulative}")
+			lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(value['sum'])}")
+			lines.append(f"{name}_count{_format_labels(labels)} {value['count']}")
+	return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+LLM_SECONDS = registry.histogram("aivideos_llm_request_seconds", "스토리보드 LLM 호출 시간", ("mode",))
+LLM_ERRORS = registry.counter("aivideos_llm_errors_total", "스토리보드 LLM 호출 실패", ("mode",))
+LLM_PROMPT_TOKENS = registry.histogram("aivideos_llm_prompt_tokens", "스토리보드 요청 입력 토큰 수 (전송 전 계산)", ("mode",), buckets=TOKEN_BUCKETS)
+LLM_TOKENS = registry.counter("aivideos_llm_tokens_total", "OpenAI가 보고한 토큰 사용량", ("mode", "kind"))
+LLM_PREFLIGHT = registry.counter("aivideos_llm_preflight_total", "입력 토큰 예산을 넘어 나누거나 자른 요청", ("action",))
+FAL_SECONDS = registry.histogram("aivideos_fal_image_seconds", "fal.ai 이미지 한 장 생성 시간 (다운로드 제외)", ("model",))
+FAL_ERRORS = registry.counter("aivideos_fal_errors_total", "fal.ai 호출 실패", ("model",))
+IMAGE_CACHE_HITS = registry.counter("aivideos_image_cache_hits_total", "이미지 결과 캐시 적중")
+DOWNLOAD_SECONDS = registry.histogram("aivideos_download_seconds", "생성 이미지 다운로드 시간 (재시도 포함)")
+DOWNLOAD_BYTES = registry.counter("aivideos_download_bytes_total", "다운로드한 바이트 수")
+DOWNLOAD_ERRORS = registry.counter("aivideos_download_errors_total", "다운로드 최종 실패")
+STATE_SAVE_SECONDS = registry.histogram("aivideos_state_save_seconds", "프로젝트 state.json 저장 시간")
+JOB_QUEUE_WAIT_SECONDS = registry.histogram("aivideos_job_queue_wait_seconds", "작업 등록부터 워커가 가져갈 때까지 대기 시간", ("kind",))
+JOB_SECONDS = registry.histogram("aivideos_job_duration_seconds", "작업 실행 시간", ("kind", "outcome"))
+JOBS_RUNNING = registry.gauge("aivideos_worker_jobs_running", "이 워커에서 실행 중인 작업 수")
+SCHEDULER_WAIT_SECONDS = registry.histogram("aivideos_scheduler_wait_seconds", "제공자별 스케줄러 자리 대기 시간", ("provider",))
+SCHEDULER_RETRIES = registry.counter("aivideos_scheduler_retries_total", "재시도한 제공자 호출 수", ("provider",))
+SCHEDULER_IN_FLIGHT = registry.gauge("aivideos_scheduler_in_flight", "제공자별 진행 중인 호출 수", ("provider",))
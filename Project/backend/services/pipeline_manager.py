@@ -0,0 +1,151 @@
+from typing import Any, Callable, Dict, List, Tuple
+import gc
+import time
+import threading
+from collections import OrderedDict
+
+
+def estimate_pipeline_bytes(pipe: Any) -> int:
+	"""파이프라인 구성요소(nn.Module)의 파라미터+버퍼 크기 합"""
+	total = 0
+	components = getattr(pipe, "components", None) or {}
+	for component in components.values():
+		parameters = getattr(component, "parameters", None)
+		buffers = getattr(component, "buffers", None)
+		if not callable(parameters):
+			continue
+		for tensor in parameters():
+			total += tensor.numel() * tensor.element_size()
+		if callable(buffers):
+			for tensor in buffers():
+				total += tensor.numel() * tensor.element_size()
+	return total
+
+
+class _Entry:
+	def __init__(self, pipe: Any, load_seconds: float, size_bytes: int):
+		self.pipe = pipe
+		self.load_seconds = load_seconds
+		self.size_bytes = size_bytes
+		self.loaded_at = time.time()
+		self.last_used = self.loaded_at
+		self.uses = 0
+
+
+class PipelineManager:
+	"""(model_id, device, dtype)별 파이프라인 레지스트리.
+	- 메모리 예산(budget_bytes)을 넘으면 가장 오래 안 쓴 파이프라인부터 내린다 (방금 로드한 것은 유지).
+	- 같은 키를 여러 스레드가 동시에 요청해도 한 번만 로드한다.
+	"""
+
+	def __init__(
+		self,
+		loader: Callable[[str, str, Any], Any],
+		select_device_dtype: Callable[[], Tuple[str, Any]],
+		*,
+		budget_bytes: int
+	):
+		self._loader = loader
+		self._select_device_dtype = select_device_dtype
+		self.budget_bytes = budget_bytes
+		self._entries: "OrderedDict[Tuple[str, str, str], _Entry]" = OrderedDict()
+		self._lock = threading.Lock()
+		self._load_locks: Dict[Tuple[str, str, str], threading.Lock] = {}
+
+	def _key(self, model_id: str) -> Tuple[Tuple[str, str, str], str, Any]:
+		device, dtype = self._select_device_dtype()
+		return (model_id, device, str(dtype).replace("torch.", "")), device, dtype
+
+	def get(self, model_id: str) -> Any:
+		key, device, dtype = self._key(model_id)
+		with self._lock:
+			entry = self._entries.get(key)
+			if entry is not None:
+				self._entries.move_to_end(key)
+				entry.last_used = time.time()
+				entry.uses += 1
+				return entry.pipe
+			load_lock = self._load_locks.setdefault(key, threading.Lock())
+
+		with load_lock:
+			with self._lock:
+				entry = self._entries.get(key)
+			if entry is None:
+				start = time.perf_counter()
+				pipe = self._loader(model_id, device, dtype)
+				entry = _Entry(pipe, time.perf_counter() - start, estimate_pipeline_bytes(pipe))
+				with self._lock:
+					self._entries[key] = entry
+				self._evict(keep=key)
+		with self._lock:
+			entry.last_used = time.time()
+			entry.uses += 1
+		return entry.pipe
+
+	def preload(self, model_id: str) -> Dict[str, Any]:
+		self.get(model_id)
+		key, _, _ = self._key(model_id)
+		with self._lock:
+			return self._describe(key, self._entries[key])
+
+	def unload(self, model_id: str) -> bool:
+		"""model_id의 모든 device/dtype 조합을 내린다"""
+		with self._lock:
+			keys = [k for k in self._entries if k[0] == model_id]
+			for k in keys:
+				del self._entries[k]
+		if keys:
+			self._release_memory()
+		return bool(keys)
+
+	def _evict(self, *, keep: Tuple[str, str, str]) -> None:
+		evicted = False
+		with self._lock:
+			while self._total_bytes() > self.budget_bytes:
+				victim = next((k for k in self._entries if k != keep), None)
+				if victim is None:
+					break
+				del self._entries[victim]
+				evicted = True
+		if evicted:
+			self._release_memory()
+
+	def _total_bytes(self) -> int:
+		return sum(e.size_bytes for e in self._entries.values())
+
+	@staticmethod
+	def _release_memory() -> None:
+		# 다른 스레드가 아직 쓰는 중이면 참조가 끝날 때 해제된다
+		gc.collect()
+		try:
+			import torch
+
+			if torch.cuda.is_available():
+				torch.cuda.empty_cache()
+		except ImportError:
+			pass
+
+	@staticmethod
+	def _describe(key: Tuple[str, str, str], entry: _Entry) -> Dict[str, Any]:
+		return {
+			"model_id": key[0],
+			"device": key[1],
+			"dtype": key[2],
+			"size_mb": round(entry.size_bytes / 1024 / 1024, 1),
+			"load_seconds": round(entry.load_seconds, 2),
+			"loaded_at": entry.loaded_at,
+			"last_used": entry.last_used,
+			"uses": entry.uses,
+		}
+
+	def stats(self) -> Dict[str, Any]:
+		with self._lock:
+			return {
+				"budget_mb": round(self.budget_bytes / 1024 / 1024, 1),
+				"resident_mb": round(self._total_bytes() / 1024 / 1024, 1),
+				"pipelines": [self._describe(k, e) for k, e in reversed(self._entries.items())],
+			}
+
+	def loaded_models(self) -> List[str]:
+		with self._lock:
+			return [k[0] for k in self._entries]
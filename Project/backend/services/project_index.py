@@ -0,0 +1,159 @@
+from typing import Optional, Dict, Any, List
+import os
+import json
+import sqlite3
+import threading
+
+
+IMAGE_EXTS = {".png", ".jpg", ".jpeg", ".webp"}
+VIDEO_EXTS = {".mp4", ".mov", ".webm"}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS projects (
+	id TEXT PRIMARY KEY,
+	title TEXT,
+	created_at TEXT,
+	mode TEXT,
+	status TEXT,
+	meta TEXT NOT NULL,
+	meta_mtime INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_projects_created ON projects(created_at);
+CREATE TABLE IF NOT EXISTS index_state (
+	key TEXT PRIMARY KEY,
+	value TEXT
+);
+"""
+
+
+class ProjectIndex:
+	"""PROJECTS_DIR의 metadata.json을 SQLite 테이블로 유지하는 인덱스.
+	- 생성/수정/삭제 핸들러가 upsert/delete로 직접 갱신한다.
+	- 디렉터리 mtime이 마지막 동기화 때와 다르면 바뀐 metadata.json만 다시 읽는다 (수동으로 폴더를 추가/삭제한 경우 대비).
+	"""
+
+	def __init__(self, db_path: str, projects_dir: str):
+		self.db_path = db_path
+		self.projects_dir = projects_dir
+		self._local = threading.local()
+		self._sync_lock = threading.Lock()
+		os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+		self._conn().executescript(_SCHEMA)
+
+	def _conn(self) -> sqlite3.Connection:
+		conn = getattr(self._local, "conn", None)
+		if conn is None:
+			conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+			conn.row_factory = sqlite3.Row
+			conn.execute("PRAGMA journal_mode=WAL")
+			conn.execute("PRAGMA busy_timeout=30000")
+			self._local.conn = conn
+		return conn
+
+	def upsert(self, meta: Dict[str, Any], *, meta_mtime: Optional[int] = None) -> None:
+		if meta_mtime is None:
+			meta_path = os.path.join(self.projects_dir, meta["id"], "metadata.json")
+			try:
+				meta_mtime = os.stat(meta_path).st_mtime_ns
+			except FileNotFoundError:
+				meta_mtime = 0
+		self._conn().execute(
+			"INSERT INTO projects (id, title, created_at, mode, status, meta, meta_mtime) VALUES (?, ?, ?, ?, ?, ?, ?) "
+			"ON CONFLICT(id) DO UPDATE SET title=excluded.title, created_at=excluded.created_at, mode=excluded.mode, "
+			"status=excluded.status, meta=excluded.meta, meta_mtime=excluded.meta_mtime",
+			(
+				meta["id"], meta.get("title"), meta.get("createdAt"), meta.get("mode"), meta.get("status"),
+				json.dumps(meta, ensure_ascii=False), meta_mtime,
+			),
+		)
+
+	def delete(self, project_id: str) -> None:
+		self._conn().execute("DELETE FROM projects WHERE id=?", (project_id,))
+
+	def sync(self) -> None:
+		"""디렉터리 mtime이 바뀐 경우에만 디스크와 맞춘다"""
+		try:
+			dir_mtime = str(os.stat(self.projects_dir).st_mtime_ns)
+		except FileNotFoundError:
+			return
+		conn = self._conn()
+		row = conn.execute("SELECT value FROM index_state WHERE key='projects_dir_mtime'").fetchone()
+		if row is not None and row["value"] == dir_mtime:
+			return
+		with self._sync_lock:
+			known = {r["id"]: r["meta_mtime"] for r in conn.execute("SELECT id, meta_mtime FROM projects")}
+			seen = set()
+			with os.scandir(self.projects_dir) as it:
+				for entry in it:
+					if not entry.is_dir():
+						continue
+					seen.add(entry.name)
+					meta_path = os.path.join(entry.path, "metadata.json")
+					try:
+						meta_mtime = os.stat(meta_path).st_mtime_ns
+					except FileNotFoundError:
+						meta_mtime = 0
+					if known.get(entry.name) == meta_mtime:
+						continue
+					meta = {"id": entry.name, "title": entry.name, "createdAt": None}
+					if meta_mtime:
+						try:
+							with open(meta_path, "r", encoding="utf-8") as f:
+								meta.update(json.load(f))
+						except Exception:
+							pass
+					meta["id"] = entry.name
+					self.upsert(meta, meta_mtime=meta_mtime)
+			for project_id in set(known) - seen:
+				self.delete(project_id)
+			conn.execute(
+				"INSERT INTO index_state (key, value) VALUES ('projects_dir_mtime', ?) "
+				"ON CONFLICT(key) DO UPDATE SET value=excluded.value",
+				(dir_mtime,),
+			)
+
+	def count(self) -> int:
+		return self._conn().execute("SELECT COUNT(*) FROM projects").fetchone()[0]
+
+	def list(self, *, offset: int = 0, limit: int = 50, descending: bool = True) -> List[Dict[str, Any]]:
+		order = "DESC" if descending else "ASC"
+		rows = self._conn().execute(
+			f"SELECT meta FROM projects ORDER BY created_at IS NULL, created_at {order}, id {order} LIMIT ? OFFSET ?",
+			(limit, offset),
+		).fetchall()
+		return [json.loads(r["meta"]) for r in rows]
+
+
+class OutputsIndex:
+	"""출력 폴더 목록을 디렉터리 mtime 기준으로 캐시 (파일 추가/삭제가 없으면 다시 훑지 않는다)"""
+
+	def __init__(self, outputs_dir: str):
+		self.outputs_dir = outputs_dir
+		self._lock = threading.Lock()
+		self._mtime: Optional[int] = None
+		self._lists: Dict[str, List[str]] = {"prompts": [], "images": [], "videos": []}
+
+	def lists(self) -> Dict[str, List[str]]:
+		try:
+			mtime = os.stat(self.outputs_dir).st_mtime_ns
+		except FileNotFoundError:
+			return {"prompts": [], "images": [], "videos": []}
+		with self._lock:
+			if mtime != self._mtime:
+				prompts: List[str] = []
+				images: List[str] = []
+				videos: List[str] = []
+				with os.scandir(self.outputs_dir) as it:
+					for entry in it:
+						if not entry.is_file():
+							continue
+						ext = os.path.splitext(entry.name)[1].lower()
+						if entry.name.startswith("prompt_") and ext == ".txt":
+							prompts.append(entry.path)
+						elif ext in IMAGE_EXTS:
+							images.append(entry.path)
+						elif ext in VIDEO_EXTS:
+							videos.append(entry.path)
+				self._lists = {"prompts": sorted(prompts), "images": sorted(images), "videos": sorted(videos)}
+				self._mtime = mtime
+			return self._lists
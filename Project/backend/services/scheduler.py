@@ -0,0 +1,246 @@
+from typing import Any, Callable, Deque, Dict, Optional
+import os
+import time
+import random
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+from backend.services.metrics import SCHEDULER_WAIT_SECONDS, SCHEDULER_RETRIES, SCHEDULER_IN_FLIGHT
+
+
+RETRYABLE_STATUS = {408, 409, 425, 429, 500, 502, 503, 504}
+
+
+class Cancelled(Exception):
+	"""대기/백오프 중에 취소 이벤트가 설정됨"""
+
+
+def _status_code(exc: BaseException) -> Optional[int]:
+	for attr in ("status_code", "status"):
+		value = getattr(exc, attr, None)
+		if isinstance(value, int):
+			return value
+	response = getattr(exc, "response", None)
+	value = getattr(response, "status_code", None)
+	return value if isinstance(value, int) else None
+
+
+def is_retryable(exc: BaseException) -> bool:
+	"""429/5xx, 연결 끊김, 타임아웃은 다시 시도할 만한 오류로 본다 (openai/httpx/requests 예외 공통)"""
+	status = _status_code(exc)
+	if status is not None:
+		return status in RETRYABLE_STATUS
+	if isinstance(exc, (ConnectionError, TimeoutError)):
+		return True
+	name = type(exc).__name__
+	return any(word in name for word in ("Timeout", "Connection", "RateLimit", "ServiceUnavailable"))
+
+
+def _retry_after(exc: BaseException) -> Optional[float]:
+	response = getattr(exc, "response", None)
+	headers = getattr(response, "headers", None)
+	if not headers:
+		return None
+	try:
+		return float(headers.get("retry-after"))
+	except (TypeError, ValueError):
+		return None
+
+
+class TokenBucket:
+	"""초당 rate개씩 채워지고 최대 burst개까지 쌓이는 토큰 버킷 (rate<=0이면 무제한). 호출자가 락을 잡고 쓴다"""
+
+	def __init__(self, rate: float, burst: float):
+		self.rate = rate
+		self.burst = max(1.0, burst)
+		self.tokens = self.burst
+		self.updated = time.monotonic()
+
+	def delay(self) -> float:
+		"""토큰 하나를 쓸 수 있을 때까지 남은 시간 (0이면 지금 가능)"""
+		if self.rate <= 0:
+			return 0.0
+		now = time.monotonic()
+		self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+		self.updated = now
+		return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+	def take(self) -> None:
+		if self.rate > 0:
+			self.tokens -= 1
+
+
+class ProviderScheduler:
+	"""외부 API(제공자) 하나에 대한 프로세스 공용 스케줄러.
+	- 토큰 버킷으로 초당 요청 수를, max_in_flight로 동시 요청 수를 제한한다.
+	- 기다리는 요청은 key(보통 프로젝트 ID)별 큐에 넣고 key 사이를 라운드로빈으로 돌려 한 프로젝트가 자리를 독점하지 못하게 한다.
+	- run()은 재시도할 만한 오류(429/5xx/연결)를 지터가 들어간 지수 백오프로 다시 시도한다. 백오프 동안에는 자리를 반납한다.
+	"""
+
+	def __init__(
+		self,
+		name: str,
+		*,
+		rate: float,
+		burst: float,
+		max_in_flight: int,
+		max_retries: int = 4,
+		base_delay: float = 0.5,
+		max_delay: float = 30.0
+	):
+		self.name = name
+		self.max_retries = max_retries
+		self.base_delay = base_delay
+		self.max_delay = max_delay
+		self._cond = threading.Condition()
+		self._bucket = TokenBucket(rate, burst)
+		self._max_in_flight = max(1, max_in_flight)
+		self._in_flight = 0
+		self._queues: Dict[str, Deque[object]] = {}
+		self._turns: Deque[str] = deque()
+		self.retries = 0
+
+	def configure(self, *, rate: Optional[float] = None, burst: Optional[float] = None, max_in_flight: Optional[int] = None) -> None:
+		with self._cond:
+			if rate is not None or burst is not None:
+				self._bucket = TokenBucket(self._bucket.rate if rate is None else rate, self._bucket.burst if burst is None else burst)
+			if max_in_flight is not None:
+				self._max_in_flight = max(1, max_in_flight)
+			self._cond.notify_all()
+
+	def _acquire(self, key: str, cancel: Optional[threading.Event]) -> None:
+		ticket = object()
+		started = time.perf_counter()
+		with self._cond:
+			queue = self._queues.get(key)
+			if queue is None:
+				queue = self._queues[key] = deque()
+				self._turns.append(key)
+			queue.append(ticket)
+			try:
+				while True:
+					if cancel is not None and cancel.is_set():
+						raise Cancelled(f"{self.name} 요청 취소됨")
+					timeout = None
+					# 내 key의 차례이고, 내 key 큐의 맨 앞이며, 자리가 있을 때만 진행
+					if self._in_flight < self._max_in_flight and self._turns[0] == key and queue[0] is ticket:
+						timeout = self._bucket.delay()
+						if timeout <= 0:
+							self._bucket.take()
+							self._in_flight += 1
+							queue.popleft()
+							self._turns.popleft()
+							if queue:
+								self._turns.append(key)
+							else:
+								del self._queues[key]
+							self._cond.notify_all()
+							break
+					# 취소 이벤트는 조건 변수를 깨우지 않으므로 주기적으로 확인
+					self._cond.wait(min(timeout, 0.5) if timeout is not None else 0.5)
+			except BaseException:
+				if ticket in queue:
+					queue.remove(ticket)
+					if not queue and self._queues.get(key) is queue:
+						del self._queues[key]
+						self._turns.remove(key)
+				self._cond.notify_all()
+				raise
+		SCHEDULER_WAIT_SECONDS.observe(time.perf_counter() - started, provider=self.name)
+		SCHEDULER_IN_FLIGHT.inc(provider=self.name)
+
+	def _release(self) -> None:
+		with self._cond:
+			self._in_flight -= 1
+			self._cond.notify_all()
+		SCHEDULER_IN_FLIGHT.dec(provider=self.name)
+
+	@contextmanager
+	def slot(self, key: Optional[str] = None, *, cancel: Optional[threading.Event] = None):
+		"""자리 하나를 잡고 블록이 끝날 때 반납 (스트리밍 응답처럼 호출 이후에도 연결을 쓰는 경우)"""
+		self._acquire(key or "default", cancel)
+		try:
+			yield
+		finally:
+			self._release()
+
+	def _backoff(self, error: BaseException, attempt: int, cancel: Optional[threading.Event]) -> None:
+		"""재시도 전 대기 (full jitter). 자리를 반납한 상태에서 호출한다"""
+		delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+		hint = _retry_after(error)
+		if hint is not None:
+			delay = max(delay, min(hint, self.max_delay))
+		with self._cond:
+			self.retries += 1
+		SCHEDULER_RETRIES.inc(provider=self.name)
+		if cancel is not None:
+			if cancel.wait(delay):
+				raise Cancelled(f"{self.name} 요청 취소됨")
+		else:
+			time.sleep(delay)
+
+	@contextmanager
+	def held(self, fn: Callable[..., Any], *args: Any, key: Optional[str] = None, cancel: Optional[threading.Event] = None, **kwargs: Any):
+		"""run()처럼 fn 호출을 재시도하되, 성공하면 블록이 끝날 때까지 자리를 쥐고 있는다.
+		스트리밍 응답처럼 호출이 돌아온 뒤에도 연결을 쓰는 경우 (본문을 읽는 동안에도 max_in_flight에 포함된다).
+		"""
+		attempt = 0
+		while True:
+			self._acquire(key or "default", cancel)
+			try:
+				result = fn(*args, **kwargs)
+			except Exception as e:
+				self._release()
+				if attempt >= self.max_retries or not is_retryable(e):
+					raise
+				self._backoff(e, attempt, cancel)
+				attempt += 1
+				continue
+			try:
+				yield result
+			finally:
+				self._release()
+			return
+
+	def run(self, fn: Callable[..., Any], *args: Any, key: Optional[str] = None, cancel: Optional[threading.Event] = None, **kwargs: Any) -> Any:
+		"""fn(*args, **kwargs)를 제한 안에서 실행하고, 재시도할 만한 오류면 백오프 후 다시 시도 (백오프 동안에는 자리를 반납)"""
+		with self.held(fn, *args, key=key, cancel=cancel, **kwargs) as result:
+			return result
+
+	def stats(self) -> Dict[str, Any]:
+		with self._cond:
+			return {
+				"provider": self.name,
+				"in_flight": self._in_flight,
+				"max_in_flight": self._max_in_flight,
+				"rate_per_sec": self._bucket.rate,
+				"waiting": {key: len(queue) for key, queue in self._queues.items()},
+				"retries": self.retries,
+			}
+
+
+# 제공자 전체 한도. 프로세스가 여러 개면 configure_for_processes()로 나눠 갖는다
+FAL_RATE_PER_SEC = float(os.getenv("FAL_RATE_PER_SEC", "5"))
+FAL_MAX_IN_FLIGHT = int(os.getenv("FAL_MAX_IN_FLIGHT", "8"))
+OPENAI_RATE_PER_SEC = float(os.getenv("OPENAI_RATE_PER_SEC", "3"))
+OPENAI_MAX_IN_FLIGHT = int(os.getenv("OPENAI_MAX_IN_FLIGHT", "8"))
+SCHEDULER_MAX_RETRIES = int(os.getenv("SCHEDULER_MAX_RETRIES", "4"))
+
+fal_scheduler = ProviderScheduler("fal", rate=FAL_RATE_PER_SEC, burst=FAL_MAX_IN_FLIGHT, max_in_flight=FAL_MAX_IN_FLIGHT, max_retries=SCHEDULER_MAX_RETRIES)
+openai_scheduler = ProviderScheduler("openai", rate=OPENAI_RATE_PER_SEC, burst=OPENAI_MAX_IN_FLIGHT, max_in_flight=OPENAI_MAX_IN_FLIGHT, max_retries=SCHEDULER_MAX_RETRIES)
+
+
+def configure_for_processes(processes: int) -> None:
+	"""같은 제공자를 호출하는 프로세스 수로 한도를 나눈다 (프로세스 사이에는 조율하지 않으므로 균등 분할)"""
+	processes = max(1, processes)
+	fal_scheduler.configure(
+		rate=FAL_RATE_PER_SEC / processes,
+		burst=max(1.0, FAL_MAX_IN_FLIGHT / processes),
+		max_in_flight=max(1, FAL_MAX_IN_FLIGHT // processes)
+	)
+	openai_scheduler.configure(
+		rate=OPENAI_RATE_PER_SEC / processes,
+		burst=max(1.0, OPENAI_MAX_IN_FLIGHT / processes),
+		max_in_flight=max(1, OPENAI_MAX_IN_FLIGHT // processes)
+	)
@@ -0,0 +1,98 @@
+from typing import Callable, Dict, Any, Optional
+import os
+import json
+import time
+import atexit
+import tempfile
+import threading
+
+
+def atomic_write_json(path: str, data: Any, *, indent: Optional[int] = 2) -> None:
+	"""같은 디렉터리에 임시 파일로 쓴 뒤 rename. 중간에 죽어도 반쯤 쓰인 JSON이 남지 않는다"""
+	directory = os.path.dirname(path) or "."
+	fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", suffix=".json", dir=directory)
+	try:
+		with os.fdopen(fd, "w", encoding="utf-8") as f:
+			json.dump(data, f, ensure_ascii=False, indent=indent)
+		os.replace(tmp_path, path)
+	except BaseException:
+		try:
+			os.remove(tmp_path)
+		except FileNotFoundError:
+			pass
+		raise
+
+
+class WriteBehindStateCache:
+	"""프로젝트 state.json에 대한 write-behind 캐시.
+	- update()는 바꿀 필드(패치)만 메모리에 모아 두고 즉시 반환한다.
+	- 프로젝트별로 flush_interval_ms에 최대 한 번, 디스크의 최신 state를 읽어 패치를 덮어쓴 뒤 저장한다.
+	  (패치만 반영하므로 그 사이 API에서 바꾼 다른 필드를 덮어쓰지 않는다)
+	- 작업 종료 시 flush(project_id), 프로세스 종료 시 flush_all()로 남은 패치를 기록한다.
+	"""
+
+	def __init__(
+		self,
+		load_state: Callable[[str], Dict[str, Any]],
+		save_state: Callable[[str, Dict[str, Any]], None],
+		*,
+		flush_interval_ms: int = 500
+	):
+		self._load_state = load_state
+		self._save_state = save_state
+		self.flush_interval = flush_interval_ms / 1000
+		self._lock = threading.Lock()
+		self._flush_lock = threading.Lock()
+		self._pending: Dict[str, Dict[str, Any]] = {}
+		self._timers: Dict[str, threading.Timer] = {}
+		self._last_flush: Dict[str, float] = {}
+		self.flush_count = 0
+		atexit.register(self.flush_all)
+
+	def update(self, project_id: str, patch: Dict[str, Any]) -> None:
+		with self._lock:
+			self._pending.setdefault(project_id, {}).update(patch)
+			if project_id in self._timers:
+				return
+			delay = max(0.0, self._last_flush.get(project_id, 0.0) + self.flush_interval - time.monotonic())
+			timer = threading.Timer(delay, self._flush_from_timer, args=(project_id,))
+			timer.daemon = True
+			self._timers[project_id] = timer
+		timer.start()
+
+	def pending(self, project_id: str) -> Dict[str, Any]:
+		"""아직 디스크에 안 쓴 패치 (같은 프로세스에서 읽을 때 덮어쓰기용)"""
+		with self._lock:
+			return dict(self._pending.get(project_id, {}))
+
+	def _flush_from_timer(self, project_id: str) -> None:
+		try:
+			self.flush(project_id)
+		except Exception:
+			pass
+
+	def flush(self, project_id: str) -> None:
+		# 패치를 꺼내는 순서와 쓰는 순서가 어긋나지 않도록 flush 전체를 직렬화
+		with self._flush_lock:
+			with self._lock:
+				timer = self._timers.pop(project_id, None)
+				patch = self._pending.pop(project_id, None)
+			if timer is not None:
+				timer.cancel()
+			if not patch:
+				return
+			state = self._load_state(project_id)
+			state.update(patch)
+			self._save_state(project_id, state)
+			self.flush_count += 1
+			with self._lock:
+				self._last_flush[project_id] = time.monotonic()
+
+	def flush_all(self) -> None:
+		with self._lock:
+			project_ids = list(self._pending)
+		for project_id in project_ids:
+			try:
+				self.flush(project_id)
+			except Exception:
+				pass
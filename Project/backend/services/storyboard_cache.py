@@ -0,0 +1,96 @@
+from typing import Optional, Dict, Any
+import os
+import re
+import json
+import hashlib
+import threading
+from pathlib import Path
+
+
+DEFAULT_CACHE_DIR = os.getenv("STORYBOARD_CACHE_DIR") or os.path.normpath(
+	os.path.join(os.path.dirname(__file__), "../../data/cache/storyboards")
+)
+DEFAULT_MAX_ENTRIES = int(os.getenv("STORYBOARD_CACHE_MAX_ENTRIES", "500"))
+
+
+def normalize_story(story_text: str) -> str:
+	"""캐시 키용 정규화: 줄바꿈 통일, 줄 끝 공백 제거, 연속 빈 줄/공백 축약"""
+	text = (story_text or "").replace("\r\n", "\n").replace("\r", "\n")
+	lines = [re.sub(r"[ \t]+", " ", line).strip() for line in text.split("\n")]
+	text = "\n".join(lines)
+	text = re.sub(r"\n{3,}", "\n\n", text)
+	return text.strip()
+
+
+def make_storyboard_key(story_text: str, **params: Any) -> str:
+	"""정규화된 스토리 해시 + 생성 파라미터로 키 생성"""
+	story_hash = hashlib.sha256(normalize_story(story_text).encode("utf-8")).hexdigest()
+	payload = json.dumps({"story": story_hash, **params}, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+	return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class StoryboardCache:
+	"""검증된 Storyboard(dict)를 키별 JSON 파일로 보관하는 캐시. 항목 수 초과 시 오래 안 쓴 것부터 제거"""
+
+	def __init__(self, root: str = DEFAULT_CACHE_DIR, *, max_entries: int = DEFAULT_MAX_ENTRIES):
+		self.root = root
+		self.max_entries = max_entries
+		self._lock = threading.Lock()
+		self.hits = 0
+		self.misses = 0
+
+	def _path(self, key: str) -> Path:
+		return Path(self.root) / f"{key}.json"
+
+	def get(self, key: str) -> Optional[Dict[str, Any]]:
+		path = self._path(key)
+		try:
+			with open(path, "r", encoding="utf-8") as f:
+				data = json.load(f)
+			os.utime(path, None)
+		except (FileNotFoundError, json.JSONDecodeError):
+			with self._lock:
+				self.misses += 1
+			return None
+		with self._lock:
+			self.hits += 1
+		return data
+
+	def put(self, key: str, data: Dict[str, Any]) -> None:
+		os.makedirs(self.root, exist_ok=True)
+		path = self._path(key)
+		tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+		with open(tmp_path, "w", encoding="utf-8") as f:
+			json.dump(data, f, ensure_ascii=False)
+		os.replace(tmp_path, path)
+		self.evict()
+
+	def evict(self) -> int:
+		entries = []
+		for p in Path(self.root).glob("*.json"):
+			try:
+				entries.append((p.stat().st_mtime, p))
+			except FileNotFoundError:
+				# 다른 프로세스가 먼저 지운 항목
+				continue
+		entries.sort(key=lambda e: e[0])
+		overflow = len(entries) - self.max_entries
+		for _, p in entries[:max(0, overflow)]:
+			try:
+				p.unlink()
+			except FileNotFoundError:
+				pass
+		return max(0, overflow)
+
+	def stats(self) -> Dict[str, Any]:
+		with self._lock:
+			lookups = self.hits + self.misses
+			return {
+				"hits": self.hits,
+				"misses": self.misses,
+				"hit_rate": (self.hits / lookups) if lookups else 0.0,
+				"root": self.root,
+			}
+
+
+storyboard_cache = StoryboardCache()
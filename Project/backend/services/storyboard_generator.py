@@ -1,8 +1,28 @@
-from typing import List, Optional
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union, get_args, get_origin
 from pydantic import BaseModel, Field
 from openai import OpenAI
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
 import json
+import math
 import os
+import re
+import time
+import types
+
+from backend.services.storyboard_cache import storyboard_cache, make_storyboard_key
+from backend.services.character_extractor import extract_characters
+from backend.services.metrics import LLM_SECONDS, LLM_ERRORS, LLM_PROMPT_TOKENS, LLM_TOKENS, LLM_PREFLIGHT
+from backend.services.scheduler import openai_scheduler
+from backend.services.token_budget import count_tokens, count_message_tokens, truncate_to_tokens, input_budget
+
+# 프롬프트/후처리 로직을 바꾸면 올려서 기존 캐시를 무효화
+STORYBOARD_PROMPT_VERSION = 2
+# 스키마 전달 방식: compact(프롬프트에 한 줄짜리 축약 스키마) | json_schema(OpenAI structured outputs, 프롬프트에는 스키마 없음)
+STORYBOARD_SCHEMA_MODE = os.getenv("STORYBOARD_SCHEMA_MODE", "compact")
+# 응답용으로 남겨 둘 토큰 수, 입력 토큰 상한 (0이면 모델 컨텍스트 길이 기준)
+STORYBOARD_OUTPUT_RESERVE = int(os.getenv("STORYBOARD_OUTPUT_RESERVE", "8192"))
+STORYBOARD_MAX_INPUT_TOKENS = int(os.getenv("STORYBOARD_MAX_INPUT_TOKENS", "0"))
 
 
 class DialogueLine(BaseModel):
@@ -26,54 +46,254 @@ class Storyboard(BaseModel):
 	cuts: List[StoryCut] = Field(default_factory=list)
 
 
+def _compact_type(annotation: Any) -> Any:
+	"""pydantic 필드 타입을 예시 JSON 모양으로 (List[X] → [X], Optional[X] → "X?", 모델 → {필드: 타입})"""
+	origin = get_origin(annotation)
+	if origin in (list, List):
+		return [_compact_type(get_args(annotation)[0])]
+	if origin in (Union, types.UnionType):
+		inner = _compact_type(next(a for a in get_args(annotation) if a is not type(None)))
+		return f"{inner}?" if isinstance(inner, str) else inner
+	if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+		return {name: _compact_type(field.annotation) for name, field in annotation.model_fields.items()}
+	return {str: "str", int: "int", float: "num", bool: "bool"}.get(annotation, "str")
+
+
+def compact_schema(model: type) -> str:
+	"""model_json_schema(indent=2) 대신 쓰는 한 줄짜리 스키마. 필드 설명은 프롬프트 규칙에 한 번만 쓴다"""
+	return json.dumps(_compact_type(model), ensure_ascii=False, separators=(",", ":"))
+
+
+# structured outputs(strict)가 받지 않는 키
+_UNSUPPORTED_SCHEMA_KEYS = {"default", "title", "minimum", "maximum", "exclusiveMinimum", "exclusiveMaximum"}
+
+
+def _strict_schema(node: Any) -> Any:
+	"""pydantic JSON 스키마를 strict structured outputs 형식으로 (모든 필드 required, additionalProperties=false)"""
+	if isinstance(node, list):
+		return [_strict_schema(v) for v in node]
+	if not isinstance(node, dict):
+		return node
+	out: Dict[str, Any] = {}
+	for key, value in node.items():
+		if key in _UNSUPPORTED_SCHEMA_KEYS:
+			continue
+		if key in ("properties", "$defs"):
+			out[key] = {name: _strict_schema(v) for name, v in value.items()}
+		else:
+			out[key] = _strict_schema(value)
+	if out.get("type") == "object" and "properties" in out:
+		out["additionalProperties"] = False
+		out["required"] = list(out["properties"])
+	return out
+
+
+STORYBOARD_COMPACT_SCHEMA = compact_schema(Storyboard)
+STORYBOARD_STRICT_SCHEMA = _strict_schema(Storyboard.model_json_schema())
+
+
+def _response_format() -> Dict[str, Any]:
+	if STORYBOARD_SCHEMA_MODE == "json_schema":
+		return {"type": "json_schema", "json_schema": {"name": "storyboard", "strict": True, "schema": STORYBOARD_STRICT_SCHEMA}}
+	return {"type": "json_object"}
+
+
+def _build_messages(
+	story_text: str,
+	min_shots_per_scene: int,
+	*,
+	characters: Optional[List[str]] = None,
+	part: Optional[Tuple[int, int]] = None
+) -> Tuple[str, str]:
+	"""스토리보드 생성용 (system, user) 프롬프트. 고정 지시문은 짧게, 스토리는 맨 뒤에 둔다.
+	characters: 인물 이름 표기를 맞출 목록, part: (현재 조각 번호, 전체 조각 수) - 분할 생성 시에만 사용
+	"""
+	system_prompt = (
+		"영상 콘티 기획 어시스턴트. 스토리를 컷 단위로 나누고 컷마다 구도, 대사, 배경, 액션, 등장 인물을 뽑아 "
+		"JSON만 출력한다 (코드 펜스 금지)."
+	)
+	if STORYBOARD_SCHEMA_MODE != "json_schema":
+		system_prompt += f"\n형식: {STORYBOARD_COMPACT_SCHEMA}"
+
+	min_cuts = max(1, min_shots_per_scene)
+	rules = [
+		f"컷 {min_cuts}개 이상, cut_id는 1부터",
+		"composition: 카메라 구도/인물 배치, background: 분위기/사운드/환경, actions: 행동 목록, characters: 컷의 등장 인물",
+		"모든 컷에 나레이션 또는 인물 대사 포함 (dialogues는 한글, 나머지 필드는 영어)",
+	]
+	if part:
+		rules.append(f"전체 이야기 중 {part[0]}/{part[1]} 부분이므로 이 부분의 장면만 컷으로 나눌 것")
+	if characters:
+		rules.append(f"인물 이름 표기: {', '.join(characters)}")
+	user_prompt = "규칙:\n" + "\n".join(f"- {rule}" for rule in rules) + f"\n\n스토리:\n{story_text}"
+	return system_prompt, user_prompt
+
+
+def _build_request(
+	story_text: str,
+	min_shots_per_scene: int,
+	*,
+	model: str,
+	characters: Optional[List[str]] = None,
+	part: Optional[Tuple[int, int]] = None
+) -> Tuple[Dict[str, Any], int]:
+	"""chat.completions.create 인자와 입력 토큰 수"""
+	system_prompt, user_prompt = _build_messages(story_text, min_shots_per_scene, characters=characters, part=part)
+	messages = [
+		{"role": "system", "content": system_prompt},
+		{"role": "user", "content": user_prompt}
+	]
+	response_format = _response_format()
+	tokens = count_message_tokens(messages, model)
+	if response_format["type"] == "json_schema":
+		# 스키마도 입력 토큰으로 계산된다
+		tokens += count_tokens(json.dumps(STORYBOARD_STRICT_SCHEMA, separators=(",", ":")), model)
+	request = {
+		"model": model,
+		"messages": messages,
+		"temperature": 0.3,
+		"response_format": response_format
+	}
+	return request, tokens
+
+
+def _input_budget(model: str) -> int:
+	return input_budget(model, reserve_output=STORYBOARD_OUTPUT_RESERVE, limit=STORYBOARD_MAX_INPUT_TOKENS or None)
+
+
+def _truncate_request(
+	story_text: str,
+	min_shots_per_scene: int,
+	prompt_tokens: int,
+	*,
+	model: str,
+	characters: Optional[List[str]] = None,
+	part: Optional[Tuple[int, int]] = None
+) -> Tuple[Dict[str, Any], int]:
+	"""예산을 넘는 만큼 스토리 뒷부분을 잘라낸 요청 (나눌 수 없을 때의 마지막 수단)"""
+	LLM_PREFLIGHT.inc(action="truncate")
+	overhead = prompt_tokens - count_tokens(story_text, model)
+	story_text = truncate_to_tokens(story_text, _input_budget(model) - overhead, model)
+	return _build_request(story_text, min_shots_per_scene, model=model, characters=characters, part=part)
+
+
+def _chunk_plan(story_text: str, prompt_tokens: int, model: str) -> Tuple[int, int]:
+	"""예산을 넘는 스토리를 나눌 때의 (조각당 최대 글자 수, 조각 수)"""
+	story_tokens = max(1, count_tokens(story_text, model))
+	overhead = prompt_tokens - story_tokens
+	# 조각 요청에는 부분 번호/인물 목록 규칙이 더 붙으므로 여유를 둔다
+	per_chunk_tokens = max(200, int((_input_budget(model) - overhead) * 0.8))
+	max_chars = max(200, int(per_chunk_tokens * len(story_text) / story_tokens))
+	return max_chars, math.ceil(len(story_text) / max_chars) + 1
+
+
+def _record_usage(usage: Any, mode: str) -> None:
+	if usage is None:
+		return
+	LLM_TOKENS.inc(getattr(usage, "prompt_tokens", 0) or 0, mode=mode, kind="prompt")
+	LLM_TOKENS.inc(getattr(usage, "completion_tokens", 0) or 0, mode=mode, kind="completion")
+
+
+def _pad_cuts(cuts: List[StoryCut], min_cuts: int) -> List[StoryCut]:
+	"""컷이 min_cuts보다 적으면 마지막 컷을 복제해 채운다 (추가된 컷만 반환)"""
+	added: List[StoryCut] = []
+	existing_cuts = cuts.copy()
+	while len(cuts) < min_cuts:
+		# 마지막 컷을 기반으로 새 컷 생성
+		if existing_cuts:
+			last_cut = existing_cuts[-1]
+			new_cut = StoryCut(
+				cut_id=len(cuts) + 1,
+				cut_name=f"{last_cut.cut_name} (continued)",
+				composition=last_cut.composition,
+				dialogues=last_cut.dialogues.copy() if last_cut.dialogues else [],
+				background=last_cut.background,
+				actions=last_cut.actions.copy() if last_cut.actions else [],
+				characters=last_cut.characters.copy() if last_cut.characters else []
+			)
+		else:
+			# 컷이 아예 없으면 기본 컷 생성
+			new_cut = StoryCut(
+				cut_id=1,
+				cut_name="Scene",
+				composition="medium shot",
+				dialogues=[],
+				background="neutral background",
+				actions=[],
+				characters=[]
+			)
+		cuts.append(new_cut)
+		added.append(new_cut)
+	return added
+
+
 def generate_storyboard_from_story(
 	client: OpenAI,
 	story_text: str,
 	title: Optional[str] = None,
 	model: str = "gpt-4o-mini",
-	min_shots_per_scene: int = 1
+	min_shots_per_scene: int = 1,
+	use_cache: bool = True,
+	*,
+	characters: Optional[List[str]] = None,
+	part: Optional[Tuple[int, int]] = None,
+	schedule_key: Optional[str] = None,
+	auto_chunk: bool = True
 ) -> Storyboard:
-	"""스토리 텍스트를 GPT에 보내서 컷별 요소를 추출한 스토리보드 JSON을 생성"""
-	
-	schema = Storyboard.model_json_schema()
-	system_prompt = (
-		"당신은 영상 콘티 기획 어시스턴트입니다. "
-		"사용자가 제공한 스토리를 분석하여 장면을 컷 단위로 나누고, "
-		"각 컷마다 구도, 대사, 배경, 액션, 등장 인물을 추출하여 구조화된 JSON으로 출력하세요. "
-		"반드시 JSON만 출력하고, 코드 펜스는 사용하지 마세요."
-	)
-	
-	min_cuts = max(1, min_shots_per_scene)
-	user_prompt = (
-		f"스토리:\n{story_text}\n\n"
-		f"아래 JSON 스키마에 맞춰 스토리보드를 생성하세요:\n"
-		f"{json.dumps(schema, ensure_ascii=False, indent=2)}\n\n"
-		f"주의사항:\n"
-		f"- 스토리를 자연스럽게 여러 컷으로 나누세요.\n"
-		f"- 최소 {min_cuts}개 이상의 컷을 생성해야 합니다.\n"
-		f"- 각 컷은 고유한 cut_id를 가져야 합니다 (1부터 시작).\n"
-		f"- composition은 카메라 구도와 인물 배치를 설명하세요.\n"
-		f"- dialogues 배열에는 해당 컷의 모든 대사를 포함하세요.\n"
-		f"- background는 장면의 분위기, 사운드, 환경을 설명하세요.\n"
-		f"- actions는 인물의 행동/액션을 배열로 나열하세요.\n"
-		f"- characters는 해당 컷에 등장하는 인물 이름을 배열로 나열하세요.\n"
-		f"- dialogues은 한글로, 나머지 필드는 영어로 작성하세요.\n"
-		f"- 모든 컷에는 나레이션 대사 또는 인물의 대사가 포함되어야 합니다."
+	"""스토리 텍스트를 GPT에 보내서 컷별 요소를 추출한 스토리보드 JSON을 생성.
+	같은 (정규화된 스토리, 제목, 모델, 최소 컷 수) 요청은 캐시된 결과를 돌려준다. use_cache=False면 항상 새로 호출.
+	호출은 openai_scheduler를 거치므로 429/5xx는 백오프 후 재시도된다 (schedule_key: 공평 분배 단위).
+	보내기 전에 입력 토큰을 세어 예산을 넘으면 분할 생성으로 넘기고 (auto_chunk), 나눌 수 없으면 스토리 뒷부분을 자른다.
+	"""
+	hints: Dict[str, Any] = {}
+	if characters:
+		hints["characters"] = list(characters)
+	if part:
+		hints["part"] = list(part)
+	cache_key = make_storyboard_key(
+		story_text,
+		title=title,
+		model=model,
+		min_shots_per_scene=min_shots_per_scene,
+		version=STORYBOARD_PROMPT_VERSION,
+		**hints
 	)
-	
+	if use_cache:
+		cached = storyboard_cache.get(cache_key)
+		if cached is not None:
+			try:
+				return Storyboard.model_validate(cached)
+			except Exception:
+				pass
+
+	mode = "chunk" if part else "full"
+	kwargs, prompt_tokens = _build_request(story_text, min_shots_per_scene, model=model, characters=characters, part=part)
+	if prompt_tokens > _input_budget(model):
+		if auto_chunk and not part:
+			LLM_PREFLIGHT.inc(action="chunk")
+			max_chars, max_chunks = _chunk_plan(story_text, prompt_tokens, model)
+			return generate_storyboard_chunked(
+				client, story_text, title, model, min_shots_per_scene, use_cache,
+				max_chars=max_chars, max_chunks=max_chunks, schedule_key=schedule_key
+			)
+		kwargs, prompt_tokens = _truncate_request(story_text, min_shots_per_scene, prompt_tokens, model=model, characters=characters, part=part)
+	LLM_PROMPT_TOKENS.observe(prompt_tokens, mode=mode)
+
+	def request():
+		started = time.perf_counter()
+		try:
+			response = client.chat.completions.create(**kwargs)
+		except Exception:
+			LLM_ERRORS.inc(mode=mode)
+			raise
+		LLM_SECONDS.observe(time.perf_counter() - started, mode=mode)
+		return response
+
 	try:
-		response = client.chat.completions.create(
-			model=model,
-			messages=[
-				{"role": "system", "content": system_prompt},
-				{"role": "user", "content": user_prompt}
-			],
-			temperature=0.3,
-			response_format={"type": "json_object"}
-		)
+		response = openai_scheduler.run(request, key=schedule_key)
+		_record_usage(getattr(response, "usage", None), mode)
 		
 		content = response.choices[0].message.content or "{}"
-		print(content)
 		content = content.strip()
 		
 		# 코드 펜스 제거
@@ -90,36 +310,13 @@ def generate_storyboard_from_story(
 			storyboard.title = title or "Untitled"
 		
 		# 최소 컷 수 확인 및 보정
-		min_cuts = max(1, min_shots_per_scene)
-		if len(storyboard.cuts) < min_cuts:
-			# 컷이 부족하면 마지막 컷을 복제하거나 분할하여 추가
-			existing_cuts = storyboard.cuts.copy()
-			while len(storyboard.cuts) < min_cuts:
-				# 마지막 컷을 기반으로 새 컷 생성
-				if existing_cuts:
-					last_cut = existing_cuts[-1]
-					new_cut = StoryCut(
-						cut_id=len(storyboard.cuts) + 1,
-						cut_name=f"{last_cut.cut_name} (continued)",
-						composition=last_cut.composition,
-						dialogues=last_cut.dialogues.copy() if last_cut.dialogues else [],
-						background=last_cut.background,
-						actions=last_cut.actions.copy() if last_cut.actions else [],
-						characters=last_cut.characters.copy() if last_cut.characters else []
-					)
-					storyboard.cuts.append(new_cut)
-				else:
-					# 컷이 아예 없으면 기본 컷 생성
-					storyboard.cuts.append(StoryCut(
-						cut_id=1,
-						cut_name="Scene",
-						composition="medium shot",
-						dialogues=[],
-						background="neutral background",
-						actions=[],
-						characters=[]
-					))
+		_pad_cuts(storyboard.cuts, max(1, min_shots_per_scene))
 		
+		if storyboard.cuts:
+			try:
+				storyboard_cache.put(cache_key, storyboard.model_dump())
+			except OSError:
+				pass
 		return storyboard
 		
 	except json.JSONDecodeError as e:
@@ -128,3 +325,326 @@ def generate_storyboard_from_story(
 	except Exception as e:
 		raise Exception(f"스토리보드 생성 실패: {str(e)}")
 
+
+# 분할 생성: 조각 하나의 목표 길이(자)와 최대 조각 수
+STORYBOARD_CHUNK_CHARS = int(os.getenv("STORYBOARD_CHUNK_CHARS", "1200"))
+STORYBOARD_MAX_CHUNKS = int(os.getenv("STORYBOARD_MAX_CHUNKS", "8"))
+
+_SECTION_RE = re.compile(r"^\s*\d+\s*[.)]\s+\S", re.MULTILINE)
+
+
+def _split_paragraphs(text: str, max_chars: int) -> List[str]:
+	"""빈 줄 기준 문단을 max_chars 안쪽으로 묶는다"""
+	paragraphs = [p.strip() for p in re.split(r"\n\s*\n", text) if p.strip()]
+	chunks: List[str] = []
+	current = ""
+	for paragraph in paragraphs:
+		if current and len(current) + len(paragraph) + 2 > max_chars:
+			chunks.append(current)
+			current = paragraph
+		else:
+			current = f"{current}\n\n{paragraph}" if current else paragraph
+	if current:
+		chunks.append(current)
+	return chunks
+
+
+def split_story_into_chunks(story_text: str, *, max_chars: int = STORYBOARD_CHUNK_CHARS, max_chunks: int = STORYBOARD_MAX_CHUNKS) -> List[str]:
+	"""번호 붙은 섹션("2. ...")에서 먼저 나누고, 긴 섹션은 문단 단위로 다시 나눈다.
+	조각이 max_chunks보다 많으면 가장 짧은 이웃끼리 합친다.
+	"""
+	text = story_text.strip()
+	if not text:
+		return []
+	starts = [m.start() for m in _SECTION_RE.finditer(text)]
+	if not starts or starts[0] != 0:
+		starts.insert(0, 0)
+	sections = [text[a:b].strip() for a, b in zip(starts, starts[1:] + [len(text)])]
+
+	chunks: List[str] = []
+	for section in sections:
+		if not section:
+			continue
+		if len(section) > max_chars:
+			chunks.extend(_split_paragraphs(section, max_chars))
+		else:
+			chunks.append(section)
+
+	max_chunks = max(1, max_chunks)
+	while len(chunks) > max_chunks:
+		i = min(range(len(chunks) - 1), key=lambda k: len(chunks[k]) + len(chunks[k + 1]))
+		chunks[i:i + 2] = [f"{chunks[i]}\n\n{chunks[i + 1]}"]
+	return chunks
+
+
+def _allocate_shots(chunks: List[str], total: int) -> List[int]:
+	"""전체 최소 컷 수를 조각 길이에 비례해 나눈다 (조각마다 최소 1컷, 최대 나머지 방식)"""
+	total = max(total, len(chunks))
+	lengths = [max(1, len(c)) for c in chunks]
+	whole = sum(lengths)
+	spare = total - len(chunks)
+	shares = [spare * n / whole for n in lengths]
+	counts = [1 + int(share) for share in shares]
+	remainder = total - sum(counts)
+	for i in sorted(range(len(chunks)), key=lambda k: shares[k] - int(shares[k]), reverse=True)[:remainder]:
+		counts[i] += 1
+	return counts
+
+
+def _name_key(name: str) -> str:
+	return re.sub(r"[\W_]+", "", name).casefold()
+
+
+def _canonicalize_characters(cuts: List[StoryCut], known: List[str]) -> None:
+	"""조각마다 달라진 인물 표기("Lee Sin"/"Lee-sin")를 하나로 맞춘다.
+	known(원문에서 뽑은 이름)에 있으면 그 표기, 아니면 가장 많이 쓰인 표기를 쓴다.
+	"""
+	counts: Dict[str, Dict[str, int]] = {}
+	for cut in cuts:
+		for name in cut.characters + [d.speaker for d in cut.dialogues]:
+			key = _name_key(name)
+			if key:
+				spellings = counts.setdefault(key, {})
+				spellings[name] = spellings.get(name, 0) + 1
+	canonical = {key: max(spellings, key=spellings.get) for key, spellings in counts.items()}
+	for name in known:
+		if _name_key(name) in canonical:
+			canonical[_name_key(name)] = name
+
+	for cut in cuts:
+		names: List[str] = []
+		for name in cut.characters:
+			fixed = canonical.get(_name_key(name), name)
+			if fixed not in names:
+				names.append(fixed)
+		cut.characters = names
+		for dialogue in cut.dialogues:
+			dialogue.speaker = canonical.get(_name_key(dialogue.speaker), dialogue.speaker)
+
+
+def generate_storyboard_chunked(
+	client: OpenAI,
+	story_text: str,
+	title: Optional[str] = None,
+	model: str = "gpt-4o-mini",
+	min_shots_per_scene: int = 1,
+	use_cache: bool = True,
+	*,
+	max_chars: int = STORYBOARD_CHUNK_CHARS,
+	max_chunks: Optional[int] = None,
+	max_workers: Optional[int] = None,
+	schedule_key: Optional[str] = None
+) -> Storyboard:
+	"""긴 스토리를 장면 조각으로 나눠 조각별 요청을 동시에 보내고 결과를 이어 붙인다.
+	지연 시간은 전체 스토리 길이가 아니라 가장 긴 조각에 비례한다. 조각이 하나면 기존 단일 호출과 같다.
+	조각 결과는 각각 캐시되므로 한 섹션만 고치면 그 조각만 다시 생성된다.
+	조각 수는 max_chars로 정해지고 max_chunks(기본 STORYBOARD_MAX_CHUNKS)를 넘지 않는다. 최소 컷 수가 조각 수보다 적으면 조각마다 한 컷 이상이 된다.
+	"""
+	min_cuts = max(1, min_shots_per_scene)
+	chunks = split_story_into_chunks(story_text, max_chars=max_chars, max_chunks=STORYBOARD_MAX_CHUNKS if max_chunks is None else max_chunks)
+	if len(chunks) <= 1:
+		# 더 나눌 수 없으면 단일 호출 (예산을 넘으면 그쪽에서 자른다)
+		return generate_storyboard_from_story(client, story_text, title, model, min_shots_per_scene, use_cache, schedule_key=schedule_key, auto_chunk=False)
+
+	known = extract_characters(story_text)
+	shots = _allocate_shots(chunks, min_cuts)
+	total = len(chunks)
+
+	def run(i: int) -> Storyboard:
+		return generate_storyboard_from_story(
+			client,
+			chunks[i],
+			title,
+			model,
+			shots[i],
+			use_cache,
+			characters=known or None,
+			part=(i + 1, total),
+			schedule_key=schedule_key
+		)
+
+	with ThreadPoolExecutor(max_workers=max_workers or total, thread_name_prefix="storyboard") as executor:
+		parts = list(executor.map(run, range(total)))
+
+	cuts: List[StoryCut] = []
+	for part in parts:
+		cuts.extend(part.cuts)
+	for i, cut in enumerate(cuts):
+		cut.cut_id = i + 1
+	_canonicalize_characters(cuts, known)
+	_pad_cuts(cuts, min_cuts)
+
+	final_title = title or next((p.title for p in parts if p.title and p.title != "Untitled"), None) or "Untitled"
+	return Storyboard(title=final_title, cuts=cuts)
+
+
+class CutStreamParser:
+	"""스트리밍으로 들어오는 스토리보드 JSON에서 "cuts" 배열의 원소를 닫히는 즉시 꺼내는 파서.
+	전체 JSON이 끝나기 전에도 완성된 컷 객체({...})는 바로 json.loads 할 수 있다는 점을 이용한다.
+	"""
+
+	_TITLE_RE = re.compile(r'"title"\s*:\s*("(?:[^"\\]|\\.)*")')
+	_CUTS_RE = re.compile(r'"cuts"\s*:\s*\[')
+
+	def __init__(self):
+		self.buffer = ""
+		self.title: Optional[str] = None
+		self._cuts_start = -1
+		self._pos = -1  # cuts 배열 안에서 다음에 볼 위치 (-1이면 아직 배열 시작 전)
+		self._depth = 0
+		self._in_string = False
+		self._escape = False
+		self._obj_start = -1
+		self._done = False
+
+	def feed(self, text: str) -> List[Dict[str, Any]]:
+		"""텍스트 조각을 추가하고 새로 완성된 컷 dict 목록을 반환"""
+		self.buffer += text
+		if self.title is None:
+			match = self._TITLE_RE.search(self.buffer)
+			# cuts 배열 안(대사 등)에 있는 "title"은 무시
+			if match and (self._cuts_start < 0 or match.start() < self._cuts_start or (self._done and match.start() >= self._pos)):
+				self.title = json.loads(match.group(1))
+		if self._done:
+			return []
+		if self._pos < 0:
+			match = self._CUTS_RE.search(self.buffer)
+			if not match:
+				return []
+			self._cuts_start = match.start()
+			self._pos = match.end()
+
+		cuts: List[Dict[str, Any]] = []
+		buf = self.buffer
+		i = self._pos
+		while i < len(buf):
+			ch = buf[i]
+			if self._in_string:
+				if self._escape:
+					self._escape = False
+				elif ch == "\\":
+					self._escape = True
+				elif ch == '"':
+					self._in_string = False
+			elif ch == '"':
+				self._in_string = True
+			elif ch in "{[":
+				if self._depth == 0 and ch == "{":
+					self._obj_start = i
+				self._depth += 1
+			elif ch in "}]":
+				if self._depth == 0:
+					# cuts 배열 종료
+					self._done = True
+					i += 1
+					break
+				self._depth -= 1
+				if self._depth == 0 and self._obj_start >= 0:
+					try:
+						cuts.append(json.loads(buf[self._obj_start:i + 1]))
+					except json.JSONDecodeError:
+						pass
+					self._obj_start = -1
+			i += 1
+		self._pos = i
+		return cuts
+
+
+def stream_storyboard_cuts(
+	client: OpenAI,
+	story_text: str,
+	title: Optional[str] = None,
+	model: str = "gpt-4o-mini",
+	min_shots_per_scene: int = 1,
+	use_cache: bool = True,
+	on_title: Optional[Callable[[str], None]] = None,
+	schedule_key: Optional[str] = None
+) -> Iterator[StoryCut]:
+	"""generate_storyboard_from_story의 스트리밍 버전.
+	응답을 stream=True로 받으면서 컷이 하나 완성될 때마다 StoryCut을 yield 한다 (cut_id는 도착 순서대로 다시 매김).
+	캐시 적중 시에는 캐시된 컷을 바로 내보내고, 스트림이 끝나면 전체 결과를 캐시에 저장한다.
+	입력이 토큰 예산을 넘으면 스트리밍 대신 분할 생성 결과를 내보낸다.
+	"""
+	cache_key = make_storyboard_key(
+		story_text,
+		title=title,
+		model=model,
+		min_shots_per_scene=min_shots_per_scene,
+		version=STORYBOARD_PROMPT_VERSION
+	)
+	if use_cache:
+		cached = storyboard_cache.get(cache_key)
+		if cached is not None:
+			try:
+				storyboard = Storyboard.model_validate(cached)
+			except Exception:
+				storyboard = None
+			if storyboard is not None:
+				if on_title:
+					on_title(storyboard.title)
+				yield from storyboard.cuts
+				return
+
+	kwargs, prompt_tokens = _build_request(story_text, min_shots_per_scene, model=model)
+	if prompt_tokens > _input_budget(model):
+		LLM_PREFLIGHT.inc(action="chunk")
+		max_chars, max_chunks = _chunk_plan(story_text, prompt_tokens, model)
+		storyboard = generate_storyboard_chunked(
+			client, story_text, title, model, min_shots_per_scene, use_cache,
+			max_chars=max_chars, max_chunks=max_chunks, schedule_key=schedule_key
+		)
+		if on_title:
+			on_title(storyboard.title)
+		yield from storyboard.cuts
+		return
+	LLM_PROMPT_TOKENS.observe(prompt_tokens, mode="stream")
+	started = time.perf_counter()
+
+	def request():
+		try:
+			# 마지막 청크(choices 없음)에 토큰 사용량이 실려 온다
+			return client.chat.completions.create(**kwargs, stream=True, stream_options={"include_usage": True})
+		except Exception:
+			LLM_ERRORS.inc(mode="stream")
+			raise
+
+	parser = CutStreamParser()
+	cuts: List[StoryCut] = []
+	title_sent = False
+	with ExitStack() as stack:
+		try:
+			# 재시도는 요청을 여는 시점에만 (429는 본문을 받기 전에 온다). 본문을 다 읽을 때까지 자리를 쥐고 있는다
+			stream = stack.enter_context(openai_scheduler.held(request, key=schedule_key))
+		except Exception as e:
+			raise Exception(f"스토리보드 생성 실패: {str(e)}")
+		for chunk in stream:
+			if not chunk.choices:
+				_record_usage(getattr(chunk, "usage", None), "stream")
+				continue
+			delta = chunk.choices[0].delta.content or ""
+			if not delta:
+				continue
+			for raw in parser.feed(delta):
+				try:
+					cut = StoryCut.model_validate({**raw, "cut_id": len(cuts) + 1})
+				except Exception:
+					continue
+				if not title_sent and on_title:
+					on_title(parser.title or title or "Untitled")
+				title_sent = True
+				cuts.append(cut)
+				yield cut
+
+	LLM_SECONDS.observe(time.perf_counter() - started, mode="stream")
+	final_title = parser.title or title or "Untitled"
+	if not title_sent and on_title:
+		on_title(final_title)
+	if not cuts:
+		# 빈 응답은 캐시하지 않고 기존 동작처럼 빈 스토리보드로 취급
+		return
+	yield from _pad_cuts(cuts, max(1, min_shots_per_scene))
+
+	try:
+		storyboard_cache.put(cache_key, Storyboard(title=final_title, cuts=cuts).model_dump())
+	except OSError:
+		pass
@@ -0,0 +1,102 @@
+from typing import Any, Dict, List, Optional
+import os
+import math
+import threading
+
+
+# 모델별 컨텍스트 길이 (입력+출력 토큰). 목록에 없는 모델은 DEFAULT_CONTEXT_TOKENS
+CONTEXT_WINDOWS = {
+	"gpt-4o-mini": 128000,
+	"gpt-4o": 128000,
+	"gpt-4-turbo": 128000,
+	"gpt-4": 8192,
+	"gpt-3.5-turbo": 16385,
+}
+DEFAULT_CONTEXT_TOKENS = int(os.getenv("LLM_DEFAULT_CONTEXT_TOKENS", "16385"))
+# chat 포맷이 메시지마다 덧붙이는 토큰 (role/구분자)과 응답 시작 토큰
+TOKENS_PER_MESSAGE = 3
+TOKENS_PER_REPLY = 3
+
+_encodings: Dict[str, Any] = {}
+_encodings_lock = threading.Lock()
+
+
+def _encoding(model: str):
+	"""tiktoken 인코딩 (없거나 인코딩 파일을 받을 수 없으면 None → 글자 수 기반 추정)"""
+	with _encodings_lock:
+		if model in _encodings:
+			return _encodings[model]
+		encoding = None
+		try:
+			# tiktoken은 처음 쓸 때 BPE 파일을 읽으므로 실제로 토큰을 셀 때만 import
+			import tiktoken
+			try:
+				encoding = tiktoken.encoding_for_model(model)
+			except KeyError:
+				encoding = tiktoken.get_encoding("o200k_base")
+		except Exception:
+			encoding = None
+		_encodings[model] = encoding
+		return encoding
+
+
+def _estimate_tokens(text: str) -> int:
+	"""tiktoken이 없을 때의 보수적 추정: ASCII는 4자당 1토큰, 그 외(한글 등)는 글자당 1토큰"""
+	ascii_chars = sum(1 for ch in text if ord(ch) < 128)
+	return (len(text) - ascii_chars) + math.ceil(ascii_chars / 4)
+
+
+def count_tokens(text: str, model: str) -> int:
+	encoding = _encoding(model)
+	if encoding is None:
+		return _estimate_tokens(text)
+	return len(encoding.encode(text, disallowed_special=()))
+
+
+def count_message_tokens(messages: List[Dict[str, str]], model: str) -> int:
+	"""chat.completions 요청 messages의 입력 토큰 수"""
+	total = TOKENS_PER_REPLY
+	for message in messages:
+		total += TOKENS_PER_MESSAGE
+		for value in message.values():
+			total += count_tokens(value, model)
+	return total
+
+
+def truncate_to_tokens(text: str, max_tokens: int, model: str) -> str:
+	"""앞에서부터 max_tokens 안에 들어가는 만큼만 남긴다"""
+	if max_tokens <= 0:
+		return ""
+	encoding = _encoding(model)
+	if encoding is not None:
+		tokens = encoding.encode(text, disallowed_special=())
+		return text if len(tokens) <= max_tokens else encoding.decode(tokens[:max_tokens])
+	# 추정치 기준으로 잘라가며 맞춘다
+	if _estimate_tokens(text) <= max_tokens:
+		return text
+	low, high = 0, len(text)
+	while low < high:
+		mid = (low + high + 1) // 2
+		if _estimate_tokens(text[:mid]) <= max_tokens:
+			low = mid
+		else:
+			high = mid - 1
+	return text[:low]
+
+
+def context_window(model: str) -> int:
+	if model in CONTEXT_WINDOWS:
+		return CONTEXT_WINDOWS[model]
+	# 날짜가 붙은 스냅샷 이름 (gpt-4o-mini-2024-07-18 등)
+	for name in sorted(CONTEXT_WINDOWS, key=len, reverse=True):
+		if model.startswith(name):
+			return CONTEXT_WINDOWS[name]
+	return DEFAULT_CONTEXT_TOKENS
+
+
+def input_budget(model: str, *, reserve_output: int, limit: Optional[int] = None) -> int:
+	"""응답용 토큰을 남기고 보낼 수 있는 입력 토큰 수. limit이 있으면 그보다 크지 않게"""
+	budget = context_window(model) - reserve_output
+	if limit:
+		budget = min(budget, limit)
+	return max(1, budget)
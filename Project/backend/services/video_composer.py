@@ -1,14 +1,358 @@
-from typing import List, Optional
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 import os
+import json
+import shutil
+import hashlib
 import subprocess
+import tempfile
+import threading
+import multiprocessing
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
 
+from PIL import Image, ImageOps
 
-def compose_video(image_paths: List[str], *, fps: int = 24, audio_path: Optional[str] = None, output_path: str = "../data/outputs/final.mp4") -> str:
-	"""FFmpeg으로 이미지들을 영상으로 합치는 간단한 예시.
-	- 실제로는 리스트파일 작성 후 -r/-i 파턴 등을 사용 권장.
-	- 여기선 placeholder로 파일 존재만 확인하여 출력 경로 문자열 반환.
+from backend.services.blob_store import file_sha256
+from backend.services.caption_renderer import find_font, render_caption_frames, CAPTION_STYLE_VERSION
+
+
+# fal.ai image_size 프리셋과 같은 해상도로 인코딩 (업스케일 없이 원본 비율 유지)
+VIDEO_SIZE_PRESETS = {
+	"portrait_16_9": (576, 1024),
+	"landscape_16_9": (1024, 576),
+	"portrait_4_3": (768, 1024),
+	"landscape_4_3": (1024, 768),
+	"square_hd": (1024, 1024),
+	"square": (512, 512),
+}
+DEFAULT_SHOT_DURATION = 2.5
+
+# 컷별 세그먼트 캐시. 이미지 하나만 바뀌면 그 컷의 세그먼트만 다시 인코딩한다
+DEFAULT_SEGMENT_DIR = os.getenv("VIDEO_SEGMENT_CACHE_DIR") or os.path.normpath(
+	os.path.join(os.path.dirname(__file__), "../../data/cache/segments")
+)
+DEFAULT_SEGMENT_MAX_BYTES = int(os.getenv("VIDEO_SEGMENT_CACHE_MB", "2048")) * 1024 * 1024
+# 세그먼트를 동시에 인코딩할 프로세스 수 (0이면 CPU 코어 수)
+VIDEO_ENCODE_WORKERS = int(os.getenv("VIDEO_ENCODE_WORKERS", "0")) or (os.cpu_count() or 1)
+# 세그먼트 인코딩 방식(명령 인자)을 바꾸면 올려서 기존 세그먼트를 무효화
+SEGMENT_FORMAT_VERSION = 1
+
+
+def _resolve_ffmpeg() -> str:
+	"""FFMPEG_BINARY → PATH → imageio-ffmpeg 번들 순으로 ffmpeg 실행 파일을 찾는다"""
+	candidate = os.getenv("FFMPEG_BINARY") or shutil.which("ffmpeg")
+	if candidate:
+		return candidate
+	try:
+		import imageio_ffmpeg
+		return imageio_ffmpeg.get_ffmpeg_exe()
+	except Exception:
+		raise RuntimeError("ffmpeg 실행 파일을 찾을 수 없습니다 (FFMPEG_BINARY 환경변수 또는 imageio-ffmpeg 설치 필요)")
+
+
+def _parse_video_size(size: str) -> Tuple[int, int]:
+	"""'portrait_16_9' 같은 프리셋 또는 '720x1280' → (w, h). libx264 yuv420p용으로 짝수 보정"""
+	if size in VIDEO_SIZE_PRESETS:
+		w, h = VIDEO_SIZE_PRESETS[size]
+	else:
+		try:
+			w, h = (int(v) for v in size.lower().split("x"))
+		except Exception:
+			w, h = VIDEO_SIZE_PRESETS["portrait_16_9"]
+	return w - (w % 2), h - (h % 2)
+
+
+def _load_frame(image_path: str, size: Tuple[int, int]) -> bytes:
+	"""이미지를 출력 해상도로 꽉 차게 잘라 rgb24 raw 바이트로 변환"""
+	with Image.open(image_path) as img:
+		img = ImageOps.exif_transpose(img).convert("RGB")
+		if img.size != size:
+			img = ImageOps.fit(img, size, Image.LANCZOS)
+		return img.tobytes()
+
+
+def _resolve_durations(count: int, durations: Optional[List[float]], default: float) -> List[float]:
+	values = list(durations or [])
+	if len(values) < count:
+		values.extend([default] * (count - len(values)))
+	return [max(float(d), 0.0) for d in values[:count]]
+
+
+def _run_ffmpeg(cmd: List[str], frames: Optional[Iterable[bytes]] = None) -> None:
+	"""ffmpeg 실행. frames가 있으면 stdin(rawvideo)으로 흘려 보낸다"""
+	# stderr를 PIPE로 두면 버퍼가 찼을 때 교착되므로 임시 파일로 받는다
+	with tempfile.TemporaryFile() as err:
+		proc = subprocess.Popen(
+			cmd,
+			stdin=subprocess.PIPE if frames is not None else subprocess.DEVNULL,
+			stdout=subprocess.DEVNULL,
+			stderr=err
+		)
+		try:
+			if frames is not None:
+				for frame in frames:
+					proc.stdin.write(frame)
+				proc.stdin.close()
+		except BrokenPipeError:
+			pass
+		except BaseException:
+			proc.kill()
+			proc.wait()
+			raise
+		returncode = proc.wait()
+		if returncode != 0:
+			err.seek(0)
+			detail = err.read().decode("utf-8", "replace").strip()
+			raise RuntimeError(f"ffmpeg 인코딩 실패 (code {returncode}): {detail[-2000:]}")
+
+
+def _segment_frames(duration: float, fps: int) -> int:
+	return max(1, round(duration * fps))
+
+
+def _fade_frames(fade: float, fps: int, frames: int) -> int:
+	"""컷 앞뒤 페이드 프레임 수 (컷 길이의 절반을 넘지 않게)"""
+	return min(frames // 2, max(0, round(fade * fps)))
+
+
+def _build_segment_cmd(
+	ffmpeg: str,
+	size: Tuple[int, int],
+	fps: int,
+	frames: int,
+	fade_frames: int,
+	output_path: str,
+	*,
+	crf: int,
+	preset: str,
+	threads: int
+) -> List[str]:
+	"""컷 하나를 인코딩하는 명령. 모든 세그먼트가 같은 코덱/해상도/fps/pix_fmt이어야 concat에서 재인코딩 없이 이어진다"""
+	w, h = size
+	cmd = [
+		ffmpeg, "-y", "-hide_banner", "-loglevel", "error",
+		"-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{w}x{h}", "-r", str(fps), "-i", "-",
+	]
+	if fade_frames:
+		cmd += ["-vf", f"fade=t=in:s=0:n={fade_frames},fade=t=out:s={frames - fade_frames}:n={fade_frames}"]
+	cmd += [
+		"-an", "-c:v", "libx264", "-preset", preset, "-crf", str(crf), "-threads", str(threads),
+		"-pix_fmt", "yuv420p", "-r", str(fps), "-f", "mp4",
+		output_path,
+	]
+	return cmd
+
+
+def _build_concat_cmd(ffmpeg: str, list_path: str, audio_path: Optional[str], output_path: str) -> List[str]:
+	cmd = [ffmpeg, "-y", "-hide_banner", "-loglevel", "error", "-f", "concat", "-safe", "0", "-i", list_path]
+	if audio_path:
+		cmd += ["-i", audio_path, "-map", "0:v:0", "-map", "1:a:0", "-c:a", "aac", "-b:a", "192k", "-shortest"]
+	cmd += ["-c:v", "copy", "-movflags", "+faststart", "-f", "mp4", output_path]
+	return cmd
+
+
+def _encode_segment(
+	image_path: str,
+	segment_path: str,
+	size: Tuple[int, int],
+	fps: int,
+	frames: int,
+	fade_frames: int,
+	crf: int,
+	preset: str,
+	captions: Tuple[str, ...],
+	font_path: Optional[str],
+	threads: int
+) -> str:
+	"""이미지 한 장을 frames 프레임짜리 세그먼트로 인코딩 (프로세스 풀에서 실행되므로 모듈 최상위 함수).
+	captions가 있으면 자막 구간마다 한 번 합성한 프레임을 반복해서 보낸다.
+	임시 파일에 쓴 뒤 rename 하므로 같은 세그먼트를 동시에 만들어도 읽는 쪽은 완성된 파일만 본다.
+	"""
+	chunks = render_caption_frames(_load_frame(image_path, size), size, captions, frames, font_path)
+	tmp_path = f"{segment_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+	cmd = _build_segment_cmd(_resolve_ffmpeg(), size, fps, frames, fade_frames, tmp_path, crf=crf, preset=preset, threads=threads)
+	try:
+		_run_ffmpeg(cmd, (frame for frame, count in chunks for _ in range(count)))
+		os.replace(tmp_path, segment_path)
+	except BaseException:
+		try:
+			os.remove(tmp_path)
+		except FileNotFoundError:
+			pass
+		raise
+	return segment_path
+
+
+class SegmentCache:
+	"""컷 세그먼트(mp4)를 (이미지 내용, 프레임 수, 페이드, 자막, 인코더 설정) 해시로 저장하는 디스크 캐시.
+	용량(max_bytes)을 넘으면 오래 안 쓴 것부터 제거한다.
+	"""
+
+	def __init__(self, root: str = DEFAULT_SEGMENT_DIR, *, max_bytes: int = DEFAULT_SEGMENT_MAX_BYTES):
+		self.root = root
+		self.max_bytes = max_bytes
+		self._lock = threading.Lock()
+		self.hits = 0
+		self.misses = 0
+
+	@staticmethod
+	def make_key(image_sha256: str, **params: Any) -> str:
+		payload = json.dumps({"image": image_sha256, "version": SEGMENT_FORMAT_VERSION, **params}, sort_keys=True, separators=(",", ":"))
+		return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+	def path_for(self, key: str) -> str:
+		return os.path.join(self.root, key[:2], f"{key}.mp4")
+
+	def lookup(self, key: str) -> Optional[str]:
+		"""캐시된 세그먼트 경로 (없으면 None). 적중하면 mtime을 갱신해 제거 순서를 늦춘다"""
+		path = self.path_for(key)
+		try:
+			os.utime(path, None)
+		except FileNotFoundError:
+			with self._lock:
+				self.misses += 1
+			return None
+		with self._lock:
+			self.hits += 1
+		return path
+
+	def evict(self) -> int:
+		"""용량 초과분을 오래된 순으로 제거. 제거 개수 반환"""
+		entries = []
+		total = 0
+		for path in Path(self.root).glob("*/*.mp4"):
+			try:
+				st = path.stat()
+			except FileNotFoundError:
+				continue
+			entries.append((st.st_mtime, st.st_size, path))
+			total += st.st_size
+		removed = 0
+		if total > self.max_bytes:
+			for _, size, path in sorted(entries):
+				path.unlink(missing_ok=True)
+				removed += 1
+				total -= size
+				if total <= self.max_bytes:
+					break
+		return removed
+
+	def stats(self) -> Dict[str, Any]:
+		count = 0
+		total = 0
+		for path in Path(self.root).glob("*/*.mp4"):
+			try:
+				total += path.stat().st_size
+				count += 1
+			except FileNotFoundError:
+				continue
+		with self._lock:
+			lookups = self.hits + self.misses
+			return {
+				"hits": self.hits,
+				"misses": self.misses,
+				"hit_rate": (self.hits / lookups) if lookups else 0.0,
+				"segments": count,
+				"bytes": total,
+				"max_bytes": self.max_bytes,
+			}
+
+
+segment_cache = SegmentCache()
+
+
+def compose_video(
+	image_paths: List[str],
+	*,
+	fps: int = 24,
+	audio_path: Optional[str] = None,
+	output_path: str = "../data/outputs/final.mp4",
+	durations: Optional[List[float]] = None,
+	default_duration: float = DEFAULT_SHOT_DURATION,
+	size: str = "portrait_16_9",
+	crf: int = 20,
+	preset: str = "veryfast",
+	fade: float = 0.0,
+	captions: Optional[List[List[str]]] = None,
+	max_workers: Optional[int] = None,
+	use_cache: bool = True
+) -> str:
+	"""FFmpeg으로 이미지들을 영상으로 합친다.
+	- 컷마다 같은 인코더 설정으로 독립된 세그먼트를 만들고, concat demuxer로 재인코딩 없이(-c copy) 이어 붙인다.
+	- 세그먼트는 (이미지 내용, 길이, 페이드, 자막, 인코더 설정) 해시로 캐시되므로 컷 하나만 바뀌면 그 세그먼트만 다시 인코딩한다.
+	- 캐시에 없는 세그먼트는 프로세스 풀에서 동시에 인코딩한다 (max_workers, 기본 VIDEO_ENCODE_WORKERS).
+	- durations[i]초 동안 i번째 이미지를 보여주고, fade초만큼 컷 앞뒤를 검은 화면에서/으로 전환한다.
+	- captions[i]의 문장들은 i번째 컷 길이를 글자 수 비율로 나눠 화면 하단에 차례로 넣는다 (caption_renderer).
+	- audio_path가 있으면 마지막 이어 붙이기 단계에서 mux한다.
 	"""
-	os.makedirs(os.path.dirname(output_path), exist_ok=True)
-	# TODO: 실제 ffmpeg 명령 구성 (예: 이미지 시퀀스 사용)
-	# 여기서는 연동 전 단계이므로 파일 경로만 반환
+	if not image_paths:
+		raise ValueError("이미지 경로가 비어 있습니다")
+	missing = [p for p in image_paths if not os.path.isfile(p)]
+	if missing:
+		raise FileNotFoundError(f"이미지를 찾을 수 없습니다: {missing[0]}")
+	if audio_path and not os.path.isfile(audio_path):
+		raise FileNotFoundError(f"오디오 파일을 찾을 수 없습니다: {audio_path}")
+
+	os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+	ffmpeg = _resolve_ffmpeg()
+	frame_size = _parse_video_size(size)
+	shot_durations = _resolve_durations(len(image_paths), durations, default_duration)
+	shot_captions = [tuple(c for c in (captions[i] if captions and i < len(captions) else []) if c) for i in range(len(image_paths))]
+	font_path = find_font() if any(shot_captions) else None
+
+	# 컷별 세그먼트 경로와 아직 없는 세그먼트의 인코딩 인자
+	segments: List[str] = []
+	to_encode: Dict[str, Tuple[Any, ...]] = {}
+	scratch = tempfile.mkdtemp(prefix="segments-", dir=os.path.dirname(output_path) or ".") if not use_cache else None
+	try:
+		for i, (image_path, duration, shot_caption) in enumerate(zip(image_paths, shot_durations, shot_captions)):
+			frames = _segment_frames(duration, fps)
+			fade_frames = _fade_frames(fade, fps, frames)
+			if use_cache:
+				params: Dict[str, Any] = dict(size=list(frame_size), fps=fps, frames=frames, fade_frames=fade_frames, crf=crf, preset=preset)
+				if shot_caption:
+					params.update(captions=list(shot_caption), font=font_path, caption_style=CAPTION_STYLE_VERSION)
+				key = SegmentCache.make_key(file_sha256(image_path), **params)
+				segment_path = segment_cache.lookup(key)
+				if segment_path is None:
+					segment_path = segment_cache.path_for(key)
+					os.makedirs(os.path.dirname(segment_path), exist_ok=True)
+			else:
+				segment_path = os.path.join(scratch, f"segment_{i:04d}.mp4")
+			if not os.path.isfile(segment_path) and segment_path not in to_encode:
+				to_encode[segment_path] = (image_path, segment_path, frame_size, fps, frames, fade_frames, crf, preset, shot_caption, font_path)
+			segments.append(segment_path)
+
+		workers = max(1, min(len(to_encode), max_workers or VIDEO_ENCODE_WORKERS))
+		# 코어를 세그먼트 프로세스끼리 나눠 쓴다
+		threads = max(1, (os.cpu_count() or 1) // workers)
+		if len(to_encode) == 1:
+			_encode_segment(*next(iter(to_encode.values())), threads)
+		elif to_encode:
+			# API 서버는 스레드가 많으므로 fork 대신 spawn (작업 큐 워커와 같은 방식)
+			with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+				for future in [executor.submit(_encode_segment, *args, threads) for args in to_encode.values()]:
+					future.result()
+
+		list_fd, list_path = tempfile.mkstemp(prefix=".concat-", suffix=".txt", dir=os.path.dirname(output_path) or ".")
+		root, ext = os.path.splitext(output_path)
+		tmp_output = f"{root}.{os.getpid()}.tmp{ext or '.mp4'}"
+		try:
+			with os.fdopen(list_fd, "w", encoding="utf-8") as f:
+				for segment_path in segments:
+					escaped = os.path.abspath(segment_path).replace("'", "'\\''")
+					f.write(f"file '{escaped}'\n")
+			_run_ffmpeg(_build_concat_cmd(ffmpeg, list_path, audio_path, tmp_output))
+			os.replace(tmp_output, output_path)
+		finally:
+			for path in (list_path, tmp_output):
+				try:
+					os.remove(path)
+				except FileNotFoundError:
+					pass
+	finally:
+		if scratch:
+			shutil.rmtree(scratch, ignore_errors=True)
+	if use_cache and to_encode:
+		segment_cache.evict()
 	return output_path
@@ -0,0 +1,23 @@
+"""프로젝트 이미지 저장소(blob) 정리를 서버 밖에서 실행하는 진입점 (cron 등).
+
+	python -m backend.storage_gc --dry-run
+	python -m backend.storage_gc --grace-hours 6
+"""
+import argparse
+import json
+
+from backend.main import collect_storage_garbage
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description="참조되지 않는 프로젝트 이미지/blob 정리")
+	parser.add_argument("--dry-run", action="store_true", help="지우지 않고 대상만 센다")
+	parser.add_argument("--grace-hours", type=float, default=None, help="이보다 최근 파일은 남긴다 (기본: BLOB_GC_GRACE_HOURS)")
+	args = parser.parse_args()
+
+	result = collect_storage_garbage(dry_run=args.dry_run, grace_hours=args.grace_hours)
+	print(json.dumps(result, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,31 @@
+"""API 서버와 분리해서 작업 워커만 실행하는 진입점.
+
+	JOB_WORKERS=0 uvicorn backend.main:app --workers 4   # API만
+	python -m backend.worker --workers 4                  # 워커만
+"""
+import argparse
+import signal
+
+from backend.main import JOB_DB_PATH, JOB_HANDLERS, JOB_HOOKS
+from backend.services.job_queue import WorkerPool
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description="SQLite 작업 큐 워커 풀")
+	parser.add_argument("--workers", type=int, default=2)
+	parser.add_argument("--db", default=JOB_DB_PATH)
+	args = parser.parse_args()
+
+	pool = WorkerPool(JOB_HANDLERS, size=args.workers, db_path=args.db, hooks=JOB_HOOKS).start()
+	print(f"워커 {args.workers}개 실행 중 (db: {args.db})")
+	signal.signal(signal.SIGTERM, lambda *_: pool.request_stop())
+	try:
+		pool.wait()
+	except KeyboardInterrupt:
+		pass
+	finally:
+		pool.stop()
+
+
+if __name__ == "__main__":
+	main()
@@ -12,13 +12,23 @@ export default function App() {
 
   const refreshHome = async () => {
     try {
-      const res = await fetch(`${API_BASE}/api/home`)
+      const res = await fetch(`${API_BASE}/api/home?page=1`)
       if (!res.ok) throw new Error('홈 데이터 로드 실패')
       const data = await res.json()
       setHome(data)
     } catch {}
   }
 
+  const loadMoreProjects = async () => {
+    const nextPage = (home.page?.page || 1) + 1
+    try {
+      const res = await fetch(`${API_BASE}/api/home?page=${nextPage}`)
+      if (!res.ok) throw new Error('홈 데이터 로드 실패')
+      const data = await res.json()
+      setHome(prev => ({...data, lists: {...data.lists, projects: [...(prev.lists.projects || []), ...(data.lists.projects || [])]}}))
+    } catch {}
+  }
+
   useEffect(() => { refreshHome() }, [])
 
   const startProject = async () => {
@@ -81,6 +91,7 @@ export default function App() {
               </div>
             )) : null}
           </div>
+          {home.page?.has_more && <button className="btn ghost" onClick={loadMoreProjects} style={{marginTop:12}}>더 보기</button>}
           {error && <div className="section-title" style={{color:'#ef4444'}}>⚠ {error}</div>}
         </div>
 
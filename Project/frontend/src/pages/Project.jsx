@@ -13,11 +13,18 @@ const normalizeSavedResults = (savedList, promptList = []) => {
       url: item?.url || item?.path || '',
       path: item?.path || '',
       prompt: item?.prompt ?? promptList[idx] ?? '',
-      message: item?.message || ''
+      message: item?.message || '',
+      sha256: item?.sha256 || '',
+      fingerprint: item?.fingerprint || ''
     }
   })
 }
 
+// 서버에 저장된 파일은 /api/media로 제공 (fal.ai url은 만료되므로 로컬 파일 우선)
+const mediaQuery = (s) => `path=${encodeURIComponent(s.path)}${s.sha256 ? `&v=${s.sha256.slice(0, 16)}` : ''}`
+const mediaUrl = (s) => (s.path && !/^https?:/.test(s.path)) ? `${API_BASE}/api/media?${mediaQuery(s)}` : (s.url || s.path)
+const thumbUrl = (s, w = 320) => (s.path && !/^https?:/.test(s.path)) ? `${API_BASE}/api/media/thumb?${mediaQuery(s)}&w=${w}` : (s.url || s.path)
+
 export default function Project(){
   const { id } = useParams()
   const nav = useNavigate()
@@ -34,6 +41,7 @@ export default function Project(){
   const [story, setStory] = useState('')
   const [title, setTitle] = useState('')
   const [minShots, setMinShots] = useState(2)
+  const [chunked, setChunked] = useState(false)
   const [prompts, setPrompts] = useState([])
   const [cuts, setCuts] = useState([])
   const [saved, setSaved] = useState([])
@@ -41,6 +49,8 @@ export default function Project(){
   const [error, setError] = useState('')
   const [projectMode, setProjectMode] = useState('story')
   const [imageJobId, setImageJobId] = useState('')
+  // 실패/취소된 이미지 작업 (이어서 생성할 때 사용)
+  const [resumableJobId, setResumableJobId] = useState('')
   const [imageProgress, setImageProgress] = useState({status:'',progress:0,message:''})
   const [projectLoaded, setProjectLoaded] = useState(false)
   const [lastSavedDraft, setLastSavedDraft] = useState({title:'', story:'', minShots:2, styleKey: 'surreal'})
@@ -130,29 +140,60 @@ export default function Project(){
     }
   }, [selectedStyleKey, projectLoaded, lastSavedDraft.styleKey, saveProjectState, cuts.length, story])
 
-  // 이미지 생성 진행 상황 polling
+  // 이미지 생성 진행 상황 스트림 (SSE). 끊기면 브라우저가 Last-Event-ID로 이어받는다
   useEffect(() => {
     if(!imageJobId) return
-    const interval = setInterval(async () => {
-      try{
-        const progRes = await fetch(`${API_BASE}/api/images/progress/${imageJobId}`)
-        if(!progRes.ok) return
-        const prog = await progRes.json()
-        setImageProgress({status:prog.status,progress:prog.progress,message:prog.message||''})
-        if(prog.status === 'completed'){
-          clearInterval(interval)
-          setLoading(false)
-          setSaved(normalizeSavedResults(prog.results||[], prompts))
-          setImageJobId('')
-        }else if(prog.status === 'error'){
-          clearInterval(interval)
-          setLoading(false)
-          setError(prog.error || '이미지 생성 실패')
-          setImageJobId('')
-        }
-      }catch(e){ clearInterval(interval); setLoading(false); setImageJobId('') }
-    }, 500)
-    return () => clearInterval(interval)
+    const source = new EventSource(`${API_BASE}/api/images/events/${imageJobId}`)
+    const finish = () => { source.close(); setLoading(false); setImageJobId('') }
+    source.addEventListener('progress', (e) => {
+      const prog = JSON.parse(e.data)
+      setImageProgress({status:prog.status,progress:prog.progress,message:prog.message||''})
+    })
+    // 스토리보드+이미지 동시 생성 모드: 컷이 도착하는 대로 목록에 추가
+    source.addEventListener('cut', (e) => {
+      const { index, cut, prompt } = JSON.parse(e.data)
+      setCuts(prev => { const next = [...prev]; next[index] = cut; return next })
+      setPrompts(prev => { const next = [...prev]; next[index] = prompt; return next })
+    })
+    source.addEventListener('storyboard', (e) => {
+      const data = JSON.parse(e.data)
+      setCuts(data.cuts||[])
+      setPrompts(data.prompts||[])
+      if(data.title) setTitle(data.title)
+    })
+    source.addEventListener('result', (e) => {
+      const result = JSON.parse(e.data)
+      setSaved(prev => {
+        const next = [...prev]
+        while(next.length < result.index) next.push({})
+        next[result.index] = normalizeSavedResults([result], [result.prompt])[0]
+        return next
+      })
+    })
+    source.addEventListener('completed', (e) => {
+      const prog = JSON.parse(e.data)
+      setImageProgress({status:prog.status,progress:prog.progress,message:prog.message||''})
+      setSaved(normalizeSavedResults(prog.results||[], prompts))
+      finish()
+    })
+    source.addEventListener('failed', (e) => {
+      const prog = JSON.parse(e.data)
+      setImageProgress({status:'error',progress:prog.progress||0,message:prog.message||''})
+      setError(prog.error || '이미지 생성 실패')
+      setResumableJobId(imageJobId)
+      finish()
+    })
+    source.addEventListener('cancelled', (e) => {
+      const prog = JSON.parse(e.data)
+      setImageProgress({status:'cancelled',progress:prog.progress||0,message:prog.message||'작업이 취소되었습니다'})
+      setResumableJobId(imageJobId)
+      finish()
+    })
+    source.onerror = () => {
+      // 재연결 중이면 그대로 두고, 완전히 닫힌 경우(404 등)만 정리
+      if(source.readyState === EventSource.CLOSED) finish()
+    }
+    return () => source.close()
   }, [imageJobId])
 
   useEffect(() => {
@@ -172,29 +213,65 @@ export default function Project(){
   }, [title, story, minShots, projectLoaded, lastSavedDraft, saveProjectState])
 
   const createStoryboard = async () => {
-    setLoading(true); setError(''); setSaved([])
+    setLoading(true); setError('')
     try{
-      const res = await fetch(`${API_BASE}/api/storyboard`, {method:'POST', headers:{'Content-Type':'application/json'}, body: JSON.stringify({ project_id: id, story, title: title || undefined, min_shots_per_scene: Number(minShots)||1, style_key: selectedStyleKey })})
+      const res = await fetch(`${API_BASE}/api/storyboard`, {method:'POST', headers:{'Content-Type':'application/json'}, body: JSON.stringify({ project_id: id, story, title: title || undefined, min_shots_per_scene: Number(minShots)||1, style_key: selectedStyleKey, chunked })})
       if(!res.ok) throw new Error(`Storyboard failed (${res.status})`)
       const data = await res.json()
       setPrompts(data.prompts||[])
       setCuts(data.cuts||[])
+      // 프롬프트가 그대로인 컷의 이미지는 서버가 유지해서 돌려준다
+      setSaved(normalizeSavedResults(data.saved_results||[], data.prompts||[]))
       if(data.title) setTitle(data.title)
     }catch(e){ setError(e?.message || '오류가 발생했습니다') }
     finally{ setLoading(false) }
   }
 
   const generateImages = async () => {
-    setLoading(true); setError(''); setImageProgress({status:'queued',progress:0,message:'작업 시작...'})
-    setSaved([])
+    setLoading(true); setError(''); setResumableJobId(''); setImageProgress({status:'queued',progress:0,message:'작업 시작...'})
+    // 이미 생성된 이미지가 있으면 바뀐 컷만 다시 생성
+    const incremental = saved.some(s => s && s.path)
+    if(!incremental) setSaved([])
     try{
-      const res = await fetch(`${API_BASE}/api/images`, {method:'POST', headers:{'Content-Type':'application/json'}, body: JSON.stringify({ project_id: id, prompts, output_dir: 'Project/data/outputs', model: 'fal-ai/flux/dev', size: 'portrait_16_9' })})
+      const res = await fetch(`${API_BASE}/api/images`, {method:'POST', headers:{'Content-Type':'application/json'}, body: JSON.stringify({ project_id: id, prompts, model: 'fal-ai/flux/dev', size: 'portrait_16_9', incremental })})
       if(!res.ok) throw new Error(`Images failed (${res.status})`)
       const data = await res.json()
       setImageJobId(data.job_id)
     }catch(e){ setError(e?.message || '오류가 발생했습니다'); setLoading(false); setImageProgress({status:'',progress:0,message:''}) }
   }
 
+  const cancelImages = async () => {
+    if(!imageJobId) return
+    try{
+      const res = await fetch(`${API_BASE}/api/images/cancel/${imageJobId}`, {method:'POST'})
+      if(!res.ok) throw new Error(`Cancel failed (${res.status})`)
+    }catch(e){ setError(e?.message || '오류가 발생했습니다') }
+  }
+
+  // 실패/취소된 작업에서 빠진 컷만 이어서 생성
+  const resumeImages = async () => {
+    if(!resumableJobId) return
+    setLoading(true); setError(''); setImageProgress({status:'queued',progress:0,message:'작업 시작...'})
+    try{
+      const res = await fetch(`${API_BASE}/api/images/resume/${resumableJobId}`, {method:'POST'})
+      if(!res.ok) throw new Error(`Resume failed (${res.status})`)
+      const data = await res.json()
+      setResumableJobId('')
+      setImageJobId(data.job_id)
+    }catch(e){ setError(e?.message || '오류가 발생했습니다'); setLoading(false) }
+  }
+
+  const createStoryboardWithImages = async () => {
+    setLoading(true); setError(''); setResumableJobId(''); setSaved([]); setCuts([]); setPrompts([])
+    setImageProgress({status:'queued',progress:0,message:'작업 시작...'})
+    try{
+      const res = await fetch(`${API_BASE}/api/storyboard/images`, {method:'POST', headers:{'Content-Type':'application/json'}, body: JSON.stringify({ project_id: id, story, title: title || undefined, min_shots_per_scene: Number(minShots)||1, style_key: selectedStyleKey, model: 'fal-ai/flux/dev', size: 'portrait_16_9' })})
+      if(!res.ok) throw new Error(`Storyboard images failed (${res.status})`)
+      const data = await res.json()
+      setImageJobId(data.job_id)
+    }catch(e){ setError(e?.message || '오류가 발생했습니다'); setLoading(false); setImageProgress({status:'',progress:0,message:''}) }
+  }
+
   const handleSavedPromptChange = (idx, value) => {
     setSaved(prev => prev.map((item, i) => i === idx ? {...item, prompt: value} : item))
     setPrompts(prev => {
@@ -216,7 +293,7 @@ export default function Project(){
       const res = await fetch(`${API_BASE}/api/images/regenerate`, {
         method:'POST',
         headers:{'Content-Type':'application/json'},
-        body: JSON.stringify({ project_id: id, index: idx, prompt: promptText, model:'fal-ai/flux/dev', size:'portrait_16_9', output_dir:'Project/data/outputs' })
+        body: JSON.stringify({ project_id: id, index: idx, prompt: promptText, model:'fal-ai/flux/dev', size:'portrait_16_9', use_cache:false })
       })
       if(!res.ok) throw new Error('재생성 실패')
       const data = await res.json()
@@ -316,7 +393,9 @@ export default function Project(){
               <div className="grid" style={{gridTemplateColumns:'1fr 160px 160px'}}>
                 <input className="input-sm" placeholder="작품 제목" value={title} onChange={e=>setTitle(e.target.value)} />
                 <input className="input-sm" placeholder="최소 샷 수" type="number" min={1} max={8} value={minShots} onChange={e=>setMinShots(e.target.value)} />
+                <label className="help"><input type="checkbox" checked={chunked} onChange={e=>setChunked(e.target.checked)} /> 섹션별 분할 생성</label>
                 <button className="btn primary" onClick={createStoryboard} disabled={disabledGen}>{loading? '생성 중…':'스토리보드 생성'}</button>
+                <button className="btn" onClick={createStoryboardWithImages} disabled={disabledGen}>스토리보드+이미지 한번에</button>
               </div>
               <textarea className="input" placeholder="스토리를 입력하세요" value={story} onChange={e=>setStory(e.target.value)} />
               {error && <div className="help">⚠ {error}</div>}
@@ -356,6 +435,8 @@ export default function Project(){
                 </div>
                 <div className="actions" style={{marginTop:8}}>
                   <button className="btn primary" onClick={generateImages} disabled={disabledImg}>{loading? '이미지 생성 중…':'이미지 생성'}</button>
+                  {loading && imageJobId && <button className="btn ghost" onClick={cancelImages}>취소</button>}
+                  {!loading && resumableJobId && <button className="btn" onClick={resumeImages}>이어서 생성</button>}
                 <button className="btn ghost" onClick={handleResetSaved}>초기화</button>
                 </div>
               </div>
@@ -370,7 +451,7 @@ export default function Project(){
                     <div className="image-card" key={i}>
                       <div className="image-preview">
                         {(s.url || s.path) ? (
-                          <img src={s.url || s.path} alt={`컷 ${i+1}`} style={{width:'100%',height:'100%',objectFit:'cover',borderRadius:12}} />
+                          <img src={thumbUrl(s)} loading="lazy" alt={`컷 ${i+1}`} style={{width:'100%',height:'100%',objectFit:'cover',borderRadius:12}} />
                         ) : (
                           <div className="help" style={{textAlign:'center'}}>이미지가 없습니다</div>
                         )}
@@ -379,7 +460,7 @@ export default function Project(){
                       <textarea className="input" style={{minHeight:90}} value={s.prompt || prompts[i] || ''} onChange={e=>handleSavedPromptChange(i, e.target.value)} />
                       <div className="image-actions">
                         <button className="btn primary" onClick={()=>regenerateImage(i)} disabled={regenIndex===i || loading}>{regenIndex===i ? '재생성 중…' : '이 프롬프트로 다시 생성'}</button>
-                        {(s.url || s.path) && <a className="btn ghost" href={s.url || s.path} target="_blank" rel="noreferrer" style={{textAlign:'center',display:'inline-block',padding:'10px 14px'}}>원본 열기</a>}
+                        {(s.url || s.path) && <a className="btn ghost" href={mediaUrl(s)} target="_blank" rel="noreferrer" style={{textAlign:'center',display:'inline-block',padding:'10px 14px'}}>원본 열기</a>}
                       </div>
                     </div>
                   ))}
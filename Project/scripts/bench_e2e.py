@@ -0,0 +1,364 @@
+"""오프라인 end-to-end 벤치마크 (네트워크 불필요).
+
+OpenAI / fal.ai / 이미지 CDN을 로컬 가짜 서버로 바꿔 FastAPI 앱을 그대로 구동한다.
+프로젝트마다 /api/projects → /api/storyboard → /api/images(완료까지 대기) → /api/video 순서로 호출하고
+단계별 p50/p95, 처리량, state.json 쓰기 횟수, 최대 RSS를 출력한다.
+가짜 서버의 지연/지터/오류율은 인자로 조절한다. 데이터는 임시 폴더에 쓰고 끝나면 지운다.
+
+	python scripts/bench_e2e.py --projects 8 --concurrency 4 --shots 6 --llm-latency 1.0 --fal-latency 0.8 --jitter 0.2 --error-rate 0.02
+"""
+import argparse
+import json
+import math
+import os
+import random
+import re
+import resource
+import shutil
+import struct
+import sys
+import tempfile
+import threading
+import time
+import types
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PROJECT_DIR = os.path.normpath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, PROJECT_DIR)
+
+STORY = (
+	"1. 출발\n어린 기사 아린은 마을을 떠나 북쪽 성으로 향한다.\n\n"
+	"2. 숲\n안개 낀 숲에서 아린은 길을 잃은 여우를 만난다. 여우: \"따라와.\"\n\n"
+	"3. 성\n성문 앞에서 아린은 오래된 맹세를 떠올린다. 아린: \"돌아가지 않겠어.\""
+)
+
+
+class Fakes:
+	"""가짜 서버들이 공유하는 지연/오류 설정과 호출 통계"""
+
+	def __init__(self, latency: dict, jitter: float, error_rate: float, seed: int):
+		self.latency = latency
+		self.jitter = jitter
+		self.error_rate = error_rate
+		self.random = random.Random(seed)
+		self.lock = threading.Lock()
+		self.calls = {"llm": 0, "fal": 0, "download": 0}
+		self.errors = {"llm": 0, "fal": 0, "download": 0}
+
+	def wait(self, kind: str) -> bool:
+		"""지연 후 이번 호출을 실패시킬지 여부를 반환"""
+		with self.lock:
+			self.calls[kind] += 1
+			delay = max(0.0, self.latency[kind] + self.random.uniform(-self.jitter, self.jitter))
+			fail = self.random.random() < self.error_rate
+			if fail:
+				self.errors[kind] += 1
+		time.sleep(delay)
+		return fail
+
+
+def _png(width: int, height: int, color: tuple) -> bytes:
+	"""단색 PNG (PIL 없이 생성)"""
+	def chunk(tag: bytes, data: bytes) -> bytes:
+		return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data) & 0xFFFFFFFF)
+	row = b"\x00" + bytes(color) * width
+	raw = zlib.compress(row * height, 6)
+	header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+	return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", raw) + chunk(b"IEND", b"")
+
+
+def _fake_storyboard(min_cuts: int) -> dict:
+	cuts = []
+	for i in range(min_cuts):
+		cuts.append({
+			"cut_id": i + 1,
+			"cut_name": f"Scene {i + 1}",
+			"composition": "medium shot, hero centered",
+			"dialogues": [{"speaker": "아린", "text": f"{i + 1}번째 장면의 대사", "emotion": "calm"}],
+			"background": "misty forest at dawn",
+			"actions": ["walks forward"],
+			"characters": ["아린"],
+		})
+	return {"title": "Bench Story", "cuts": cuts}
+
+
+def _start_server(handler_cls) -> ThreadingHTTPServer:
+	server = ThreadingHTTPServer(("127.0.0.1", 0), handler_cls)
+	server.daemon_threads = True
+	threading.Thread(target=server.serve_forever, name=f"fake-{handler_cls.__name__}", daemon=True).start()
+	return server
+
+
+def start_fake_openai(fakes: Fakes) -> ThreadingHTTPServer:
+	class OpenAIHandler(BaseHTTPRequestHandler):
+		def log_message(self, *args):
+			pass
+
+		def do_POST(self):
+			body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", "0"))) or b"{}")
+			if fakes.wait("llm"):
+				self._json(500, {"error": {"message": "fake upstream error", "type": "server_error"}})
+				return
+			prompt = " ".join(m.get("content", "") for m in body.get("messages", []))
+			match = re.search(r"컷 (\d+)개 이상", prompt)
+			content = json.dumps(_fake_storyboard(int(match.group(1)) if match else 3), ensure_ascii=False)
+			base = {"id": "chatcmpl-bench", "created": int(time.time()), "model": body.get("model", "gpt-4o-mini")}
+			if body.get("stream"):
+				self.send_response(200)
+				self.send_header("Content-Type", "text/event-stream")
+				self.end_headers()
+				for i in range(0, len(content), 40):
+					chunk = {**base, "object": "chat.completion.chunk", "choices": [{"index": 0, "delta": {"content": content[i:i + 40]}, "finish_reason": None}]}
+					self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+				self.wfile.write(b"data: [DONE]\n\n")
+				return
+			self._json(200, {
+				**base,
+				"object": "chat.completion",
+				"choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+				"usage": {"prompt_tokens": len(prompt) // 2, "completion_tokens": len(content) // 2, "total_tokens": (len(prompt) + len(content)) // 2},
+			})
+
+		def _json(self, status: int, data: dict):
+			payload = json.dumps(data).encode("utf-8")
+			self.send_response(status)
+			self.send_header("Content-Type", "application/json")
+			self.send_header("Content-Length", str(len(payload)))
+			self.end_headers()
+			self.wfile.write(payload)
+
+	return _start_server(OpenAIHandler)
+
+
+def start_fake_cdn(fakes: Fakes, width: int, height: int) -> ThreadingHTTPServer:
+	images: dict = {}
+
+	class CdnHandler(BaseHTTPRequestHandler):
+		protocol_version = "HTTP/1.1"  # keep-alive 효과를 볼 수 있게
+
+		def log_message(self, *args):
+			pass
+
+		def do_GET(self):
+			if fakes.wait("download"):
+				self.send_response(503)
+				self.send_header("Content-Length", "0")
+				self.end_headers()
+				return
+			key = self.path.rsplit("/", 1)[-1]
+			data = images.get(key)
+			if data is None:
+				seed = zlib.crc32(key.encode("utf-8"))
+				data = images[key] = _png(width, height, (seed & 0xFF, (seed >> 8) & 0xFF, (seed >> 16) & 0xFF))
+			self.send_response(200)
+			self.send_header("Content-Type", "image/png")
+			self.send_header("Content-Length", str(len(data)))
+			self.end_headers()
+			self.wfile.write(data)
+
+	return _start_server(CdnHandler)
+
+
+def install_fake_fal(fakes: Fakes, cdn_base: str) -> None:
+	"""fal_client 모듈을 가짜로 바꿔 끼운다 (워커를 같은 프로세스의 스레드로 돌리므로 그대로 적용됨)"""
+	module = types.ModuleType("fal_client")
+
+	def subscribe(model: str, arguments: dict, **kwargs):
+		if fakes.wait("fal"):
+			raise RuntimeError("fake fal.ai error")
+		key = f"{zlib.crc32(json.dumps(arguments, sort_keys=True).encode('utf-8')):08x}-{time.monotonic_ns()}.png"
+		return {"images": [{"url": f"{cdn_base}/img/{key}", "content_type": "image/png"}], "seed": 0}
+
+	module.subscribe = subscribe
+	sys.modules["fal_client"] = module
+
+
+def percentile(values: list, q: float) -> float:
+	if not values:
+		return 0.0
+	ordered = sorted(values)
+	# nearest-rank
+	rank = max(0, min(len(ordered) - 1, math.ceil(q / 100 * len(ordered)) - 1))
+	return ordered[rank]
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument("--projects", type=int, default=8)
+	parser.add_argument("--concurrency", type=int, default=4, help="동시에 진행하는 프로젝트 수")
+	parser.add_argument("--workers", type=int, default=2, help="작업 큐 워커 수 (같은 프로세스의 스레드)")
+	parser.add_argument("--shots", type=int, default=6)
+	parser.add_argument("--llm-latency", type=float, default=1.0)
+	parser.add_argument("--fal-latency", type=float, default=0.8)
+	parser.add_argument("--download-latency", type=float, default=0.05)
+	parser.add_argument("--jitter", type=float, default=0.2)
+	parser.add_argument("--error-rate", type=float, default=0.0)
+	parser.add_argument("--image-size", default="288x512", help="가짜 CDN이 돌려주는 PNG 크기")
+	parser.add_argument("--use-cache", action="store_true", help="스토리보드/이미지 캐시 사용 (기본은 매번 생성)")
+	parser.add_argument("--skip-video", action="store_true")
+	parser.add_argument("--seed", type=int, default=1)
+	parser.add_argument("--keep", action="store_true", help="임시 데이터 폴더를 지우지 않음")
+	args = parser.parse_args()
+
+	fakes = Fakes(
+		{"llm": args.llm_latency, "fal": args.fal_latency, "download": args.download_latency},
+		args.jitter,
+		args.error_rate,
+		args.seed,
+	)
+	width, height = (int(v) for v in args.image_size.lower().split("x"))
+	openai_server = start_fake_openai(fakes)
+	cdn_server = start_fake_cdn(fakes, width, height)
+	install_fake_fal(fakes, f"http://127.0.0.1:{cdn_server.server_port}")
+
+	data_dir = tempfile.mkdtemp(prefix="bench-e2e-")
+	os.environ.update({
+		"OPENAI_API_KEY": "sk-bench",
+		"OPENAI_BASE_URL": f"http://127.0.0.1:{openai_server.server_port}/v1",
+		"APP_DATA_DIR": data_dir,
+		"JOB_DB_PATH": os.path.join(data_dir, "jobs.sqlite3"),
+		"JOB_WORKERS": "0",
+		"JOB_POLL_SECONDS": "0.05",
+		"IMAGE_CACHE_DIR": os.path.join(data_dir, "cache", "images"),
+		"STORYBOARD_CACHE_DIR": os.path.join(data_dir, "cache", "storyboards"),
+		"THUMB_CACHE_DIR": os.path.join(data_dir, "cache", "thumbs"),
+		"VIDEO_SEGMENT_CACHE_DIR": os.path.join(data_dir, "cache", "segments"),
+		# 가짜 서버라 제공자 속도 제한은 기본으로 끈다 (한도 영향을 보려면 환경변수로 지정)
+		"FAL_RATE_PER_SEC": os.getenv("FAL_RATE_PER_SEC", "0"),
+		"OPENAI_RATE_PER_SEC": os.getenv("OPENAI_RATE_PER_SEC", "0"),
+	})
+
+	from fastapi.testclient import TestClient
+	import backend.main as app_main
+	from backend.services.job_queue import run_worker
+
+	# state.json / metadata.json 쓰기 횟수 집계
+	writes = {"state": 0, "meta": 0}
+	original_write = app_main.atomic_write_json
+
+	def counting_write(path, data, **kwargs):
+		name = os.path.basename(path)
+		if name in ("state.json", "metadata.json"):
+			with fakes.lock:
+				writes["state" if name == "state.json" else "meta"] += 1
+		return original_write(path, data, **kwargs)
+
+	app_main.atomic_write_json = counting_write
+
+	stop = threading.Event()
+	workers = [
+		threading.Thread(target=run_worker, args=(app_main.JOB_DB_PATH, app_main.JOB_HANDLERS, f"bench-{i}", stop), daemon=True)
+		for i in range(args.workers)
+	]
+	for worker in workers:
+		worker.start()
+
+	timings: dict = {"storyboard": [], "images": [], "video": [], "project": []}
+	failures: dict = {}
+	images_done = 0
+	lock = threading.Lock()
+
+	def record(stage: str, seconds: float) -> None:
+		with lock:
+			timings[stage].append(seconds)
+
+	def fail(stage: str, detail: str) -> None:
+		with lock:
+			failures.setdefault(stage, []).append(detail)
+
+	def run_project(client: "TestClient", n: int) -> None:
+		nonlocal images_done
+		start = time.perf_counter()
+		project_id = client.post("/api/projects", json={"title": f"bench-{n}"}).json()["id"]
+		# 프로젝트 이미지는 서버가 projects/<id>/outputs에 저장한다
+		output_dir = os.path.join(data_dir, "projects", project_id, "outputs")
+
+		t = time.perf_counter()
+		res = client.post("/api/storyboard", json={
+			"project_id": project_id,
+			"story": f"{STORY}\n\n(#{n})",
+			"min_shots_per_scene": args.shots,
+			"use_cache": args.use_cache,
+		})
+		if res.status_code != 200:
+			fail("storyboard", res.text[:200])
+			return
+		record("storyboard", time.perf_counter() - t)
+		prompts = res.json()["prompts"]
+
+		t = time.perf_counter()
+		job_id = client.post("/api/images", json={
+			"project_id": project_id,
+			"prompts": prompts,
+			"model": "fal-ai/flux/dev",
+			"size": "portrait_16_9",
+			"use_cache": args.use_cache,
+		}).json()["job_id"]
+		while True:
+			progress = client.get(f"/api/images/progress/{job_id}").json()
+			if progress["status"] in ("completed", "error", "cancelled"):
+				break
+			time.sleep(0.05)
+		if progress["status"] != "completed":
+			fail("images", progress.get("error") or progress.get("message", ""))
+			return
+		record("images", time.perf_counter() - t)
+		results = progress.get("results") or []
+		with lock:
+			images_done += len(results)
+
+		if not args.skip_video:
+			t = time.perf_counter()
+			res = client.post("/api/video", json={
+				"image_paths": [r["path"] for r in results],
+				"output_path": os.path.join(output_dir, "final.mp4"),
+				"durations": [0.5] * len(results),
+			})
+			if res.status_code != 200:
+				fail("video", res.text[:200])
+				return
+			record("video", time.perf_counter() - t)
+		record("project", time.perf_counter() - start)
+
+	wall_start = time.perf_counter()
+	try:
+		with TestClient(app_main.app) as client:
+			with ThreadPoolExecutor(max_workers=max(1, args.concurrency)) as executor:
+				for future in [executor.submit(run_project, client, n) for n in range(args.projects)]:
+					try:
+						future.result()
+					except Exception as e:
+						fail("project", repr(e))
+	finally:
+		wall = time.perf_counter() - wall_start
+		stop.set()
+		for worker in workers:
+			worker.join(timeout=5)
+		openai_server.shutdown()
+		cdn_server.shutdown()
+
+	own_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+	child_rss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+	completed = len(timings["project"])
+	print(f"projects={args.projects} completed={completed} concurrency={args.concurrency} workers={args.workers} shots={args.shots} wall={wall:.2f}s")
+	print(f"throughput: {completed / wall:.3f} projects/s, {images_done / wall:.2f} images/s")
+	for stage in ("storyboard", "images", "video", "project"):
+		values = timings[stage]
+		if values:
+			print(f"{stage:<10} n={len(values):<4} p50={percentile(values, 50):.3f}s p95={percentile(values, 95):.3f}s max={max(values):.3f}s")
+	print(f"state.json writes={writes['state']} ({writes['state'] / max(1, args.projects):.1f}/project), metadata.json writes={writes['meta']}")
+	print(f"fake calls={fakes.calls} injected errors={fakes.errors}")
+	print(f"peak RSS: api+workers={own_rss:.1f}MB ffmpeg={child_rss:.1f}MB")
+	for stage, details in failures.items():
+		print(f"FAILED {stage}: {len(details)} (e.g. {details[0]})")
+
+	if args.keep:
+		print(f"data dir: {data_dir}")
+	else:
+		shutil.rmtree(data_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+	main()
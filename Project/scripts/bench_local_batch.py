@@ -0,0 +1,49 @@
+"""로컬 diffusers 경로 배치 생성 벤치마크 (CPU).
+
+같은 프롬프트 묶음을 batch_size=1(기존 한 장씩 루프)과 지정한 배치 크기로 각각 생성해 images/sec를 비교한다.
+기본 모델은 CPU에서도 빠르게 도는 테스트용 소형 파이프라인이다.
+
+	python scripts/bench_local_batch.py --prompts 8 --batch-sizes 1,4,8 --steps 4
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from backend.services.image_generator import _generate_local_batches, _get_pipe  # noqa: E402
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument("--model", default="hf-internal-testing/tiny-stable-diffusion-torch")
+	parser.add_argument("--prompts", type=int, default=8)
+	parser.add_argument("--batch-sizes", default="1,4,8")
+	parser.add_argument("--steps", type=int, default=4)
+	parser.add_argument("--size", default="128x128")
+	args = parser.parse_args()
+
+	load_start = time.perf_counter()
+	pipe = _get_pipe(args.model)
+	print(f"model={args.model} device={pipe.device} dtype={pipe.unet.dtype} load={time.perf_counter() - load_start:.2f}s")
+
+	prompts = [f"a lighthouse on a cliff at dusk, shot {i}" for i in range(args.prompts)]
+	# 첫 호출은 커널 준비 비용이 섞이므로 한 번 예열
+	with tempfile.TemporaryDirectory() as tmp:
+		_generate_local_batches(pipe, prompts[:1], size=args.size, output_dir=tmp, batch_size=1, steps=args.steps)
+
+	baseline = None
+	for batch_size in (int(b) for b in args.batch_sizes.split(",")):
+		with tempfile.TemporaryDirectory() as tmp:
+			start = time.perf_counter()
+			_generate_local_batches(pipe, prompts, size=args.size, output_dir=tmp, batch_size=batch_size, steps=args.steps)
+			elapsed = time.perf_counter() - start
+		rate = len(prompts) / elapsed
+		baseline = baseline or rate
+		print(f"batch_size={batch_size:<3} elapsed={elapsed:.2f}s images/sec={rate:.3f} speedup={rate / baseline:.2f}x")
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,64 @@
+"""백엔드 기동 시간/RSS 회귀 체크.
+
+새 파이썬 프로세스에서 `import backend.main`에 걸리는 시간과 그 직후 최대 RSS를 여러 번 재고 중앙값을 출력한다.
+torch/diffusers/fal_client가 import 시점에 올라오거나 기준치를 넘으면 종료 코드 1.
+
+	python scripts/bench_startup.py --runs 5 --max-seconds 3 --max-rss-mb 300
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+PROJECT_DIR = os.path.normpath(os.path.join(os.path.dirname(__file__), ".."))
+HEAVY_MODULES = ["torch", "diffusers", "fal_client"]
+
+_PROBE = """
+import json, resource, sys, time
+start = time.perf_counter()
+import backend.main
+elapsed = time.perf_counter() - start
+print(json.dumps({
+	"seconds": elapsed,
+	"rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+	"heavy": [m for m in %r if m in sys.modules],
+}))
+""" % (HEAVY_MODULES,)
+
+
+def _probe() -> dict:
+	env = {**os.environ, "OPENAI_API_KEY": os.environ.get("OPENAI_API_KEY", "sk-bench"), "JOB_WORKERS": "0"}
+	out = subprocess.run([sys.executable, "-c", _PROBE], cwd=PROJECT_DIR, env=env, capture_output=True, text=True, check=True)
+	return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument("--runs", type=int, default=5)
+	parser.add_argument("--max-seconds", type=float, default=3.0)
+	parser.add_argument("--max-rss-mb", type=float, default=300.0)
+	args = parser.parse_args()
+
+	samples = [_probe() for _ in range(args.runs)]
+	seconds = statistics.median(s["seconds"] for s in samples)
+	rss = statistics.median(s["rss_mb"] for s in samples)
+	heavy = sorted({m for s in samples for m in s["heavy"]})
+	print(f"import backend.main: median={seconds:.3f}s rss={rss:.1f}MB runs={args.runs}")
+	print(f"heavy modules loaded at import: {heavy or 'none'}")
+
+	failures = []
+	if heavy:
+		failures.append(f"무거운 모듈이 import 시점에 로드됨: {heavy}")
+	if seconds > args.max_seconds:
+		failures.append(f"기동 시간 {seconds:.3f}s > {args.max_seconds}s")
+	if rss > args.max_rss_mb:
+		failures.append(f"RSS {rss:.1f}MB > {args.max_rss_mb}MB")
+	for failure in failures:
+		print(f"FAIL: {failure}")
+	sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,81 @@
+"""compose_video 인코딩 벤치마크 (CPU 전용 환경 기준).
+
+합성 이미지 N장을 만들어 compose_video로 인코딩하고 인코딩 fps와 최대 RSS를 출력한다.
+이어서 한 컷만 바꿔 다시 합성하는 시간(세그먼트 하나 인코딩 + concat)도 잰다.
+
+	python scripts/bench_video_encode.py --shots 20 --duration 2.5 --fps 24
+	python scripts/bench_video_encode.py --workers 1   # 세그먼트 병렬 인코딩 끄기
+	python scripts/bench_video_encode.py --captions    # 컷마다 대사 자막 2줄 (자막 없는 경우와 시간 비교)
+"""
+import argparse
+import os
+import resource
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from PIL import Image, ImageDraw  # noqa: E402
+
+from backend.services.video_composer import compose_video, segment_cache, _parse_video_size  # noqa: E402
+
+
+def _make_images(directory: str, count: int, size: tuple[int, int]) -> list[str]:
+	paths = []
+	for i in range(count):
+		img = Image.new("RGB", size, ((i * 37) % 255, (i * 91) % 255, (i * 53) % 255))
+		draw = ImageDraw.Draw(img)
+		draw.rectangle([size[0] // 4, size[1] // 4, size[0] * 3 // 4, size[1] * 3 // 4], outline=(255, 255, 255), width=8)
+		path = os.path.join(directory, f"image_{i + 1:02d}.png")
+		img.save(path)
+		paths.append(path)
+	return paths
+
+
+def _peak_rss_mb() -> tuple[float, float]:
+	# Linux에서 ru_maxrss 단위는 KB. ffmpeg 자식 프로세스도 함께 본다
+	own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+	children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+	return own / 1024, children / 1024
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument("--shots", type=int, default=20)
+	parser.add_argument("--duration", type=float, default=2.5)
+	parser.add_argument("--fps", type=int, default=24)
+	parser.add_argument("--size", default="portrait_16_9")
+	parser.add_argument("--preset", default="veryfast")
+	parser.add_argument("--workers", type=int, default=None, help="세그먼트 인코딩 프로세스 수 (기본: VIDEO_ENCODE_WORKERS)")
+	parser.add_argument("--fade", type=float, default=0.0)
+	parser.add_argument("--captions", action="store_true")
+	args = parser.parse_args()
+
+	with tempfile.TemporaryDirectory() as tmp:
+		# 실제 세그먼트 캐시를 건드리지 않도록 임시 캐시 사용
+		segment_cache.root = os.path.join(tmp, "segments")
+		paths = _make_images(tmp, args.shots, _parse_video_size(args.size))
+		output = os.path.join(tmp, "bench.mp4")
+		frames = sum(max(1, round(args.duration * args.fps)) for _ in paths)
+		options = dict(fps=args.fps, output_path=output, durations=[args.duration] * len(paths), size=args.size, preset=args.preset, fade=args.fade, max_workers=args.workers)
+		if args.captions:
+			options["captions"] = [[f"민수: {i + 1}번째 컷의 첫 번째 대사입니다", "지은: 그리고 조금 더 긴 두 번째 대사가 이어집니다"] for i in range(len(paths))]
+		start = time.perf_counter()
+		compose_video(paths, **options)
+		elapsed = time.perf_counter() - start
+		own_rss, ffmpeg_rss = _peak_rss_mb()
+		print(f"shots={args.shots} frames={frames} size={args.size} preset={args.preset} captions={args.captions}")
+		print(f"elapsed={elapsed:.2f}s encode_fps={frames / elapsed:.1f} realtime_x={frames / args.fps / elapsed:.2f}")
+		print(f"output_bytes={os.path.getsize(output)} peak_rss_python={own_rss:.1f}MB peak_rss_ffmpeg={ffmpeg_rss:.1f}MB")
+
+		# 한 컷만 다시 생성된 경우
+		Image.new("RGB", _parse_video_size(args.size), (255, 255, 255)).save(paths[len(paths) // 2])
+		start = time.perf_counter()
+		compose_video(paths, **options)
+		incremental = time.perf_counter() - start
+		print(f"one_shot_changed elapsed={incremental:.2f}s speedup={elapsed / incremental:.1f}x")
+
+
+if __name__ == "__main__":
+	main()